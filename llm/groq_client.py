@@ -1,70 +1,248 @@
 import os
+import json
+import time
 import requests
 import logging
-from typing import Optional
+from typing import Iterator, Optional
+from utils import metrics
+from utils.config import get_setting, performance_config
+from llm.rate_limit import LLMUnavailable, estimate_tokens, get_breaker, get_limiter, parse_retry_after
+from llm.textrank import textrank_summary
 
 logger = logging.getLogger(__name__)
 
-def query_groq_llm(prompt: str, max_retries: int = 3, timeout: int = 30) -> str:
+DEFAULT_API_BASE = "https://api.groq.com/openai/v1"
+
+def chat_completions_url() -> str:
+    """Chat completions URL under GROQ_API_BASE (any OpenAI-compatible server, e.g. the load-test mock)."""
+    return os.getenv("GROQ_API_BASE", DEFAULT_API_BASE).rstrip("/") + "/chat/completions"
+
+def groq_model() -> str:
+    return get_setting("GROQ_MODEL", "llama3-70b-8192")
+
+def _request(prompt: str, stream: bool = False):
+    headers = {
+        "Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": groq_model(),
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.5,
+        "max_tokens": performance_config().groq_max_tokens
+    }
+    if stream:
+        payload["stream"] = True
+    return chat_completions_url(), headers, payload
+
+def _max_queue_seconds() -> float:
+    return performance_config().groq_max_queue_seconds
+
+def _server_error(e: requests.exceptions.HTTPError) -> bool:
+    return e.response is None or e.response.status_code >= 500
+
+def _fallback(prompt: str, fallback: bool) -> str:
+    if not fallback:
+        raise LLMUnavailable("Groq API did not answer")
+    return get_fallback_summary(prompt)
+
+def query_groq_llm(prompt: str, max_retries: int = 3, timeout: Optional[float] = None, fallback: bool = True) -> str:
     """
     Query Groq LLM with enhanced error handling and fallback options.
+
+    Calls go through the shared rate limiter (requests and tokens per minute,
+    adaptive concurrency) and circuit breaker: a 429 waits for its Retry-After
+    and retries, and while the API is down the fallback is returned at once.
     
     Args:
         prompt: The text prompt to send to the LLM
         max_retries: Maximum number of retry attempts
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds (default: GROQ_TIMEOUT_SECONDS)
+        fallback: Return the offline summary when the API cannot answer; if False, raise LLMUnavailable
     
     Returns:
         str: LLM response or fallback message
     """
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
-        return get_fallback_summary(prompt)
+        return _fallback(prompt, fallback)
 
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": "llama3-70b-8192",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.5,
-        "max_tokens": 1000
-    }
+    timeout = timeout or performance_config().groq_timeout_seconds
+    url, headers, payload = _request(prompt)
+    limiter, breaker = get_limiter(), get_breaker()
+    tokens = estimate_tokens(prompt, payload["max_tokens"])
 
     for attempt in range(max_retries):
         try:
-            logger.info(f"Attempting Groq API call (attempt {attempt + 1}/{max_retries})")
-            response = requests.post(url, headers=headers, json=payload, timeout=timeout)
-            response.raise_for_status()
-            
-            result = response.json()["choices"][0]["message"]["content"]
+            with limiter.slot(tokens, max_wait=_max_queue_seconds()) as usage:
+                if not breaker.allow():
+                    logger.warning("Groq circuit open: using the fallback summary")
+                    return _fallback(prompt, fallback)
+                logger.info(f"Attempting Groq API call (attempt {attempt + 1}/{max_retries})")
+                start = time.perf_counter()
+                response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+                if response.status_code == 429:
+                    # The API is up but over quota: wait as instructed, then retry
+                    breaker.record_success()
+                    limiter.on_rate_limited(parse_retry_after(response.headers.get("Retry-After")))
+                    continue
+                response.raise_for_status()
+
+                body = response.json()
+                usage["total_tokens"] = body.get("usage", {}).get("total_tokens")
+                result = body["choices"][0]["message"]["content"]
+                breaker.record_success()
+                limiter.on_success()
+            # Without streaming the first token arrives with the last one
+            metrics.observe("llm_ttft_seconds.blocking", time.perf_counter() - start)
             logger.info("Groq API call successful")
             return result
+
+        except LLMUnavailable as e:
+            logger.warning(f"Groq call not sent: {e}")
+            return _fallback(prompt, fallback)
             
         except requests.exceptions.ConnectionError as e:
+            breaker.record_failure()
             logger.warning(f"Connection error (attempt {attempt + 1}): {e}")
             if attempt == max_retries - 1:
-                return get_fallback_summary(prompt)
+                return _fallback(prompt, fallback)
             continue
             
         except requests.exceptions.Timeout as e:
+            breaker.record_failure()
             logger.warning(f"Timeout error (attempt {attempt + 1}): {e}")
             if attempt == max_retries - 1:
-                return get_fallback_summary(prompt)
+                return _fallback(prompt, fallback)
+            continue
+
+        except requests.exceptions.HTTPError as e:
+            if not _server_error(e):
+                # Our request was rejected (auth, bad model): retrying will not help
+                breaker.record_success()
+                logger.error(f"Request error: {e}")
+                return _fallback(prompt, fallback)
+            breaker.record_failure()
+            logger.warning(f"Server error (attempt {attempt + 1}): {e}")
+            if attempt == max_retries - 1:
+                return _fallback(prompt, fallback)
             continue
             
         except requests.exceptions.RequestException as e:
+            breaker.record_failure()
             logger.error(f"Request error: {e}")
-            return get_fallback_summary(prompt)
+            return _fallback(prompt, fallback)
             
         except Exception as e:
+            breaker.record_failure()
             logger.error(f"Unexpected error: {e}")
-            return get_fallback_summary(prompt)
+            return _fallback(prompt, fallback)
     
-    # Fallback if all retries failed
-    return get_fallback_summary(prompt)
+    # Fallback if all retries failed (or stayed rate limited)
+    return _fallback(prompt, fallback)
+
+def stream_groq_llm(prompt: str, max_retries: int = 3, timeout: Optional[float] = None) -> Iterator[str]:
+    """
+    Query Groq LLM with streaming, yielding content deltas as they arrive.
+
+    Connection errors, timeouts, server errors and 429s before the first
+    token are retried under the same rate limiter and circuit breaker as
+    query_groq_llm(); if the API is unavailable the fallback summary is
+    yielded as a single chunk. An error after tokens have been sent cannot
+    be hidden and is raised.
+
+    Args:
+        prompt: The text prompt to send to the LLM
+        max_retries: Maximum number of retry attempts
+        timeout: Connect/read timeout in seconds, per chunk while streaming (default: GROQ_TIMEOUT_SECONDS)
+
+    Yields:
+        str: Pieces of the completion
+    """
+    if not os.getenv("GROQ_API_KEY"):
+        yield get_fallback_summary(prompt)
+        return
+
+    timeout = timeout or performance_config().groq_timeout_seconds
+    url, headers, payload = _request(prompt, stream=True)
+    limiter, breaker = get_limiter(), get_breaker()
+    tokens = estimate_tokens(prompt, payload["max_tokens"])
+
+    for attempt in range(max_retries):
+        sent = False
+        try:
+            with limiter.slot(tokens, max_wait=_max_queue_seconds()):
+                if not breaker.allow():
+                    logger.warning("Groq circuit open: using the fallback summary")
+                    yield get_fallback_summary(prompt)
+                    return
+                logger.info(f"Attempting streaming Groq API call (attempt {attempt + 1}/{max_retries})")
+                start = time.perf_counter()
+                try:
+                    with requests.post(url, headers=headers, json=payload, timeout=timeout, stream=True) as response:
+                        if response.status_code == 429:
+                            breaker.record_success()
+                            limiter.on_rate_limited(parse_retry_after(response.headers.get("Retry-After")))
+                            continue
+                        response.raise_for_status()
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line or not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+                            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                            if not delta:
+                                continue
+                            if not sent:
+                                metrics.observe("llm_ttft_seconds.stream", time.perf_counter() - start)
+                                sent = True
+                            yield delta
+                except GeneratorExit:
+                    # The consumer stopped reading (client disconnected): no outcome to record
+                    breaker.release()
+                    raise
+                breaker.record_success()
+                limiter.on_success()
+            metrics.observe("llm_stream_seconds", time.perf_counter() - start)
+            logger.info("Groq streaming call successful")
+            return
+
+        except LLMUnavailable as e:
+            logger.warning(f"Groq call not sent: {e}")
+            yield get_fallback_summary(prompt)
+            return
+
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            breaker.record_failure()
+            if sent:
+                raise RuntimeError(f"Groq stream interrupted: {e}")
+            logger.warning(f"Streaming error (attempt {attempt + 1}): {e}")
+            if attempt == max_retries - 1:
+                yield get_fallback_summary(prompt)
+                return
+
+        except requests.exceptions.HTTPError as e:
+            if _server_error(e):
+                breaker.record_failure()
+                logger.warning(f"Server error (attempt {attempt + 1}): {e}")
+                if attempt < max_retries - 1:
+                    continue
+            else:
+                breaker.record_success()
+                logger.error(f"Streaming request error: {e}")
+            yield get_fallback_summary(prompt)
+            return
+
+        except Exception as e:
+            breaker.record_failure()
+            if sent:
+                raise RuntimeError(f"Groq stream interrupted: {e}")
+            logger.error(f"Streaming request error: {e}")
+            yield get_fallback_summary(prompt)
+            return
+
+    yield get_fallback_summary(prompt)
 
 def get_fallback_summary(text: str) -> str:
     """
@@ -84,39 +262,32 @@ def get_fallback_summary(text: str) -> str:
 
 def create_basic_summary(text: str) -> str:
     """
-    Create a basic summary without using external APIs.
+    Create an extractive summary (TextRank) without using external APIs.
     
     Args:
-        text: The text to summarize
+        text: The text to summarize, optionally preceded by an LLM instruction line
     
     Returns:
         str: A basic summary
     """
+    # Drop the instruction when called with an LLM prompt ("Summarize ...:\n\n<text>")
+    head, sep, body = text.partition("\n\n")
+    if sep and head.rstrip().endswith(":"):
+        text = body
+
     if not text or len(text.strip()) < 50:
         return "📄 **Document Summary**: Text is too short to summarize meaningfully."
     
-    # Basic text analysis
-    lines = text.strip().split('\n')
-    words = text.split()
-    
-    # Count key metrics
-    word_count = len(words)
-    line_count = len([line for line in lines if line.strip()])
-    
-    # Extract first few meaningful lines as preview
-    meaningful_lines = [line.strip() for line in lines if len(line.strip()) > 20][:3]
-    preview = '\n'.join(meaningful_lines) if meaningful_lines else text[:200] + "..."
+    word_count = len(text.split())
+    key_sentences = textrank_summary(text)
     
     # Create summary
-    summary = f"""📊 **Document Analysis**:
-• **Word Count**: {word_count:,} words
-• **Line Count**: {line_count} lines
-• **Document Type**: {'PDF' if 'pdf' in text.lower() else 'Image'} document
+    summary = f"""📊 **Document Analysis**: {word_count:,} words
 
-📝 **Content Preview**:
-{preview}
+📝 **Key Sentences**:
+{key_sentences}
 
-💡 **Note**: This is a basic analysis. For AI-powered summarization, please check your internet connection and Groq API configuration."""
+💡 **Note**: These sentences are quoted from the document (offline extractive summary). For AI-powered summarization, please check your internet connection and Groq API configuration."""
 
     return summary
 
@@ -138,10 +309,10 @@ def test_groq_connection() -> dict:
     
     try:
         # Simple test request
-        url = "https://api.groq.com/openai/v1/chat/completions"
+        url = chat_completions_url()
         headers = {"Authorization": f"Bearer {api_key}"}
         payload = {
-            "model": "llama3-70b-8192",
+            "model": groq_model(),
             "messages": [{"role": "user", "content": "Hello"}],
             "max_tokens": 10
         }
@@ -0,0 +1,327 @@
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Iterator, Optional
+from utils import metrics
+from utils.config import PerformanceConfig, get_setting, on_reload, performance_config
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt size: about four characters per token
+CHARS_PER_TOKEN = 4
+# Without a Retry-After header a 429 pauses new calls for this long
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class LLMUnavailable(Exception):
+    """The call was not sent: the circuit is open or the rate limit cannot be met in time."""
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Tokens a chat completion may consume: the prompt estimate plus the completion budget."""
+    return len(prompt) // CHARS_PER_TOKEN + max_tokens
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header (delta-seconds or HTTP date).
+
+    Returns:
+        float or None: Delay in seconds, or None when the header is absent or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Shared limiter for calls to a rate-limited API.
+
+    Requests and tokens per minute are token buckets that refill continuously;
+    each call reserves one request and its estimated tokens before it is sent,
+    and the estimate is settled against the reported usage afterwards. A 429
+    pauses every caller until its Retry-After has passed and halves the
+    concurrency limit; each success raises the limit again by about one call
+    per round trip (AIMD), up to ``max_concurrency``.
+
+    Args:
+        rpm (int, optional): Requests per minute (None: unlimited).
+        tpm (int, optional): Tokens per minute (None: unlimited).
+        max_concurrency (int): Upper bound on calls in flight.
+        min_concurrency (int): Lower bound the limit never shrinks below.
+        name (str): Metric prefix.
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        name: str = "llm",
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.name = name
+        self.limit = float(self.max_concurrency)
+        self._active = 0
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._publish()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled
+        self._refilled = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a call of ``tokens`` may start (0: now)."""
+        waits = [self._paused_until - now]
+        if self.rpm and self._requests < 1:
+            waits.append((1 - self._requests) * 60 / self.rpm)
+        if self.tpm:
+            # A call larger than the whole bucket waits for a full bucket
+            needed = min(tokens, self.tpm)
+            if self._tokens < needed:
+                waits.append((needed - self._tokens) * 60 / self.tpm)
+        return max(waits)
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}.rate_limiter", {
+            "concurrency_limit": int(self.limit),
+            "active": self._active,
+            "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 2),
+        })
+
+    def acquire(self, tokens: int = 0, max_wait: Optional[float] = None) -> None:
+        """
+        Block until a call may be sent, then reserve it.
+
+        Args:
+            tokens (int): Estimated tokens of the call.
+            max_wait (float, optional): Give up after this many seconds.
+
+        Raises:
+            LLMUnavailable: When the call cannot start within ``max_wait``.
+        """
+        start = time.monotonic()
+        deadline = None if max_wait is None else start + max_wait
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0 and self._active < int(self.limit):
+                    break
+                if deadline is not None and (now >= deadline or (wait > 0 and now + wait > deadline)):
+                    metrics.increment(f"{self.name}.rate_limit_timeouts")
+                    raise LLMUnavailable(f"rate limit: no capacity within {max_wait:g}s")
+                timeout = wait if wait > 0 else None
+                if deadline is not None:
+                    timeout = min(timeout or deadline - now, deadline - now)
+                self._cond.wait(timeout)
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+            self._active += 1
+            self._publish()
+        metrics.observe(f"{self.name}.queue_seconds", time.monotonic() - start)
+
+    def release(self, reserved: int = 0, used: Optional[int] = None) -> None:
+        """
+        Finish a call, returning the unused part of its token reservation.
+
+        Args:
+            reserved (int): Tokens passed to acquire().
+            used (int, optional): Tokens the API reported (None: keep the estimate).
+        """
+        with self._cond:
+            self._active -= 1
+            if self.tpm and used is not None:
+                self._tokens = min(self.tpm, self._tokens + reserved - used)
+            self._publish()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: int = 0, max_wait: Optional[float] = None) -> Iterator[dict]:
+        """
+        acquire() and release() around a call. Set ``usage["total_tokens"]``
+        on the yielded dict to settle the token estimate.
+        """
+        self.acquire(tokens, max_wait)
+        usage: dict = {}
+        try:
+            yield usage
+        finally:
+            self.release(tokens, usage.get("total_tokens"))
+
+    def configure(self, rpm: Optional[int], tpm: Optional[int], max_concurrency: int) -> None:
+        """
+        Apply new limits in place; calls in flight and a 429 pause are kept.
+
+        Args:
+            rpm (int, optional): Requests per minute (None: unlimited).
+            tpm (int, optional): Tokens per minute (None: unlimited).
+            max_concurrency (int): Upper bound on calls in flight.
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            # A newly enabled bucket starts full; a lowered one is capped
+            self._requests = float(rpm or 0) if not self.rpm else min(self._requests, float(rpm or 0))
+            self._tokens = float(tpm or 0) if not self.tpm else min(self._tokens, float(tpm or 0))
+            self.rpm, self.tpm = rpm, tpm
+            self.max_concurrency = max(1, max_concurrency)
+            self.min_concurrency = min(self.min_concurrency, self.max_concurrency)
+            self.limit = min(self.limit, float(self.max_concurrency))
+            self._publish()
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._publish()
+            self._cond.notify_all()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """
+        Record a 429: pause all callers and halve the concurrency limit.
+
+        Args:
+            retry_after (float, optional): Seconds from the Retry-After header.
+        """
+        delay = DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+        metrics.increment(f"{self.name}.rate_limited")
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            # The server is out of capacity: do not burst again right after the pause
+            self._requests = min(self._requests, 0.0)
+            self._publish()
+        logger.warning(f"Rate limited: pausing {delay:g}s, concurrency limit {int(self.limit)}")
+
+
+class CircuitBreaker:
+    """
+    Stops calling an API that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds. Then one trial call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    A trial that is cancelled (release()) or still outstanding after
+    ``reset_timeout`` seconds lets the next call through instead.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open.
+        name (str): Metric prefix.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = "llm"):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._trial_at = 0.0
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}.circuit", {"state": self.state, "failures": self._failures})
+
+    def allow(self) -> bool:
+        """True if a call may be sent now; False means use the fallback."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial = False
+            if self.state == self.HALF_OPEN and (not self._trial or now - self._trial_at >= self.reset_timeout):
+                self._trial = True
+                self._trial_at = now
+                self._publish()
+                return True
+            if self.state == self.CLOSED:
+                return True
+        metrics.increment(f"{self.name}.short_circuited")
+        return False
+
+    def release(self) -> None:
+        """Give up an admitted call without an outcome (e.g. the client went away)."""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._publish()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    metrics.increment(f"{self.name}.circuit_opened")
+                    logger.warning(f"{self.name} circuit open for {self.reset_timeout:g}s after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._publish()
+
+
+@lru_cache(maxsize=1)
+def get_limiter() -> RateLimiter:
+    """Process-wide Groq limiter from the GROQ_RPM, GROQ_TPM and GROQ_MAX_CONCURRENCY settings."""
+    config = performance_config()
+    return RateLimiter(
+        rpm=config.groq_rpm,
+        tpm=config.groq_tpm,
+        max_concurrency=config.groq_max_concurrency,
+        name="groq",
+    )
+
+
+def _reconfigure(config: PerformanceConfig) -> None:
+    if get_limiter.cache_info().currsize:
+        get_limiter().configure(config.groq_rpm, config.groq_tpm, config.groq_max_concurrency)
+
+
+on_reload(_reconfigure)
+
+
+@lru_cache(maxsize=1)
+def get_breaker() -> CircuitBreaker:
+    """Process-wide Groq circuit breaker from GROQ_BREAKER_FAILURES and GROQ_BREAKER_RESET_SECONDS."""
+    return CircuitBreaker(
+        failure_threshold=get_setting("GROQ_BREAKER_FAILURES", 5),
+        reset_timeout=get_setting("GROQ_BREAKER_RESET_SECONDS", 30),
+        name="groq",
+    )
@@ -0,0 +1,177 @@
+import re
+import math
+import logging
+from typing import Dict, List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+# Sentences more similar than this to one already chosen are skipped
+REDUNDANCY_THRESHOLD = 0.7
+# OCR text often lacks punctuation (tables, forms): cap "sentences" at this many words
+MAX_SENTENCE_WORDS = 60
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9À-Ý])")
+_WORD = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other
+our ours ourselves out over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves also may might must shall us
+""".split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split OCR text into sentences.
+
+    Line breaks inside a paragraph are treated as spaces (OCR wraps lines),
+    blank lines always end a sentence, and unpunctuated runs are cut every
+    MAX_SENTENCE_WORDS words.
+
+    Args:
+        text (str): Document text.
+
+    Returns:
+        List[str]: Sentences in document order.
+    """
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        for sentence in _SENTENCE_END.split(paragraph):
+            words = sentence.split()
+            for start in range(0, len(words), MAX_SENTENCE_WORDS):
+                chunk = " ".join(words[start:start + MAX_SENTENCE_WORDS])
+                if chunk:
+                    sentences.append(chunk)
+    return sentences
+
+
+def _term_matrix(sentences: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    L2-normalised TF-IDF sentence vectors as a CSR matrix (data, indices, indptr, vocabulary size).
+    """
+    vocabulary: Dict[str, int] = {}
+    rows: List[Dict[int, int]] = []
+    for sentence in sentences:
+        counts: Dict[int, int] = {}
+        for word in _WORD.findall(sentence.lower()):
+            if word not in _STOPWORDS:
+                term = vocabulary.setdefault(word, len(vocabulary))
+                counts[term] = counts.get(term, 0) + 1
+        rows.append(counts)
+
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.fromiter((term for row in rows for term in row), dtype=np.int64, count=int(indptr[-1]))
+    tf = np.fromiter((count for row in rows for count in row.values()), dtype=np.float64, count=int(indptr[-1]))
+
+    size = len(vocabulary)
+    df = np.bincount(indices, minlength=size)
+    idf = np.log((1 + len(rows)) / (1 + df)) + 1
+    data = (1 + np.log(tf)) * idf[indices]
+
+    lengths = np.diff(indptr)
+    row_of = np.repeat(np.arange(len(rows)), lengths)
+    norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=len(rows)))
+    data /= np.where(norms > 0, norms, 1)[row_of]
+    return data, indices, indptr, size
+
+
+def textrank_scores(sentences: List[str]) -> np.ndarray:
+    """
+    TextRank centrality of each sentence under cosine similarity.
+
+    The sentence graph S = X·Xᵀ − I (X: normalised TF-IDF rows) is never
+    materialised: every PageRank step computes S·v as X·(Xᵀ·v) with sparse
+    NumPy products, so time and memory grow linearly with the number of
+    sentences rather than quadratically.
+
+    Args:
+        sentences (List[str]): Sentences to score.
+
+    Returns:
+        np.ndarray: One score per sentence (sums to 1).
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    data, indices, indptr, size = _term_matrix(sentences)
+    lengths = np.diff(indptr)
+    row_of = np.repeat(np.arange(n), lengths)
+
+    def similarity_times(v: np.ndarray) -> np.ndarray:
+        projected = np.bincount(indices, weights=data * v[row_of], minlength=size)  # Xᵀ·v
+        product = np.bincount(row_of, weights=data * projected[indices], minlength=n)  # X·(Xᵀ·v)
+        return product - v * (lengths > 0)  # drop self-similarity
+
+    degree = similarity_times(np.ones(n))
+    connected = degree > 1e-12
+    inverse_degree = np.where(connected, 1 / np.where(connected, degree, 1), 0)
+
+    scores = np.full(n, 1 / n)
+    for _ in range(MAX_ITERATIONS):
+        spread = similarity_times(scores * inverse_degree)
+        # Mass of isolated sentences is redistributed uniformly
+        dangling = scores[~connected].sum()
+        updated = (1 - DAMPING) / n + DAMPING * (spread + dangling / n)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def _cosine(a: str, b: str) -> float:
+    wa = [w for w in _WORD.findall(a.lower()) if w not in _STOPWORDS]
+    wb = [w for w in _WORD.findall(b.lower()) if w not in _STOPWORDS]
+    if not wa or not wb:
+        return 0.0
+    ca: Dict[str, int] = {}
+    cb: Dict[str, int] = {}
+    for w in wa:
+        ca[w] = ca.get(w, 0) + 1
+    for w in wb:
+        cb[w] = cb.get(w, 0) + 1
+    dot = sum(count * cb.get(word, 0) for word, count in ca.items())
+    return dot / math.sqrt(sum(c * c for c in ca.values()) * sum(c * c for c in cb.values()))
+
+
+def summary_length(sentence_count: int) -> int:
+    """Sentences to keep: about a tenth of the document, between 3 and 10."""
+    return max(3, min(10, round(sentence_count * 0.1)))
+
+
+def textrank_summary(text: str, max_sentences: int = 0) -> str:
+    """
+    Extractive summary: the most central sentences, in document order.
+
+    Args:
+        text (str): Document text.
+        max_sentences (int): Sentences to keep (0: chosen from the document length).
+
+    Returns:
+        str: Selected sentences joined into a paragraph ("" for empty text).
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+    limit = max_sentences or summary_length(len(sentences))
+    if len(sentences) <= limit:
+        return " ".join(sentences)
+
+    scores = textrank_scores(sentences)
+    chosen: List[int] = []
+    # Walk candidates best first, skipping near-duplicates of chosen sentences
+    for index in np.argsort(-scores, kind="stable"):
+        if len(chosen) == limit:
+            break
+        if all(_cosine(sentences[index], sentences[other]) < REDUNDANCY_THRESHOLD for other in chosen):
+            chosen.append(int(index))
+    logger.info(f"TextRank: kept {len(chosen)} of {len(sentences)} sentences")
+    return " ".join(sentences[i] for i in sorted(chosen))
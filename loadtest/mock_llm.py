@@ -0,0 +1,201 @@
+# loadtest/mock_llm.py
+
+import json
+import time
+import random
+import argparse
+import threading
+import logging
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MockLLMConfig:
+    """
+    Behaviour of the mock chat-completions server.
+
+    Args:
+        latency (float): Mean response time in seconds.
+        jitter (float): Latency is drawn uniformly from latency ± jitter.
+        error_rate (float): Share of requests answered with HTTP 500.
+        rate_limit_rpm (int, optional): Requests per minute before answering 429.
+        rate_limit_rate (float): Share of requests answered with 429 regardless of load.
+        retry_after (float): Seconds sent in the Retry-After header of a 429.
+        tokens_per_second (float): Streaming speed for ``"stream": true`` requests.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.1,
+        error_rate: float = 0.0,
+        rate_limit_rpm: Optional[int] = None,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        tokens_per_second: float = 200.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rpm = rate_limit_rpm
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.tokens_per_second = tokens_per_second
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    OpenAI-compatible ``/chat/completions`` stand-in for the Groq API.
+
+    Answers after a configurable delay with a short canned completion, and
+    injects 500s and 429s (with Retry-After) at configurable rates or above a
+    requests-per-minute limit. Point GROQ_API_BASE at ``http://host:port/v1``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockLLMConfig] = None):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockLLMConfig()
+        self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+        self._recent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def decide(self) -> int:
+        """HTTP status for the next request: 200, 429 or 500."""
+        config = self.config
+        with self._lock:
+            now = time.monotonic()
+            self.counts["requests"] += 1
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            limited = config.rate_limit_rpm is not None and len(self._recent) >= config.rate_limit_rpm
+            if limited or random.random() < config.rate_limit_rate:
+                self.counts["rate_limited"] += 1
+                return 429
+            self._recent.append(now)
+            if random.random() < config.error_rate:
+                self.counts["errors"] += 1
+                return 500
+            self.counts["ok"] += 1
+            return 200
+
+    def start(self) -> threading.Thread:
+        """Serve on a daemon thread."""
+        thread = threading.Thread(target=self.serve_forever, name="mock-llm", daemon=True)
+        thread.start()
+        logger.info(f"Mock LLM listening on {self.base_url}")
+        return thread
+
+
+def _completion_text(prompt: str) -> str:
+    words = prompt.split()
+    return f"Mock completion for a {len(words)}-word prompt: " + " ".join(words[-40:])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockLLMServer
+
+    def log_message(self, format, *args) -> None:
+        pass  # keep load-test output readable
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+
+        config = self.server.config
+        status = self.server.decide()
+        if status == 429:
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                {"Retry-After": f"{config.retry_after:g}"},
+            )
+            return
+
+        time.sleep(max(0.0, random.uniform(config.latency - config.jitter, config.latency + config.jitter)))
+        if status == 500:
+            self._send_json(500, {"error": {"message": "Internal server error", "type": "server_error"}})
+            return
+
+        prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+        text = _completion_text(prompt)
+        model = request.get("model", "mock")
+        if request.get("stream"):
+            self._stream(model, text)
+            return
+        self._send_json(200, {
+            "id": "mock-completion",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(text.split())},
+        })
+
+    def _stream(self, model: str, text: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        delay = 1.0 / self.server.config.tokens_per_second
+        for word in text.split(" "):
+            chunk = {
+                "id": "mock-completion",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI-compatible LLM for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean response time (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Uniform jitter around the latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of HTTP 500 responses")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute before 429s")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of random 429 responses")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = MockLLMConfig(args.latency, args.jitter, args.error_rate, args.rpm, args.rate_limit_rate, args.retry_after)
+    server = MockLLMServer(args.host, args.port, config)
+    logger.info(f"Mock LLM listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
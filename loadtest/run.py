@@ -0,0 +1,277 @@
+# loadtest/run.py
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import requests
+from PIL import Image, ImageDraw
+from loadtest.mock_llm import MockLLMConfig, MockLLMServer
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = ("extract", "summarise", "translate")
+# Throughput gain below this share when doubling load counts as saturation
+SATURATION_GAIN = 0.10
+
+Sample = Tuple[str, bytes]
+
+
+def make_sample(seed: int) -> Sample:
+    """
+    Synthetic scanned page: a few lines of text, unique per seed so that
+    request coalescing does not hide the real cost of each request.
+
+    Returns:
+        tuple: (filename, PNG bytes).
+    """
+    image = Image.new("L", (1200, 500), color=255)
+    draw = ImageDraw.Draw(image)
+    rng = random.Random(seed)
+    words = ["invoice", "total", "payment", "account", "delivery", "report", "amount", "date", "customer", "order"]
+    for line in range(8):
+        text = " ".join(rng.choice(words) for _ in range(10))
+        draw.text((40, 40 + line * 50), f"{text} {seed}-{line}", fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return f"sample_{seed}.png", buffer.getvalue()
+
+
+def load_samples(paths: Sequence[str]) -> List[Sample]:
+    samples = []
+    for path in paths:
+        with open(path, "rb") as f:
+            samples.append((os.path.basename(path), f.read()))
+    return samples
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'extract=6,summarise=2,translate=2' -> normalized weights."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in TOOLS:
+            raise ValueError(f"Unknown tool in mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def start_server(port: int, llm_base_url: str, workers: Optional[int] = None) -> subprocess.Popen:
+    """
+    Start main.py under uvicorn with the Groq client pointed at the mock LLM.
+
+    Search indexing, the translation memory and duplicate page reuse are
+    disabled and the dataset goes to a temporary directory, so load tests
+    leave no state behind and every request does its work. The
+    client-side Groq rate limits are lifted so the mock's own limits
+    (--llm-rpm) apply.
+    """
+    env = dict(
+        os.environ,
+        GROQ_API_BASE=llm_base_url,
+        GROQ_API_KEY="loadtest",
+        SEARCH_INDEX_ENABLED="false",
+        TRANSLATION_MEMORY_ENABLED="false",
+        PAGE_DEDUP_ENABLED="false",
+        GROQ_RPM="null",
+        GROQ_TPM="null",
+        TRAINING_DATASET_DIR=tempfile.mkdtemp(prefix="loadtest-dataset-"),
+    )
+    if workers:
+        env["OCR_WORKERS"] = str(workers)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"❌ Server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/metrics", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("❌ Server did not start within 120s")
+
+
+def send_request(session: requests.Session, base_url: str, tool: str, sample: Sample, language: str) -> Dict:
+    """
+    Send one tool request.
+
+    Returns:
+        Dict: ``tool``, ``latency`` (s), ``status`` and ``ok`` (HTTP 200 without an ``error`` field).
+    """
+    filename, content = sample
+    files = {"uploaded_file": (filename, content, "image/png")}
+    data = {"engine": "tesseract"}
+    if tool == "translate":
+        data["target_language"] = language
+    start = time.perf_counter()
+    try:
+        response = session.post(f"{base_url}/tools/{tool}", files=files, data=data, timeout=300)
+        latency = time.perf_counter() - start
+        ok = response.status_code == 200 and "error" not in response.json()
+        return {"tool": tool, "latency": latency, "status": response.status_code, "ok": ok}
+    except (requests.RequestException, ValueError) as e:
+        return {"tool": tool, "latency": time.perf_counter() - start, "status": type(e).__name__, "ok": False}
+
+
+def run_level(
+    base_url: str,
+    concurrency: int,
+    duration: float,
+    mix: Dict[str, float],
+    samples: Optional[List[Sample]],
+    language: str = "French",
+) -> List[Dict]:
+    """
+    Closed-loop load: ``concurrency`` clients send requests back to back for ``duration`` seconds.
+
+    Args:
+        base_url (str): Server URL.
+        concurrency (int): Concurrent clients.
+        duration (float): Seconds to run.
+        mix (Dict[str, float]): Share of requests per tool.
+        samples (List[Sample], optional): Files to send; synthetic unique pages when None.
+        language (str): Target language for translate requests.
+
+    Returns:
+        List[Dict]: One record per completed request.
+    """
+    tools, weights = zip(*mix.items())
+    deadline = time.monotonic() + duration
+    records: List[Dict] = []
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+
+    def client(index: int) -> None:
+        rng = random.Random(index)
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                with lock:
+                    seed = next(counter)
+                sample = rng.choice(samples) if samples else make_sample(seed)
+                record = send_request(session, base_url, rng.choices(tools, weights)[0], sample, language)
+                with lock:
+                    records.append(record)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return records
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def summarise_level(concurrency: int, records: List[Dict], elapsed: float) -> Dict:
+    """Throughput, latency percentiles and error rate, overall and per tool."""
+    def stats(rows: List[Dict]) -> Dict:
+        latencies = sorted(row["latency"] for row in rows)
+        errors = sum(1 for row in rows if not row["ok"])
+        return {
+            "requests": len(rows),
+            "throughput": len(rows) / elapsed if elapsed else 0.0,
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "error_rate": errors / len(rows) if rows else 0.0,
+            "statuses": {str(s): sum(1 for row in rows if row["status"] == s) for s in {row["status"] for row in rows}},
+        }
+
+    return {
+        "concurrency": concurrency,
+        **stats(records),
+        "tools": {tool: stats([r for r in records if r["tool"] == tool]) for tool in TOOLS if any(r["tool"] == tool for r in records)},
+    }
+
+
+def find_saturation(levels: List[Dict]) -> Optional[int]:
+    """First concurrency level after which more load adds less than SATURATION_GAIN throughput."""
+    for previous, current in zip(levels, levels[1:]):
+        if current["throughput"] < previous["throughput"] * (1 + SATURATION_GAIN):
+            return previous["concurrency"]
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the OCR server against a mock LLM.")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8, 16], help="Concurrency levels")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per level")
+    parser.add_argument("--mix", default="extract=6,summarise=2,translate=2", help="Traffic mix, e.g. extract=6,summarise=2")
+    parser.add_argument("--files", nargs="*", default=None, help="Files to send (default: synthetic unique pages)")
+    parser.add_argument("--server-url", default=None, help="Test a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the started server")
+    parser.add_argument("--workers", type=int, default=None, help="OCR_WORKERS for the started server")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mock LLM mean latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="Mock LLM latency jitter (s)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of mock LLM 500s")
+    parser.add_argument("--llm-rpm", type=int, default=None, help="Mock LLM requests per minute before 429s")
+    parser.add_argument("--llm-429-rate", type=float, default=0.0, help="Share of random mock LLM 429s")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    mix = parse_mix(args.mix)
+    samples = load_samples(args.files) if args.files else None
+
+    llm = MockLLMServer(config=MockLLMConfig(
+        latency=args.llm_latency,
+        jitter=args.llm_jitter,
+        error_rate=args.llm_error_rate,
+        rate_limit_rpm=args.llm_rpm,
+        rate_limit_rate=args.llm_429_rate,
+    ))
+    llm.start()
+
+    server = None
+    base_url = args.server_url
+    if base_url is None:
+        server = start_server(args.port, llm.base_url, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    levels = []
+    try:
+        for concurrency in args.concurrency:
+            logger.info(f"Running {args.duration:g}s at concurrency {concurrency}")
+            start = time.perf_counter()
+            records = run_level(base_url, concurrency, args.duration, mix, samples)
+            levels.append(summarise_level(concurrency, records, time.perf_counter() - start))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        llm.shutdown()
+
+    report = {"levels": levels, "saturation_concurrency": find_saturation(levels), "llm": llm.counts}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'conc':>5}{'reqs':>7}{'req/s':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'errors':>8}")
+    for level in levels:
+        print(
+            f"{level['concurrency']:>5}{level['requests']:>7}{level['throughput']:>8.2f}{level['p50']:>8.2f}"
+            f"{level['p95']:>8.2f}{level['p99']:>8.2f}{level['error_rate']:>8.1%}"
+        )
+    saturation = report["saturation_concurrency"]
+    print(f"Saturation: {'concurrency ' + str(saturation) if saturation else 'not reached'}; mock LLM: {llm.counts}")
+
+
+if __name__ == "__main__":
+    main()
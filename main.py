@@ -1,25 +1,85 @@
 # main.py
 
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Literal
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import List, Literal, Optional
 import base64
 import tempfile
 import fitz  # PyMuPDF
 from PIL import Image
 import io
 import os
+import json
+import time
+import shutil
+import hashlib
+from dataclasses import asdict
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from ocr_tools.extract import extract
-from ocr_tools.summarise import summarise_file
-from ocr_tools.translate import translate_file
+from ocr_tools.extract import extract_bytes, extract_pages, render_preview
+from ocr_tools.page_cache import get_page_cache
+from ocr_tools.batch import extract_batch, iter_entries
+from ocr_tools.search import get_index, index_pages
+from ocr_tools.summarise import summarise_bytes, summarise_text_stream
+from ocr_tools.translate import translate_bytes, translate_text, translate_text_stream
+from ocr_tools.translation_memory import get_memory
+from ocr_tools.evaluate import test_file, format_report
+from ocr_tools.dataset import train_file, get_store, export_dataset
+from mcp_server import MCPServer, stream_events
+from utils import metrics
+from utils.cpu_budget import get_server_budget
+from utils.singleflight import SingleFlight, request_key
+from ocr_tools.scheduler import PageScheduler, get_scheduler, install_scheduler, client_context
+from ocr_tools.work_queue import get_queue, install_queue, open_queue
+from utils.autotune import autotune, last_autotune
+from utils.config import PerformanceConfig, get_setting, on_reload, performance_config, reload_settings, setting_sources
 
 app = FastAPI(title="OCR MCP Server")
 
+# Optional start-up calibration: worker and batch settings chosen for this
+# machine's cores and memory, unless set explicitly
+if get_setting("PERFORMANCE_AUTOTUNE", False):
+    autotune()
+
+# Split the cores between concurrent OCR calls: workers x threads <= cores
+cpu_budget = get_server_budget()
+cpu_budget.apply_in_process()
+cpu_budget.publish()
+
+mcp_server = MCPServer(max_workers=cpu_budget.workers)
+
+# OCR pages from every request share one pool: short documents go first and
+# clients take turns page by page, so a large PDF cannot block quick extractions
+install_scheduler(PageScheduler(workers=cpu_budget.workers))
+
+def apply_performance_config(config: PerformanceConfig) -> None:
+    """Resize the core budget and page scheduler after POST /config/reload."""
+    global cpu_budget
+    budget = get_server_budget()
+    if budget.describe() == cpu_budget.describe():
+        return
+    cpu_budget = budget
+    cpu_budget.apply_in_process()
+    cpu_budget.publish()
+    get_scheduler().resize(cpu_budget.workers)
+
+on_reload(apply_performance_config)
+
+# Coordinator mode: with WORK_QUEUE_URL set, pages are sent to worker nodes
+# (python -m ocr_tools.worker) instead of being OCR'd in this process
+if get_setting("WORK_QUEUE_URL"):
+    install_queue(open_queue(get_setting("WORK_QUEUE_URL")))
+
+# Concurrent identical requests (same content hash and parameters) share one computation
+extract_flight = SingleFlight("extract")
+summarise_flight = SingleFlight("summarise")
+translate_flight = SingleFlight("translate")
+
 # CORS for Streamlit or web frontend
 app.add_middleware(
     CORSMiddleware,
@@ -36,37 +96,396 @@ def save_temp_image_from_base64(base64_str: str) -> str:
     img.save(temp_path)
     return temp_path
 
+# Save uploaded content to a temporary path, keeping the file's extension
+def save_temp_upload(data: bytes, filename: str) -> str:
+    suffix = os.path.splitext(filename or "file")[-1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+        return tmp.name
+
+def parse_pages(pages: Optional[str]) -> Optional[list]:
+    # "0,2,5" -> [0, 2, 5]; empty means every page
+    if not pages or not pages.strip():
+        return None
+    return [int(p) for p in pages.split(",") if p.strip()]
+
+# Copy uploads to our own temp files: form files are closed before a streamed response finishes
+def spool_uploads(files: List[UploadFile]) -> list:
+    inputs = []
+    for upload in files:
+        filename = upload.filename or "file"
+        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[-1]) as tmp:
+            shutil.copyfileobj(upload.file, tmp)
+        inputs.append((tmp.name, filename))
+    return inputs
+
+# One Server-Sent Event: "event: <name>\ndata: <json>\n\n"
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Fair-share identity: X-Client-Id header, else the caller's address
+def client_id(request: Request) -> str:
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
+
 @app.post("/tools/extract")
 async def extract_tool(
-    image_base64: str = Form(...),
-    engine: str = Form("tesseract")
+    request: Request,
+    image_base64: Optional[str] = Form(None),
+    engine: str = Form("tesseract"),
+    uploaded_file: Optional[UploadFile] = File(None),
+    pages: Optional[str] = Form(None)
+):
+    if uploaded_file is not None:
+        content = await uploaded_file.read()
+        filename = uploaded_file.filename or "file"
+    elif image_base64:
+        content = image_base64.encode()
+        filename = None
+    else:
+        return {"error": "❌ Failed to extract text: provide either image_base64 or uploaded_file"}
+
+    client = client_id(request)
+
+    def work():
+        image_path = None
+        try:
+            if filename is not None:
+                # Original PDF/image: rasterized at full resolution here, not in the client
+                image_path = save_temp_upload(content, filename)
+                sha256 = hashlib.sha256(content).hexdigest()
+            else:
+                image_path = save_temp_image_from_base64(image_base64)
+                sha256 = hashlib.sha256(base64.b64decode(image_base64)).hexdigest()
+            with client_context(client):
+                page_results = extract_pages(image_path, engine=engine, pages=parse_pages(pages), doc_hash=sha256)
+            index_pages(sha256, filename, engine, page_results)
+            result = "\n\n".join(page["text"] for page in page_results)
+            # Per-page report of the engine(s) used, e.g. for the cascade engine
+            report = [{k: v for k, v in page.items() if k != "text"} for page in page_results]
+            return {"result": result, "pages": report}
+        except Exception as e:
+            return {"error": f"❌ Failed to extract text: {str(e)}"}
+        finally:
+            if image_path and os.path.exists(image_path):
+                os.remove(image_path)
+
+    key = request_key("extract", content, os.path.splitext(filename or ".png")[-1], engine, pages)
+    return await extract_flight.do(key, lambda: run_in_threadpool(work))
+
+# Low-resolution PNG of one page, downscaled from the page cache when the
+# document has already been rendered for OCR
+@app.post("/tools/preview")
+async def preview_tool(
+    uploaded_file: UploadFile = File(...),
+    page: int = Form(0),
+    dpi: int = Form(72)
 ):
+    content = await uploaded_file.read()
+    filename = uploaded_file.filename or "file"
     try:
-        image_path = save_temp_image_from_base64(image_base64)
-        result = extract(image_path, engine=engine)
-        return {"result": result}
+        png = await run_in_threadpool(render_preview, content, filename, page, dpi)
+        return Response(png, media_type="image/png")
     except Exception as e:
-        return {"error": f"❌ Failed to extract text: {str(e)}"}
+        return JSONResponse({"error": f"❌ Failed to render preview: {str(e)}"}, status_code=400)
+
+@app.get("/tools/preview/cache")
+async def preview_cache_stats():
+    cache = get_page_cache()
+    return {"result": cache.stats() if cache is not None else {"enabled": False}}
+
+# Many files and/or ZIP/TAR archives in one request; one NDJSON line per file
+@app.post("/tools/extract/batch")
+async def extract_batch_tool(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    engine: str = Form("tesseract"),
+    pages: Optional[str] = Form(None)
+):
+    try:
+        page_list = parse_pages(pages)
+    except ValueError as e:
+        return {"error": f"❌ Failed to extract text: invalid pages: {str(e)}"}
+    inputs = await run_in_threadpool(spool_uploads, files)
+    client = client_id(request)
+
+    def lines():
+        try:
+            for item in extract_batch(iter_entries(inputs), engine=engine, pages=page_list,
+                                      workers=performance_config().batch_workers or cpu_budget.workers, client=client):
+                yield json.dumps(item) + "\n"
+        finally:
+            for path, _ in inputs:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @app.post("/tools/summarise")
 async def summarise_tool(
+    request: Request,
     uploaded_file: UploadFile = File(...),
-    engine: str = Form("tesseract")
+    engine: str = Form("tesseract"),
+    summary_engine: str = Form("groq")
 ):
-    try:
-        result = summarise_file(uploaded_file, engine=engine)  # type: ignore
-        return {"result": result}
-    except Exception as e:
-        return {"error": f"❌ Failed to summarise: {str(e)}"}
+    content = await uploaded_file.read()
+    filename = uploaded_file.filename or "file"
+    client = client_id(request)
+
+    def work():
+        try:
+            with client_context(client):
+                result = summarise_bytes(content, filename, engine=engine, summary_engine=summary_engine)
+            return {"result": result}
+        except Exception as e:
+            return {"error": f"❌ Failed to summarise: {str(e)}"}
+
+    key = request_key("summarise", content, os.path.splitext(filename)[-1], engine, summary_engine)
+    return await summarise_flight.do(key, lambda: run_in_threadpool(work))
 
 @app.post("/tools/translate")
 async def translate_tool(
+    request: Request,
+    uploaded_file: Optional[UploadFile] = File(None),
+    target_language: str = Form(...),
+    engine: str = Form("tesseract"),
+    summary: Optional[str] = Form(None),
+    summary_engine: str = Form("groq")
+):
+    if summary is not None:
+        content, filename = summary.encode("utf-8"), None
+    elif uploaded_file is not None:
+        content, filename = await uploaded_file.read(), uploaded_file.filename or "file"
+    else:
+        return {"error": "❌ Translation failed: provide either uploaded_file or summary"}
+    client = client_id(request)
+
+    def work():
+        try:
+            if filename is None:
+                # Text already summarised by the caller: skip OCR and summarisation
+                result = translate_text(summary, target_language)
+            else:
+                with client_context(client):
+                    result = translate_bytes(content, filename, target_language, engine=engine, summary_engine=summary_engine)
+            return {"result": result}
+        except Exception as e:
+            return {"error": f"❌ Translation failed: {str(e)}"}
+
+    source = "summary" if filename is None else os.path.splitext(filename)[-1]
+    key = request_key("translate", content, source, engine, target_language, summary_engine)
+    return await translate_flight.do(key, lambda: run_in_threadpool(work))
+
+# Streaming variants: LLM tokens are forwarded as Server-Sent Events as soon as
+# they arrive ("status", "summary", "token", then "done" or "error")
+@app.post("/tools/summarise/stream")
+async def summarise_stream_tool(
+    request: Request,
     uploaded_file: UploadFile = File(...),
+    engine: str = Form("tesseract"),
+    summary_engine: str = Form("groq")
+):
+    content = await uploaded_file.read()
+    filename = uploaded_file.filename or "file"
+    client = client_id(request)
+
+    def events():
+        try:
+            yield sse("status", {"stage": "ocr"})
+            with client_context(client):
+                text = extract_bytes(content, filename, engine=engine)
+            yield sse("status", {"stage": "summarising"})
+            parts = []
+            for token in summarise_text_stream(text, summary_engine=summary_engine):
+                parts.append(token)
+                yield sse("token", {"text": token})
+            yield sse("done", {"result": "".join(parts)})
+        except Exception as e:
+            yield sse("error", {"error": f"❌ Failed to summarise: {str(e)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/tools/translate/stream")
+async def translate_stream_tool(
+    request: Request,
+    uploaded_file: Optional[UploadFile] = File(None),
     target_language: str = Form(...),
+    engine: str = Form("tesseract"),
+    summary: Optional[str] = Form(None),
+    summary_engine: str = Form("groq")
+):
+    if summary is None and uploaded_file is None:
+        return {"error": "❌ Translation failed: provide either uploaded_file or summary"}
+    content, filename = b"", None
+    if summary is None:
+        content, filename = await uploaded_file.read(), uploaded_file.filename or "file"
+    client = client_id(request)
+
+    def events():
+        try:
+            text = summary
+            if text is None:
+                yield sse("status", {"stage": "ocr"})
+                with client_context(client):
+                    extracted = extract_bytes(content, filename, engine=engine)
+                # As translate_bytes(): nothing to translate without text or a summary
+                if not extracted.strip():
+                    yield sse("done", {"result": "⚠️ No readable text was found in the document."})
+                    return
+                yield sse("status", {"stage": "summarising"})
+                parts = []
+                for token in summarise_text_stream(extracted, summary_engine=summary_engine):
+                    parts.append(token)
+                    yield sse("summary", {"text": token})
+                text = "".join(parts)
+                if text.startswith("❌"):
+                    yield sse("error", {"error": text})
+                    return
+            yield sse("status", {"stage": "translating"})
+            parts = []
+            for token in translate_text_stream(text, target_language):
+                parts.append(token)
+                yield sse("token", {"text": token})
+            yield sse("done", {"result": "".join(parts)})
+        except Exception as e:
+            yield sse("error", {"error": f"❌ Translation failed: {str(e)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/tools/test")
+async def test_tool(
+    uploaded_file: UploadFile = File(...),
+    expected: str = Form(...),
     engine: str = Form("tesseract")
+):
+    def work():
+        try:
+            scores = test_file(uploaded_file, expected, engine=engine)  # type: ignore
+            return {"result": format_report(scores), "metrics": scores}
+        except Exception as e:
+            return {"error": f"❌ Accuracy test failed: {str(e)}"}
+
+    return await run_in_threadpool(work)
+
+@app.post("/tools/train")
+async def train_tool(
+    uploaded_file: UploadFile = File(...),
+    expected: str = Form(...),
+    engine: str = Form("tesseract")
+):
+    def work():
+        try:
+            record = train_file(uploaded_file, expected, engine=engine)  # type: ignore
+            status = "♻️ Duplicate sample, label updated" if record["duplicate"] else "🎓 Training sample saved"
+            return {"result": f"{status}: {record['id'][:12]} ({record['engine']})", "sample": record}
+        except Exception as e:
+            return {"error": f"❌ Failed to save training sample: {str(e)}"}
+
+    return await run_in_threadpool(work)
+
+# Full-text search over every page extracted so far
+@app.get("/tools/search")
+async def search_tool(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    raw: bool = False
+):
+    try:
+        index = get_index()
+        limit = max(1, min(limit, 200))
+        start = time.perf_counter()
+        results = await run_in_threadpool(index.search, q, limit, max(0, offset), raw)
+        took_ms = (time.perf_counter() - start) * 1000
+        return {"result": results, "offset": offset, "limit": limit, "took_ms": round(took_ms, 2)}
+    except Exception as e:
+        return {"error": f"❌ Search failed: {str(e)}"}
+
+@app.get("/tools/search/stats")
+async def search_stats():
+    try:
+        return {"result": get_index().stats()}
+    except Exception as e:
+        return {"error": f"❌ Failed to read search index: {str(e)}"}
+
+@app.get("/tools/translate/memory/stats")
+async def translation_memory_stats():
+    try:
+        return {"result": get_memory().stats()}
+    except Exception as e:
+        return {"error": f"❌ Failed to read translation memory: {str(e)}"}
+
+@app.get("/tools/queue/stats")
+async def queue_stats():
+    queue = get_queue()
+    if queue is None:
+        return {"result": {"enabled": False}}
+    try:
+        return {"result": await run_in_threadpool(queue.stats)}
+    except Exception as e:
+        return {"error": f"❌ Failed to read work queue: {str(e)}"}
+
+@app.get("/tools/dataset/stats")
+async def dataset_stats():
+    try:
+        return {"result": get_store().stats()}
+    except Exception as e:
+        return {"error": f"❌ Failed to read dataset: {str(e)}"}
+
+@app.get("/tools/dataset/list")
+async def dataset_list(
+    offset: int = 0,
+    limit: int = 50,
+    engine: Optional[str] = None
 ):
     try:
-        result = translate_file(uploaded_file, target_language, engine=engine)  # type: ignore
-        return {"result": result}
+        store = get_store()
+        limit = max(1, min(limit, 500))
+        records = store.list(engine=engine, offset=max(0, offset), limit=limit)
+        return {"result": records, "total": store.count(engine), "offset": offset, "limit": limit}
     except Exception as e:
-        return {"error": f"❌ Translation failed: {str(e)}"}
+        return {"error": f"❌ Failed to list dataset: {str(e)}"}
+
+@app.get("/tools/dataset/export")
+async def dataset_export(
+    format: Literal["zip", "tar"] = "zip",
+    engine: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    chunks = export_dataset(format, engine=engine, since=since, until=until)
+    media_type = "application/zip" if format == "zip" else "application/x-tar"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="training_dataset.{format}"'},
+    )
+
+# MCP JSON-RPC over HTTP: batches run concurrently; with "Accept: text/event-stream"
+# progress notifications are streamed before the response
+@app.post("/mcp")
+async def mcp_endpoint(request: Request):
+    payload = await request.body()
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(stream_events(mcp_server, payload), media_type="text/event-stream")
+    response = await mcp_server.handle_payload(payload, lambda message: None)
+    if response is None:
+        return Response(status_code=202)
+    return JSONResponse(response)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return metrics.snapshot()
+
+@app.get("/config")
+async def config_endpoint():
+    return {"performance": asdict(performance_config()), "sources": setting_sources(), "autotune": last_autotune()}
+
+# Re-read config/settings.json; worker counts, cache budgets, DPI and LLM
+# limits take effect without a restart
+@app.post("/config/reload")
+async def config_reload():
+    try:
+        config = await run_in_threadpool(reload_settings)
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"performance": asdict(config), "sources": setting_sources()}
@@ -1,12 +1,97 @@
 # mcp.py
 
+import inspect
+import re
+import typing
 from functools import wraps
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+# Tools registered by @tool, keyed by tool name
+_REGISTRY: Dict[str, Callable] = {}
+
+# Parameters supplied by the server rather than the client
+RESERVED_PARAMS = ("progress",)
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", dict: "object"}
+
+
+def _json_schema(annotation: Any) -> Dict[str, Any]:
+    """Map a Python type annotation onto a JSON Schema fragment."""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Union:
+        # Optional[X] -> X; the parameter's default makes it optional
+        non_null = [a for a in args if a is not type(None)]
+        return _json_schema(non_null[0]) if len(non_null) == 1 else {}
+    if origin is typing.Literal:
+        return {"type": _JSON_TYPES.get(type(args[0]), "string"), "enum": list(args)}
+    if origin in (list, tuple, typing.Sequence, typing.List):
+        return {"type": "array", "items": _json_schema(args[0]) if args else {}}
+    if origin is dict:
+        return {"type": "object"}
+    if annotation in _JSON_TYPES:
+        return {"type": _JSON_TYPES[annotation]}
+    return {}
+
+
+def _param_descriptions(doc: Optional[str]) -> Dict[str, str]:
+    """Read ``name (type): description`` lines from a Google-style Args section."""
+    descriptions: Dict[str, str] = {}
+    in_args = False
+    for line in (doc or "").splitlines():
+        stripped = line.strip()
+        if stripped in ("Args:", "Arguments:"):
+            in_args = True
+            continue
+        if in_args and stripped.endswith(":") and " " not in stripped:
+            break  # next section, e.g. "Returns:"
+        match = re.match(r"^(\w+)\s*(\([^)]*\))?:\s*(.+)$", stripped)
+        if in_args and match:
+            descriptions[match.group(1)] = match.group(3)
+    return descriptions
+
+
+def build_input_schema(func: Callable) -> Dict[str, Any]:
+    """
+    Build a JSON Schema for a tool's arguments from its signature and docstring.
+
+    Args:
+        func (Callable): The tool function.
+
+    Returns:
+        dict: An ``object`` schema with properties and required parameters.
+    """
+    try:
+        hints = typing.get_type_hints(func)
+    except Exception:
+        hints = {}
+    descriptions = _param_descriptions(func.__doc__)
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+
+    for param in inspect.signature(func).parameters.values():
+        if param.name in RESERVED_PARAMS or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        schema = _json_schema(hints.get(param.name, Any))
+        if param.name in descriptions:
+            schema["description"] = descriptions[param.name]
+        if param.default is inspect.Parameter.empty:
+            required.append(param.name)
+        elif param.default is not None:
+            schema["default"] = param.default
+        properties[param.name] = schema
+
+    return {"type": "object", "properties": properties, "required": required}
+
 
 def tool(name: Optional[str] = None, description: Optional[str] = None):
     """
     Decorator to mark a function as an MCP tool.
-    Can optionally attach metadata for registration.
+    Attaches metadata and registers the tool so the MCP server can list and call it.
+
+    A tool that accepts a ``progress`` keyword receives a callback
+    ``progress(done, total, message=None)`` for reporting long-running work.
 
     Usage:
         @tool()
@@ -24,8 +109,21 @@ def tool(name: Optional[str] = None, description: Optional[str] = None):
 
         # Attach optional metadata
         wrapper._tool_name = name or func.__name__
-        wrapper._tool_description = description or func.__doc__
+        wrapper._tool_description = description or inspect.getdoc(func) or ""
+        wrapper._tool_schema = build_input_schema(func)
+        wrapper._tool_reports_progress = "progress" in inspect.signature(func).parameters
 
+        _REGISTRY[wrapper._tool_name] = wrapper
         return wrapper
 
     return decorator
+
+
+def get_tool(name: str) -> Optional[Callable]:
+    """Return the registered tool with the given name, or None."""
+    return _REGISTRY.get(name)
+
+
+def get_tools() -> List[Callable]:
+    """Return all registered tools in registration order."""
+    return list(_REGISTRY.values())
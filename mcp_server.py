@@ -0,0 +1,255 @@
+# mcp_server.py
+
+import sys
+import json
+import asyncio
+import logging
+import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from mcp import get_tool, get_tools
+import ocr_tools.tools  # noqa: F401  (registers the OCR tools)
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2024-11-05"
+SERVER_INFO = {"name": "ocr-mcp-server", "version": "1.0.0"}
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# Receives server-to-client messages (progress notifications); always called on the event loop
+Notify = Callable[[Dict], None]
+
+
+class JSONRPCError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def _error(request_id: Any, code: int, message: str, data: Any = None) -> Dict:
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def _describe(func: Callable) -> str:
+    """Tool description without the Args section of its docstring."""
+    return func._tool_description.split("Args:")[0].strip()
+
+
+class MCPServer:
+    """
+    Model Context Protocol server speaking JSON-RPC 2.0.
+
+    Serves every tool registered with ``@tool``. Batched requests are
+    dispatched concurrently, with tool bodies running on a thread pool so the
+    event loop stays free. Calls that carry ``_meta.progressToken`` receive
+    ``notifications/progress`` messages while the tool runs (e.g. per OCR page).
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-tool")
+
+    async def handle_payload(self, payload: Union[str, bytes, Any], notify: Notify) -> Optional[Any]:
+        """
+        Handle one JSON-RPC message or batch.
+
+        Args:
+            payload: Raw JSON text/bytes or an already-decoded message or batch.
+            notify (Notify): Callback for notifications emitted while handling.
+
+        Returns:
+            The response object, a list of responses for a batch, or None when
+            there is nothing to send back (notifications only).
+        """
+        if isinstance(payload, (str, bytes)):
+            try:
+                payload = json.loads(payload)
+            except ValueError:
+                return _error(None, PARSE_ERROR, "Parse error")
+
+        if isinstance(payload, list):
+            if not payload:
+                return _error(None, INVALID_REQUEST, "Invalid Request: empty batch")
+            responses = await asyncio.gather(*(self.handle_message(message, notify) for message in payload))
+            responses = [response for response in responses if response is not None]
+            return responses or None
+
+        return await self.handle_message(payload, notify)
+
+    async def handle_message(self, message: Any, notify: Notify) -> Optional[Dict]:
+        """Handle a single JSON-RPC request or notification."""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            request_id = message.get("id") if isinstance(message, dict) else None
+            return _error(request_id, INVALID_REQUEST, "Invalid Request")
+
+        request_id = message.get("id")
+        is_notification = "id" not in message
+        params = message.get("params") or {}
+
+        try:
+            if not isinstance(params, dict):
+                raise JSONRPCError(INVALID_PARAMS, "params must be an object")
+            result = await self._dispatch(message["method"], params, notify)
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except JSONRPCError as e:
+            response = _error(request_id, e.code, e.message, e.data)
+        except Exception as e:
+            logger.exception(f"MCP request failed: {e}")
+            response = _error(request_id, INTERNAL_ERROR, str(e))
+
+        return None if is_notification else response
+
+    async def _dispatch(self, method: str, params: Dict, notify: Notify) -> Any:
+        if method == "initialize":
+            return {
+                "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": SERVER_INFO,
+            }
+        if method == "ping":
+            return {}
+        if method.startswith("notifications/"):
+            return None
+        if method == "tools/list":
+            return {
+                "tools": [
+                    {"name": func._tool_name, "description": _describe(func), "inputSchema": func._tool_schema}
+                    for func in get_tools()
+                ]
+            }
+        if method == "tools/call":
+            return await self._call_tool(params, notify)
+        raise JSONRPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    async def _call_tool(self, params: Dict, notify: Notify) -> Dict:
+        name = params.get("name")
+        func = get_tool(name) if isinstance(name, str) else None
+        if func is None:
+            raise JSONRPCError(INVALID_PARAMS, f"Unknown tool: {name}")
+
+        arguments = dict(params.get("arguments") or {})
+        schema = func._tool_schema
+        missing = [param for param in schema["required"] if param not in arguments]
+        unknown = [arg for arg in arguments if arg not in schema["properties"]]
+        if missing or unknown:
+            raise JSONRPCError(INVALID_PARAMS, "Invalid tool arguments", {"missing": missing, "unknown": unknown})
+
+        loop = asyncio.get_running_loop()
+        token = (params.get("_meta") or {}).get("progressToken")
+        if token is not None and func._tool_reports_progress:
+            def progress(done: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+                note: Dict[str, Any] = {"progressToken": token, "progress": done}
+                if total is not None:
+                    note["total"] = total
+                if message:
+                    note["message"] = message
+                # Called from the tool's worker thread; hand over to the event loop in order
+                loop.call_soon_threadsafe(notify, {"jsonrpc": "2.0", "method": "notifications/progress", "params": note})
+
+            arguments["progress"] = progress
+
+        try:
+            result = await loop.run_in_executor(self._executor, functools.partial(func, **arguments))
+        except Exception as e:
+            logger.error(f"Tool {name} failed: {e}")
+            return {"content": [{"type": "text", "text": f"❌ {name} failed: {str(e)}"}], "isError": True}
+
+        text = result if isinstance(result, str) else json.dumps(result)
+        return {"content": [{"type": "text", "text": text}], "isError": False}
+
+
+async def stream_events(server: MCPServer, payload: Union[str, bytes]) -> AsyncIterator[str]:
+    """
+    Handle a payload and yield Server-Sent Events: progress notifications as
+    they happen, then the response.
+
+    Args:
+        server (MCPServer): Server handling the payload.
+        payload: Raw JSON-RPC message or batch.
+
+    Yields:
+        str: SSE-formatted ``message`` events.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def run() -> None:
+        try:
+            response = await server.handle_payload(payload, queue.put_nowait)
+            if response is not None:
+                queue.put_nowait(response)
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield f"event: message\ndata: {json.dumps(item)}\n\n"
+    finally:
+        await task
+
+
+async def serve_stdio(server: MCPServer) -> None:
+    """
+    Serve newline-delimited JSON-RPC over stdin/stdout.
+
+    Each line is handled in its own task, so a client can pipeline many calls
+    over one connection and receive responses as they complete.
+    """
+    loop = asyncio.get_running_loop()
+    pending = set()
+
+    def write(message: Any) -> None:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+    async def handle(line: str) -> None:
+        response = await server.handle_payload(line, write)
+        if response is not None:
+            write(response)
+
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+        task = asyncio.create_task(handle(line))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the OCR MCP server over stdio.")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum concurrent tool calls")
+    args = parser.parse_args()
+
+    # stdout carries the protocol; logs go to stderr
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+    asyncio.run(serve_stdio(MCPServer(max_workers=args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# ocr_tools/batch.py
+
+import os
+import time
+import tarfile
+import zipfile
+import hashlib
+import tempfile
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+from ocr_tools.extract import IMAGE_EXTENSIONS, extract_pages
+from ocr_tools.scheduler import BULK, client_context
+from ocr_tools.search import index_pages
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+SUPPORTED_EXTENSIONS = [".pdf"] + IMAGE_EXTENSIONS
+
+# (name, content, error): content is None when the entry could not be read
+Entry = Tuple[str, Optional[bytes], Optional[str]]
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _skip_member(name: str) -> bool:
+    # macOS resource forks and hidden files added by archivers
+    base = os.path.basename(name)
+    return name.startswith("__MACOSX/") or base.startswith(".") or not base
+
+
+def iter_archive(path: str, filename: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Read the files of a ZIP or TAR archive one at a time.
+
+    Args:
+        path (str): Archive on disk.
+        filename (str): Original archive name, used to pick the format.
+
+    Yields:
+        tuple: (member name, content) for every regular file.
+    """
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and not _skip_member(info.filename):
+                    yield info.filename, archive.read(info)
+    else:
+        # Streaming mode: members are read in order without building an index
+        with tarfile.open(path, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and not _skip_member(member.name):
+                    yield member.name, archive.extractfile(member).read()
+
+
+def iter_entries(inputs: Iterable[Tuple[str, str]]) -> Iterator[Entry]:
+    """
+    Expand uploaded files into batch entries, unpacking archives.
+
+    Args:
+        inputs (Iterable[tuple]): (path on disk, original filename) pairs.
+
+    Yields:
+        Entry: (name, content, error) per file; a damaged archive yields one
+        error entry after whatever members could be read.
+    """
+    for path, filename in inputs:
+        if not is_archive(filename):
+            with open(path, "rb") as f:
+                yield filename, f.read(), None
+            continue
+        try:
+            for name, content in iter_archive(path, filename):
+                yield f"{filename}/{name}", content, None
+        except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+            logger.error(f"Failed to read archive {filename}: {e}")
+            yield filename, None, f"❌ Failed to read archive: {str(e)}"
+
+
+def extract_entry(name: str, content: bytes, engine: str = "tesseract", pages: Optional[Sequence[int]] = None) -> Dict:
+    """
+    OCR one batch entry and add its pages to the search index.
+
+    Args:
+        name (str): Entry name; its extension selects the format.
+        content (bytes): File content.
+        engine (str): OCR engine.
+        pages (Sequence[int], optional): 0-based PDF page or TIFF frame indices (default: all).
+
+    Returns:
+        Dict: ``name``, ``status`` ('ok' or 'error'), ``seconds`` and either
+        ``result``, ``sha256`` and the per-page report, or ``error``.
+    """
+    start = time.perf_counter()
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return {"name": name, "status": "error", "error": "❌ Unsupported file format. Only PDF and image files are allowed."}
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+        tmp.write(content)
+    try:
+        sha256 = hashlib.sha256(content).hexdigest()
+        page_results = extract_pages(tmp.name, engine=engine, pages=pages, doc_hash=sha256)
+        index_pages(sha256, name, engine, page_results)
+        return {
+            "name": name,
+            "status": "ok",
+            "sha256": sha256,
+            "result": "\n\n".join(page["text"] for page in page_results),
+            "pages": [{k: v for k, v in page.items() if k != "text"} for page in page_results],
+            "seconds": time.perf_counter() - start,
+        }
+    except Exception as e:
+        return {"name": name, "status": "error", "error": str(e), "seconds": time.perf_counter() - start}
+    finally:
+        os.remove(tmp.name)
+
+
+def extract_batch(
+    entries: Iterable[Entry],
+    engine: str = "tesseract",
+    pages: Optional[Sequence[int]] = None,
+    workers: int = 4,
+    client: str = "anonymous",
+) -> Iterator[Dict]:
+    """
+    OCR many files in parallel, yielding each result as soon as it is ready.
+
+    Entries are read lazily and at most ``2 * workers`` are held in memory at
+    once. Pages run in the scheduler's bulk class so nightly batches do not
+    delay interactive requests. A failing file produces an error line; the
+    batch continues.
+
+    Args:
+        entries (Iterable[Entry]): Files to process, e.g. from iter_entries().
+        engine (str): OCR engine.
+        pages (Sequence[int], optional): 0-based PDF page or TIFF frame indices (default: all).
+        workers (int): Files processed concurrently.
+        client (str): Client identity for the page scheduler.
+
+    Yields:
+        Dict: One result per file in completion order, with its ``index`` in
+        the input, followed by a final ``summary``.
+    """
+    def run(name: str, content: bytes) -> Dict:
+        with client_context(client, priority=BULK):
+            return extract_entry(name, content, engine=engine, pages=pages)
+
+    start = time.perf_counter()
+    counts = {"ok": 0, "error": 0}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ocr-batch") as executor:
+        pending = {}
+        iterator = enumerate(entries)
+        exhausted = False
+
+        while pending or not exhausted:
+            # Keep the pool fed without reading the whole batch into memory
+            while not exhausted and len(pending) < 2 * max(1, workers):
+                item = next(iterator, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, (name, content, error) = item
+                if error is not None:
+                    counts["error"] += 1
+                    metrics.increment("batch.files_failed")
+                    yield {"index": index, "name": name, "status": "error", "error": error}
+                    continue
+                pending[executor.submit(run, name, content)] = index
+
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = {"index": pending.pop(future), **future.result()}
+                counts[result["status"]] += 1
+                metrics.increment("batch.files_ok" if result["status"] == "ok" else "batch.files_failed")
+                yield result
+
+    yield {"summary": {"files": counts["ok"] + counts["error"], **counts, "seconds": time.perf_counter() - start}}
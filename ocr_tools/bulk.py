@@ -0,0 +1,268 @@
+# ocr_tools/bulk.py
+
+import os
+import json
+import time
+import shutil
+import argparse
+import logging
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from utils.cpu_budget import CoreBudget
+from utils.file_utils import ensure_dir, file_sha256
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "checkpoint.jsonl"
+BULK_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def iter_files(root: str, extensions: Sequence[str] = BULK_EXTENSIONS) -> Iterator[str]:
+    """
+    Walk a directory tree lazily, in a stable order.
+
+    Args:
+        root (str): Directory to scan.
+        extensions (Sequence[str]): File extensions to include.
+
+    Yields:
+        str: Paths relative to ``root``.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in extensions:
+                yield os.path.relpath(os.path.join(dirpath, name), root)
+
+
+class Checkpoint:
+    """
+    Append-only JSON-lines record of files already processed.
+
+    Each completed file adds one line, written with a single O_APPEND write
+    right after its output is in place, so an interrupted run loses at most
+    the files that were in flight. Completed content hashes are kept as raw
+    digests and files are also matched by path, size and mtime, so resuming
+    a run over millions of files does not re-hash unchanged files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._by_hash: Dict[bytes, str] = {}
+        self._by_path: Dict[str, Tuple[int, int]] = {}
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"Ignoring truncated checkpoint line in {path}")
+
+    def _apply(self, record: Dict) -> None:
+        if record.get("status") != "ok":
+            return  # failed files are retried on the next run
+        self._by_hash[bytes.fromhex(record["sha256"])] = record["output"]
+        self._by_path[record["path"]] = (record["size"], record["mtime_ns"])
+
+    def __len__(self) -> int:
+        return len(self._by_hash)
+
+    def unchanged(self, rel_path: str, stat: os.stat_result) -> bool:
+        """True when this path was completed and its size and mtime still match."""
+        return self._by_path.get(rel_path) == (stat.st_size, stat.st_mtime_ns)
+
+    def output_for(self, sha256: str) -> Optional[str]:
+        """Output file of an earlier file with the same content, if any."""
+        return self._by_hash.get(bytes.fromhex(sha256))
+
+    def record(self, record: Dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        self._apply(record)
+
+
+def output_path(rel_path: str) -> str:
+    """Output file for an input, mirroring the input tree: ``a/b.pdf`` -> ``a/b.pdf.txt``."""
+    return rel_path + ".txt"
+
+
+def _write_atomic(path: str, text: str) -> None:
+    ensure_dir(os.path.dirname(path) or ".")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def _bulk_job(job: Tuple[str, str, str, str, str, int, Optional[str]]) -> Dict:
+    """Worker-process entry point: OCR one file, write its text output and optionally index it."""
+    from ocr_tools.extract import extract_pages
+    from ocr_tools.search import index_pages
+
+    path, rel_path, sha256, output_dir, engine, dpi, index_path = job
+    start = time.perf_counter()
+    try:
+        pages = extract_pages(path, engine=engine, dpi=dpi, doc_hash=sha256)
+        _write_atomic(os.path.join(output_dir, output_path(rel_path)), "\n\n".join(page["text"] for page in pages))
+        if index_path:
+            index_pages(sha256, rel_path, engine, pages, path=index_path)
+        return {"status": "ok", "pages": len(pages), "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return {"status": "error", "error": str(e), "seconds": time.perf_counter() - start}
+
+
+def run_bulk(
+    input_dir: str,
+    output_dir: str,
+    engine: str = "tesseract",
+    dpi: int = 300,
+    workers: Optional[int] = None,
+    pin: bool = False,
+    checkpoint_path: Optional[str] = None,
+    index_path: Optional[str] = None,
+) -> Dict:
+    """
+    OCR every PDF and image under a directory, resuming from a checkpoint.
+
+    Files already recorded in the checkpoint (same path, size and mtime, or the
+    same content hash) are skipped; a file whose content matches a finished
+    file elsewhere gets a copy of that output instead of a new OCR run. The
+    rest run in a CoreBudget process pool, with at most ``2 * workers`` files
+    queued at once so the tree is never listed in memory.
+
+    Args:
+        input_dir (str): Directory tree to scan.
+        output_dir (str): Directory receiving ``<relative path>.txt`` outputs.
+        engine (str): OCR engine.
+        dpi (int): Resolution used to rasterize PDF pages.
+        workers (int, optional): Worker processes (default: derived from the engine).
+        pin (bool): Pin each worker process to its own CPUs.
+        checkpoint_path (str, optional): Checkpoint file (default: ``<output_dir>/checkpoint.jsonl``).
+        index_path (str, optional): Also add every page to this full-text search index.
+
+    Returns:
+        Dict: Counts of ``processed``, ``reused``, ``skipped`` and ``failed`` files, and ``seconds``.
+    """
+    ensure_dir(output_dir)
+    checkpoint = Checkpoint(checkpoint_path or os.path.join(output_dir, CHECKPOINT_NAME))
+    logger.info(f"Resuming with {len(checkpoint)} completed files in the checkpoint")
+
+    budget = CoreBudget(workers=workers, engines=[engine], pin=pin)
+    logger.info(f"Core budget: {budget.describe()}")
+    counts = {"processed": 0, "reused": 0, "skipped": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def finish(rel_path: str, sha256: str, stat: os.stat_result, result: Dict) -> None:
+        record = {
+            "path": rel_path,
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "output": output_path(rel_path),
+            "engine": engine,
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **result,
+        }
+        checkpoint.record(record)
+        if result["status"] != "ok":
+            counts["failed"] += 1
+            logger.error(f"{rel_path}: {result['error']}")
+        total = sum(counts.values())
+        if total and total % 100 == 0:
+            logger.info(f"{total} files: {counts}")
+
+    with budget.process_pool() as pool:
+        pending: Dict = {}
+        # Content hashes submitted in this run, so duplicates wait for the first copy
+        in_flight: Dict[str, str] = {}
+        deferred: List[Tuple[str, str, os.stat_result]] = []
+
+        def drain(block_until: int) -> None:
+            while len(pending) > block_until:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel_path, sha256, stat = pending.pop(future)
+                    in_flight.pop(sha256, None)
+                    result = future.result()
+                    if result["status"] == "ok":
+                        counts["processed"] += 1
+                    finish(rel_path, sha256, stat, result)
+
+        def reuse(rel_path: str, sha256: str, stat: os.stat_result, source: str) -> None:
+            target = output_path(rel_path)
+            if source != target:
+                ensure_dir(os.path.dirname(os.path.join(output_dir, target)) or ".")
+                shutil.copyfile(os.path.join(output_dir, source), os.path.join(output_dir, target))
+            counts["reused"] += 1
+            finish(rel_path, sha256, stat, {"status": "ok", "reused_from": source})
+
+        for rel_path in iter_files(input_dir):
+            path = os.path.join(input_dir, rel_path)
+            stat = os.stat(path)
+            if checkpoint.unchanged(rel_path, stat):
+                counts["skipped"] += 1
+                continue
+
+            sha256 = file_sha256(path)
+            source = checkpoint.output_for(sha256)
+            if source is not None and os.path.exists(os.path.join(output_dir, source)):
+                reuse(rel_path, sha256, stat, source)
+                continue
+            if sha256 in in_flight:
+                deferred.append((rel_path, sha256, stat))
+                continue
+
+            drain(2 * budget.workers - 1)
+            in_flight[sha256] = rel_path
+            future = pool.submit(_bulk_job, (path, rel_path, sha256, output_dir, engine, dpi, index_path))
+            pending[future] = (rel_path, sha256, stat)
+
+        drain(0)
+
+        # Duplicates of files that were still running when they were found
+        for rel_path, sha256, stat in deferred:
+            source = checkpoint.output_for(sha256)
+            if source is not None:
+                reuse(rel_path, sha256, stat, source)
+            else:
+                path = os.path.join(input_dir, rel_path)
+                result = pool.submit(_bulk_job, (path, rel_path, sha256, output_dir, engine, dpi, index_path)).result()
+                if result["status"] == "ok":
+                    counts["processed"] += 1
+                finish(rel_path, sha256, stat, result)
+
+    return {**counts, "seconds": time.perf_counter() - start}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="OCR every PDF and image under a directory, resumably.")
+    parser.add_argument("input", help="Directory tree to process")
+    parser.add_argument("--output", required=True, help="Directory for <relative path>.txt outputs")
+    parser.add_argument("--engine", default="tesseract", help="OCR engine")
+    parser.add_argument("--dpi", type=int, default=300, help="PDF rasterization DPI")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--pin", action="store_true", help="Pin each worker process to its own CPUs")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>/checkpoint.jsonl)")
+    parser.add_argument("--index", default=None, help="Add extracted pages to this search index database")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = run_bulk(
+        args.input,
+        args.output,
+        engine=args.engine,
+        dpi=args.dpi,
+        workers=args.workers,
+        pin=args.pin,
+        checkpoint_path=args.checkpoint,
+        index_path=args.index,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+# ocr_tools/dataset.py
+
+import os
+import re
+import json
+import time
+import hashlib
+import tarfile
+import zipfile
+import tempfile
+import threading
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from fastapi import UploadFile
+from utils.file_utils import ensure_dir, get_file_extension
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+OBJECTS_DIR = "objects"
+SAMPLE_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+LEGACY_NAME = re.compile(r"^(?P<engine>[a-z0-9]+)_(?P<stamp>\d{8}-\d{6})$")
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class TrainingStore:
+    """
+    Content-addressed store for OCR training samples.
+
+    Samples are deduplicated by SHA-256 and written to sharded directories
+    (``objects/ab/cd/<sha256><ext>``) with the label next to them as
+    ``<sha256>.txt``. An append-only JSON-lines manifest holds one record per
+    sample (engine, label preview, size, timestamps) and is mirrored in memory,
+    so lookups, listings and counts never touch the sample files themselves.
+    Other processes' appends are picked up by tailing the manifest.
+    """
+
+    def __init__(self, root: str = "training_dataset"):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self._lock = threading.RLock()
+        self._records: Dict[str, Dict] = {}
+        self._by_engine: Dict[str, List[str]] = {}
+        self._order: List[str] = []
+        self._labelled = 0
+        self._offset = 0
+
+        ensure_dir(root)
+        if not os.path.exists(self.manifest_path):
+            self._import_legacy()
+        self._refresh()
+
+    # --- manifest handling ---
+
+    def _apply(self, record: Dict) -> None:
+        sample_id = record["id"]
+        previous = self._records.get(sample_id)
+        if previous is None:
+            self._order.append(sample_id)
+            self._by_engine.setdefault(record["engine"], []).append(sample_id)
+        elif previous.get("label_path"):
+            self._labelled -= 1
+        if record.get("label_path"):
+            self._labelled += 1
+        self._records[sample_id] = record
+
+    def _refresh(self) -> None:
+        """Apply manifest lines appended since the last read (by any process)."""
+        try:
+            size = os.path.getsize(self.manifest_path)
+        except FileNotFoundError:
+            return
+        if size <= self._offset:
+            return
+        with open(self.manifest_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        # Only consume complete lines; a concurrent writer may be mid-append
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += end
+
+    def _append(self, record: Dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        # A single O_APPEND write keeps lines intact across processes
+        fd = os.open(self.manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        self._refresh()
+
+    def _import_legacy(self) -> None:
+        """Index flat ``<engine>_<timestamp>.<ext>`` files left by older versions, in place."""
+        logger.info(f"Indexing legacy training samples in {self.root}")
+        open(self.manifest_path, "a").close()
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            base, ext = os.path.splitext(name)
+            if not os.path.isfile(path) or ext.lower() not in SAMPLE_EXTENSIONS:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            match = LEGACY_NAME.match(base)
+            engine = match.group("engine") if match else "unknown"
+            created_at = _now()
+            if match:
+                stamp = datetime.strptime(match.group("stamp"), "%Y%m%d-%H%M%S")
+                created_at = stamp.replace(tzinfo=timezone.utc).isoformat(timespec="seconds")
+            label_name = base + ".txt"
+            label = None
+            if os.path.exists(os.path.join(self.root, label_name)):
+                with open(os.path.join(self.root, label_name), "r", encoding="utf-8") as f:
+                    label = f.read()
+            self._add_record(
+                data, name, engine, label,
+                path=name,
+                label_path=label_name if label is not None else None,
+                created_at=created_at,
+            )
+
+    # --- writes ---
+
+    def _shard_dir(self, sample_id: str) -> str:
+        return os.path.join(OBJECTS_DIR, sample_id[:2], sample_id[2:4])
+
+    def _write_file(self, relative_path: str, data: bytes) -> None:
+        full_path = os.path.join(self.root, relative_path)
+        ensure_dir(os.path.dirname(full_path))
+        # Write-then-rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, full_path)
+
+    def _add_record(
+        self,
+        data: bytes,
+        filename: str,
+        engine: str,
+        label: Optional[str],
+        path: Optional[str] = None,
+        label_path: Optional[str] = None,
+        created_at: Optional[str] = None,
+    ) -> Tuple[Dict, bool]:
+        sample_id = hashlib.sha256(data).hexdigest()
+        existing = self._records.get(sample_id)
+        now = _now()
+
+        if existing is None:
+            if path is None:
+                path = os.path.join(self._shard_dir(sample_id), sample_id + get_file_extension(filename))
+                self._write_file(path, data)
+            record = {
+                "id": sample_id,
+                "engine": engine,
+                "filename": filename,
+                "path": path,
+                "size": len(data),
+                "label_path": None,
+                "label_chars": 0,
+                "label_preview": "",
+                "created_at": created_at or now,
+                "updated_at": created_at or now,
+            }
+        else:
+            record = dict(existing)
+            record["updated_at"] = now
+
+        if label is not None:
+            if label_path is None:
+                label_path = os.path.join(self._shard_dir(sample_id), sample_id + ".txt")
+                self._write_file(label_path, label.encode("utf-8"))
+            record["label_path"] = label_path
+            record["label_chars"] = len(label)
+            record["label_preview"] = label.strip()[:50]
+
+        if existing is None or record != existing:
+            self._append(record)
+        return record, existing is None
+
+    def add(self, data: bytes, filename: str, engine: str, label: Optional[str] = None) -> Tuple[Dict, bool]:
+        """
+        Store a training sample, deduplicating on content hash.
+
+        Args:
+            data (bytes): Raw file content (image or PDF).
+            filename (str): Original file name, used for its extension.
+            engine (str): OCR engine the sample was collected for.
+            label (str, optional): Ground-truth text; replaces any previous label.
+
+        Returns:
+            tuple: (record, created) where created is False for duplicates.
+        """
+        with self._lock:
+            self._refresh()
+            return self._add_record(data, filename, engine, label)
+
+    # --- reads ---
+
+    def get(self, sample_id: str) -> Optional[Dict]:
+        """Return the manifest record for a sample, or None."""
+        with self._lock:
+            self._refresh()
+            return self._records.get(sample_id)
+
+    def count(self, engine: Optional[str] = None) -> int:
+        """Number of samples, optionally for a single engine."""
+        with self._lock:
+            self._refresh()
+            if engine is None:
+                return len(self._order)
+            return len(self._by_engine.get(engine, []))
+
+    def stats(self) -> Dict:
+        """Sample counts overall, per engine and with labels."""
+        with self._lock:
+            self._refresh()
+            return {
+                "total": len(self._order),
+                "labelled": self._labelled,
+                "engines": {engine: len(ids) for engine, ids in self._by_engine.items()},
+            }
+
+    def list(self, engine: Optional[str] = None, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """
+        Return manifest records in insertion order.
+
+        Args:
+            engine (str, optional): Only return samples for this engine.
+            offset (int): Number of records to skip.
+            limit (int): Maximum number of records to return.
+
+        Returns:
+            list: Manifest records.
+        """
+        with self._lock:
+            self._refresh()
+            ids = self._order if engine is None else self._by_engine.get(engine, [])
+            return [self._records[sample_id] for sample_id in ids[offset:offset + limit]]
+
+    def iter_records(
+        self,
+        engine: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """
+        Iterate manifest records, optionally filtered by engine and creation date.
+
+        Args:
+            engine (str, optional): Only yield samples for this engine.
+            since (str, optional): ISO date/time; only samples created at or after it.
+            until (str, optional): ISO date/time; only samples created before it.
+
+        Yields:
+            dict: Manifest records in insertion order.
+        """
+        with self._lock:
+            self._refresh()
+            ids = list(self._order if engine is None else self._by_engine.get(engine, []))
+        for sample_id in ids:
+            record = self._records[sample_id]
+            # ISO-8601 strings in the same timezone sort chronologically
+            if since and record["created_at"] < since:
+                continue
+            if until and record["created_at"] >= until:
+                continue
+            yield record
+
+    def full_path(self, relative_path: str) -> str:
+        """Absolute location of a file referenced by a manifest record."""
+        return os.path.join(self.root, relative_path)
+
+    def read_label(self, record: Dict) -> Optional[str]:
+        """Load the full label text for a record, if it has one."""
+        if not record.get("label_path"):
+            return None
+        with open(self.full_path(record["label_path"]), "r", encoding="utf-8") as f:
+            return f.read()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _export_entries(store: TrainingStore, records: Iterator[Dict]) -> Iterator[Tuple[str, str]]:
+    """(archive name, file path) pairs for each sample and its label."""
+    for record in records:
+        sample_name = f"{record['engine']}/{record['id']}{get_file_extension(record['path'])}"
+        yield sample_name, store.full_path(record["path"])
+        if record.get("label_path"):
+            yield f"{record['engine']}/{record['id']}.txt", store.full_path(record["label_path"])
+
+
+def _stream_zip(store: TrainingStore, records: List[Dict]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    # An unseekable sink makes zipfile emit data descriptors instead of seeking back
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for arcname, path in _export_entries(store, iter(records)):
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime(os.path.getmtime(path))[:6])
+            with open(path, "rb") as src, archive.open(info, "w", force_zip64=True) as dst:
+                while True:
+                    chunk = src.read(EXPORT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+        manifest = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        archive.writestr("manifest.jsonl", manifest)
+    yield sink.drain()
+
+
+def _stream_tar(store: TrainingStore, records: List[Dict]) -> Iterator[bytes]:
+    def entry(arcname: str, size: int, mtime: float) -> bytes:
+        info = tarfile.TarInfo(arcname)
+        info.size = size
+        info.mtime = int(mtime)
+        info.mode = 0o644
+        return info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+    def padding(size: int) -> bytes:
+        return b"\0" * (-size % tarfile.BLOCKSIZE)
+
+    # Headers and data are written by hand so no member is ever buffered whole
+    for arcname, path in _export_entries(store, iter(records)):
+        stat = os.stat(path)
+        yield entry(arcname, stat.st_size, stat.st_mtime)
+        with open(path, "rb") as src:
+            while True:
+                chunk = src.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        yield padding(stat.st_size)
+
+    manifest = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+    yield entry("manifest.jsonl", len(manifest), time.time())
+    yield manifest + padding(len(manifest))
+    yield b"\0" * (tarfile.BLOCKSIZE * 2)
+
+
+def export_dataset(
+    archive_format: str = "zip",
+    engine: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    store: Optional[TrainingStore] = None,
+) -> Iterator[bytes]:
+    """
+    Stream the training dataset as a ZIP or TAR archive.
+
+    Files are read and emitted in fixed-size chunks, so memory use does not
+    grow with the dataset. Samples are grouped by engine and a
+    ``manifest.jsonl`` with the exported records is appended at the end.
+
+    Args:
+        archive_format (str): 'zip' or 'tar'.
+        engine (str, optional): Only export samples for this engine.
+        since (str, optional): ISO date/time; only samples created at or after it.
+        until (str, optional): ISO date/time; only samples created before it.
+        store (TrainingStore, optional): Store to export (default: shared store).
+
+    Returns:
+        Iterator[bytes]: Archive content chunks.
+    """
+    if archive_format not in ("zip", "tar"):
+        raise ValueError("❌ Unsupported archive format. Use 'zip' or 'tar'.")
+    store = store or get_store()
+    records = list(store.iter_records(engine=engine, since=since, until=until))
+    logger.info(f"📦 Exporting {len(records)} training samples as {archive_format}")
+    if archive_format == "zip":
+        return _stream_zip(store, records)
+    return _stream_tar(store, records)
+
+
+@lru_cache(maxsize=None)
+def get_store(root: Optional[str] = None) -> TrainingStore:
+    """
+    Shared TrainingStore for the dataset directory.
+
+    Args:
+        root (str, optional): Dataset directory (default: $TRAINING_DATASET_DIR or training_dataset).
+
+    Returns:
+        TrainingStore: Store instance, created once per directory.
+    """
+    return TrainingStore(root or os.getenv("TRAINING_DATASET_DIR", "training_dataset"))
+
+
+def train_file(uploaded_file: UploadFile, expected: str, engine: str = "tesseract") -> Dict:
+    """
+    Save an uploaded PDF or image with its ground-truth text as a training sample.
+
+    Args:
+        uploaded_file (UploadFile): File uploaded by the user (PDF or image).
+        expected (str): Ground-truth text for the document.
+        engine (str): OCR engine the sample is collected for.
+
+    Returns:
+        dict: The stored manifest record plus a ``duplicate`` flag.
+    """
+    filename = uploaded_file.filename or "file"
+    if get_file_extension(filename) not in SAMPLE_EXTENSIONS:
+        raise ValueError("❌ Unsupported file format. Only PDF and image files are allowed.")
+
+    record, created = get_store().add(uploaded_file.file.read(), filename, engine, label=expected)
+    logger.info(f"🎓 Training sample {'saved' if created else 'updated'}: {record['id']}")
+    return dict(record, duplicate=not created)
@@ -0,0 +1,357 @@
+# ocr_tools/evaluate.py
+
+import os
+import re
+import json
+import time
+import argparse
+import tempfile
+import logging
+from concurrent.futures import as_completed
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+from fastapi import UploadFile
+from utils.cpu_budget import CoreBudget
+
+logger = logging.getLogger(__name__)
+
+
+def edit_distance(source: Sequence[Hashable], target: Sequence[Hashable]) -> int:
+    """
+    Levenshtein distance between two sequences (characters or word tokens).
+
+    Uses Myers' bit-parallel algorithm (Hyyrö's formulation for global edit
+    distance) with Python integers as bit vectors, so the cost is roughly
+    O(len(source) * len(target) / 64) instead of the quadratic table of the
+    textbook dynamic programme. Multi-page documents stay fast.
+
+    Args:
+        source (Sequence): First sequence, e.g. a string or a list of words.
+        target (Sequence): Second sequence.
+
+    Returns:
+        int: Minimum number of insertions, deletions and substitutions.
+    """
+    # The shorter sequence becomes the bit-vector pattern
+    if len(source) > len(target):
+        source, target = target, source
+
+    length = len(source)
+    if length == 0:
+        return len(target)
+
+    peq: Dict[Hashable, int] = {}
+    for i, symbol in enumerate(source):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv = full
+    mv = 0
+    score = length
+
+    for symbol in target:
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & full) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+
+    return score
+
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse whitespace so that layout differences are not counted as errors.
+
+    Args:
+        text (str): Raw OCR output or reference text.
+
+    Returns:
+        str: Text with runs of whitespace replaced by single spaces.
+    """
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def _error_rate(errors: int, reference_length: int, hypothesis_length: int) -> float:
+    if reference_length == 0:
+        return 0.0 if hypothesis_length == 0 else 1.0
+    return errors / reference_length
+
+
+def evaluate_text(predicted: str, expected: str) -> Dict:
+    """
+    Compute character and word error rates of OCR output against a reference.
+
+    Args:
+        predicted (str): Text produced by the OCR engine.
+        expected (str): Ground-truth text.
+
+    Returns:
+        dict: CER/WER together with the raw error and reference counts.
+    """
+    hypothesis = normalize_text(predicted)
+    reference = normalize_text(expected)
+    hyp_words = hypothesis.split()
+    ref_words = reference.split()
+
+    char_errors = edit_distance(hypothesis, reference)
+    word_errors = edit_distance(hyp_words, ref_words)
+    cer = _error_rate(char_errors, len(reference), len(hypothesis))
+    wer = _error_rate(word_errors, len(ref_words), len(hyp_words))
+
+    return {
+        "cer": cer,
+        "wer": wer,
+        "accuracy": max(0.0, 1.0 - cer),
+        "char_errors": char_errors,
+        "word_errors": word_errors,
+        "ref_chars": len(reference),
+        "ref_words": len(ref_words),
+    }
+
+
+def format_report(metrics: Dict) -> str:
+    """
+    Render evaluation metrics as a short human-readable report.
+
+    Args:
+        metrics (dict): Output of evaluate_text(), optionally with timings.
+
+    Returns:
+        str: Multi-line report.
+    """
+    lines = [
+        f"📊 Character Error Rate (CER): {metrics['cer']:.2%}",
+        f"📊 Word Error Rate (WER): {metrics['wer']:.2%}",
+        f"✅ Character Accuracy: {metrics['accuracy']:.2%}",
+        f"• Character errors: {metrics['char_errors']} / {metrics['ref_chars']}",
+        f"• Word errors: {metrics['word_errors']} / {metrics['ref_words']}",
+    ]
+    if "cpu_seconds" in metrics:
+        lines.append(f"⏱️ CPU time: {metrics['cpu_seconds']:.2f}s (wall {metrics['wall_seconds']:.2f}s)")
+    elif "wall_seconds" in metrics:
+        lines.append(f"⏱️ Time: {metrics['wall_seconds']:.2f}s")
+    return "\n".join(lines)
+
+
+def _cpu_seconds() -> float:
+    # Includes reaped child processes, which is where the tesseract binary runs.
+    # Process-wide, so only meaningful where the process runs one job at a time
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def evaluate_file(file_path: str, expected: str, engine: str = "tesseract", dpi: int = 300, measure_cpu: bool = True) -> Dict:
+    """
+    Run OCR on a file and score the output against the expected text.
+
+    Args:
+        file_path (str): Path to a PDF or image file.
+        expected (str): Ground-truth text.
+        engine (str): OCR engine to evaluate.
+        dpi (int): Rasterization resolution for PDF pages.
+        measure_cpu (bool): Report ``cpu_seconds``. Process CPU time, so only
+            for processes evaluating one file at a time (the dataset workers),
+            not the server, where it would include other requests.
+
+    Returns:
+        dict: Metrics from evaluate_text() plus wall-clock and, optionally, CPU seconds.
+    """
+    from ocr_tools.extract import extract
+
+    cpu_start = _cpu_seconds()
+    wall_start = time.perf_counter()
+    predicted = extract(file_path, engine=engine, dpi=dpi)
+    metrics = evaluate_text(predicted, expected)
+    if measure_cpu:
+        metrics["cpu_seconds"] = _cpu_seconds() - cpu_start
+    metrics["wall_seconds"] = time.perf_counter() - wall_start
+    return metrics
+
+
+def test_file(uploaded_file: UploadFile, expected: str, engine: str = "tesseract") -> Dict:
+    """
+    Evaluate OCR accuracy on an uploaded PDF or image.
+
+    Args:
+        uploaded_file (UploadFile): File uploaded by the user (PDF or image).
+        expected (str): Ground-truth text for the document.
+        engine (str): OCR engine to evaluate.
+
+    Returns:
+        dict: Evaluation metrics for the upload.
+    """
+    filename = uploaded_file.filename or "file"
+    suffix = os.path.splitext(filename)[-1]
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(uploaded_file.file.read())
+        tmp_path = tmp.name
+
+    try:
+        return evaluate_file(tmp_path, expected, engine=engine, measure_cpu=False)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def find_labelled_samples(dataset_dir: str) -> List[Tuple[str, str]]:
+    """
+    Find dataset samples that have a ground-truth label.
+
+    Samples come from the training store manifest, which also indexes legacy
+    files with a same-named ``.txt`` label next to them.
+
+    Args:
+        dataset_dir (str): Training dataset directory.
+
+    Returns:
+        list: (sample_path, label_text) pairs.
+    """
+    from ocr_tools.dataset import get_store
+
+    store = get_store(dataset_dir)
+    samples = []
+    offset = 0
+    while True:
+        records = store.list(offset=offset, limit=500)
+        if not records:
+            break
+        for record in records:
+            label = store.read_label(record)
+            if label is not None:
+                samples.append((store.full_path(record["path"]), label))
+        offset += len(records)
+    return samples
+
+
+def _evaluate_job(job: Tuple[str, str, str, int]) -> Dict:
+    sample_path, expected, engine, dpi = job
+    try:
+        metrics = evaluate_file(sample_path, expected, engine=engine, dpi=dpi)
+        metrics["status"] = "ok"
+    except Exception as e:
+        metrics = {"status": "error", "error": str(e)}
+    metrics.update({"sample": os.path.basename(sample_path), "engine": engine, "dpi": dpi})
+    return metrics
+
+
+def summarise_results(results: List[Dict]) -> List[Dict]:
+    """
+    Aggregate per-sample results into one row per (engine, dpi) setting.
+
+    Error rates are micro-averaged over all reference characters and words,
+    so long documents weigh more than short ones.
+
+    Args:
+        results (list): Per-sample dictionaries from evaluate_dataset().
+
+    Returns:
+        list: Aggregate rows sorted by accuracy per CPU-second (best first).
+    """
+    groups: Dict[Tuple[str, int], List[Dict]] = {}
+    for result in results:
+        groups.setdefault((result["engine"], result["dpi"]), []).append(result)
+
+    rows = []
+    for (engine, dpi), items in groups.items():
+        ok = [r for r in items if r["status"] == "ok"]
+        char_errors = sum(r["char_errors"] for r in ok)
+        word_errors = sum(r["word_errors"] for r in ok)
+        ref_chars = sum(r["ref_chars"] for r in ok)
+        ref_words = sum(r["ref_words"] for r in ok)
+        cpu_seconds = sum(r["cpu_seconds"] for r in ok)
+        cer = _error_rate(char_errors, ref_chars, char_errors)
+        accuracy = max(0.0, 1.0 - cer)
+        mean_cpu = cpu_seconds / len(ok) if ok else 0.0
+        rows.append({
+            "engine": engine,
+            "dpi": dpi,
+            "samples": len(items),
+            "failed": len(items) - len(ok),
+            "cer": cer,
+            "wer": _error_rate(word_errors, ref_words, word_errors),
+            "accuracy": accuracy,
+            "cpu_seconds": cpu_seconds,
+            "accuracy_per_cpu_second": accuracy / mean_cpu if mean_cpu > 0 else 0.0,
+        })
+
+    rows.sort(key=lambda row: row["accuracy_per_cpu_second"], reverse=True)
+    return rows
+
+
+def evaluate_dataset(
+    dataset_dir: str,
+    engines: Sequence[str] = ("tesseract",),
+    dpis: Sequence[int] = (300,),
+    workers: Optional[int] = None,
+    pin: bool = False,
+) -> Dict:
+    """
+    Evaluate every labelled sample in a dataset with each engine and DPI.
+
+    Jobs run in parallel worker processes, one (sample, engine, dpi) per job.
+    Worker count and per-worker torch/OpenMP/Tesseract threads come from a
+    CoreBudget, so parallel jobs do not oversubscribe the CPU and CPU-second
+    figures stay comparable.
+
+    Args:
+        dataset_dir (str): Directory holding samples and labels.
+        engines (Sequence[str]): OCR engines to compare.
+        dpis (Sequence[int]): Rasterization resolutions to compare.
+        workers (int, optional): Number of worker processes (default: derived from the engines).
+        pin (bool): Pin each worker process to its own CPUs.
+
+    Returns:
+        dict: ``{"summary": [...], "results": [...]}``.
+    """
+    samples = find_labelled_samples(dataset_dir)
+    jobs = [(path, expected, engine, dpi) for engine in engines for dpi in dpis for path, expected in samples]
+    logger.info(f"Evaluating {len(samples)} samples x {len(engines)} engines x {len(dpis)} DPI settings")
+
+    results = []
+    if jobs:
+        budget = CoreBudget(workers=workers, engines=engines, pin=pin)
+        logger.info(f"Core budget: {budget.describe()}")
+        with budget.process_pool() as pool:
+            futures = [pool.submit(_evaluate_job, job) for job in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+
+    return {"summary": summarise_results(results), "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Evaluate OCR accuracy (CER/WER) against labelled samples.")
+    parser.add_argument("--dataset", default="training_dataset", help="Training dataset directory")
+    parser.add_argument("--engines", nargs="+", default=["tesseract"], help="OCR engines to compare")
+    parser.add_argument("--dpi", nargs="+", type=int, default=[300], help="PDF rasterization DPI values to compare")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--pin", action="store_true", help="Pin each worker process to its own CPUs")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = evaluate_dataset(args.dataset, engines=args.engines, dpis=args.dpi, workers=args.workers, pin=args.pin)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'engine':<12}{'dpi':>6}{'samples':>9}{'CER':>9}{'WER':>9}{'CPU s':>10}{'acc/CPU s':>11}")
+    for row in report["summary"]:
+        print(
+            f"{row['engine']:<12}{row['dpi']:>6}{row['samples']:>9}{row['cer']:>9.2%}"
+            f"{row['wer']:>9.2%}{row['cpu_seconds']:>10.2f}{row['accuracy_per_cpu_second']:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,768 @@
 # ocr_tools/extract.py
 
+import io
 import os
+import math
+import hashlib
+import time
 import tempfile
+from functools import lru_cache, partial
 from PIL import Image
 import pytesseract
 import fitz  # PyMuPDF
 from ocr_tools.nougat_model import NougatOCR
-from ocr_tools.mistral_ocr import mistral_ocr
+from ocr_tools.mistral_ocr import mistral_ocr_image
+from ocr_tools.scheduler import PageScheduler, get_scheduler, classify
+from ocr_tools.page_cache import get_page_cache
+from ocr_tools.page_dedup import THUMBNAIL_SIZE, get_recent_pages, ocr_unless_redundant, thumbnail
+from ocr_tools.work_queue import TaskQueue, get_queue
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from utils import metrics
+from utils.config import get_setting, performance_config
+from utils.file_utils import file_sha256
 import logging
 
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"]
 
-def extract(file_path: str, engine: str = "tesseract") -> str:
+# Cascade engine: Tesseract first, heavier model only for low-confidence text.
+# Defaults of the CASCADE_CONFIDENCE_THRESHOLD and CASCADE_FALLBACK_ENGINE settings
+DEFAULT_CASCADE_THRESHOLD = 60.0
+DEFAULT_CASCADE_FALLBACK = "mistral"
+# Engines whose models read single text lines (TrOCR) rather than full pages
+LINE_LEVEL_ENGINES = ("mistral",)
+
+# Rasterization: engines that read one channel get grayscale pixmaps (1 byte per
+# pixel instead of 3). Pages above RASTER_PIXEL_BUDGET are split into
+# overlapping tiles for Tesseract; transformer engines resize their input to a
+# fixed size anyway, so they get the page rendered at the highest DPI that fits.
+GRAYSCALE_ENGINES = ("tesseract", "cascade", "mistral")
+TILED_ENGINES = ("tesseract",)
+# Must exceed the tallest text line so every line is whole in some tile
+TILE_OVERLAP_INCHES = 0.5
+# Images without a DPI tag are assumed to be scans at this resolution
+DEFAULT_IMAGE_DPI = 300
+# Reduced decoding never takes Tesseract input below this resolution; the rest is tiled
+MIN_TESSERACT_DPI = 300
+# Preview resolution; images are assumed to be 300 dpi scans
+PREVIEW_DPI = 72
+
+
+def extract(
+    file_path: str,
+    engine: str = "tesseract",
+    dpi: Optional[int] = None,
+    pages: Optional[Sequence[int]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    doc_hash: Optional[str] = None,
+) -> str:
     """
-    Extract text from a PDF or image using Tesseract, Nougat, or Mistral.
+    Extract text from a PDF or image using Tesseract, Nougat, Mistral, or the cascade.
 
     Args:
         file_path (str): Path to a PDF or image file.
-        engine (str): OCR engine to use ('tesseract' or 'nougat').
+        engine (str): OCR engine to use ('tesseract', 'nougat', 'mistral' or 'cascade').
+        dpi (int, optional): Resolution used to rasterize PDF pages (default: OCR_DPI).
+        pages (Sequence[int], optional): 0-based PDF page or TIFF frame indices to process (default: all).
+        progress (Callable, optional): Called as progress(done, total) after each page.
+        doc_hash (str, optional): SHA-256 of the file, if known (keys the page cache).
 
     Returns:
         str: Extracted text from the file.
     """
-    extracted_text = []
+    results = extract_pages(file_path, engine=engine, dpi=dpi, pages=pages, progress=progress, doc_hash=doc_hash)
+    return "\n\n".join(result["text"] for result in results)
+
+
+def extract_bytes(data: bytes, filename: str, engine: str = "tesseract", dpi: Optional[int] = None) -> str:
+    """
+    Same as extract() for document content held in memory.
 
+    Args:
+        data (bytes): PDF or image content.
+        filename (str): Original file name; its extension selects PDF or image handling.
+        engine (str): OCR engine.
+        dpi (int, optional): Resolution used to rasterize PDF pages (default: OCR_DPI).
+
+    Returns:
+        str: Extracted text.
+    """
+    suffix = os.path.splitext(filename)[-1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+    logger.info(f"📄 File saved temporarily at: {tmp.name}")
     try:
-        ext = os.path.splitext(file_path)[1].lower()
-
-        if engine == "mistral":
-            if ext == ".pdf":
-                doc = fitz.open(file_path)
-                mistral_texts = []
-                for i in range(doc.page_count):
-                    page = doc.load_page(i)
-                    try:
-                        pix = page.get_pixmap(dpi=300)  # type: ignore
-                    except AttributeError:
-                        pix = page.getPixmap(dpi=300)  # type: ignore
-                    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_img:
-                        tmp_img_path = tmp_img.name
-                    pix.save(tmp_img_path)
-                    try:
-                        text = mistral_ocr(tmp_img_path)
-                        mistral_texts.append(text)
-                    finally:
-                        if os.path.exists(tmp_img_path):
-                            os.unlink(tmp_img_path)
-                doc.close()
-                return "\n\n".join(mistral_texts)
-            else:
-                return mistral_ocr(file_path)
+        return extract(tmp.name, engine=engine, dpi=dpi, doc_hash=hashlib.sha256(data).hexdigest())
+    finally:
+        os.remove(tmp.name)
+        logger.info("🧹 Temporary file removed")
 
-        if ext == ".pdf":
-            doc = fitz.open(file_path)
-            for i in range(doc.page_count):
-                page = doc.load_page(i)
-                try:
-                    pix = page.get_pixmap(dpi=300)  # type: ignore
-                except AttributeError:
-                    pix = page.getPixmap(dpi=300)  # type: ignore
-                # Create and close the temp file before saving and OCR
-                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_img:
-                    tmp_img_path = tmp_img.name
-                pix.save(tmp_img_path)
-                try:
-                    text = run_ocr(tmp_img_path, engine)
-                    extracted_text.append(text)
-                finally:
-                    if os.path.exists(tmp_img_path):
-                        os.unlink(tmp_img_path)
-            doc.close()
 
-        elif ext in [".png", ".jpg", ".jpeg", ".bmp", ".tiff"]:
-            text = run_ocr(file_path, engine)
-            extracted_text.append(text)
+def extract_pages(
+    file_path: str,
+    engine: str = "tesseract",
+    dpi: Optional[int] = None,
+    pages: Optional[Sequence[int]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    doc_hash: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Extract text page by page, reporting which engine produced each page.
+
+    Args:
+        file_path (str): Path to a PDF or image file.
+        engine (str): OCR engine to use ('tesseract', 'nougat', 'mistral' or 'cascade').
+        dpi (int, optional): Resolution used to rasterize PDF pages (default: OCR_DPI).
+        pages (Sequence[int], optional): 0-based PDF page or TIFF frame indices to process (default: all).
+        progress (Callable, optional): Called as progress(done, total) after each page.
+        doc_hash (str, optional): SHA-256 of the file, if known; computed when the
+            page cache (PDFs) or duplicate page detection is enabled.
 
-        else:
-            raise ValueError("❌ Unsupported file format. Only PDF and image files are allowed.")
+    Returns:
+        List[Dict]: One entry per page with ``page``, ``text`` and ``engine``;
+        cascade pages also carry ``confidence`` and ``regions_rerun``, blank
+        pages ``skipped`` and pages identical to an earlier one ``reused_from``.
+    """
+    try:
+        dpi = dpi or performance_config().ocr_dpi
+        if doc_hash is None and (
+            (file_path.lower().endswith(".pdf") and get_page_cache() is not None) or get_recent_pages() is not None
+        ):
+            doc_hash = file_sha256(file_path)
+
+        queue = get_queue()
+        if queue is not None:
+            return _extract_distributed(queue, file_path, engine, dpi, pages, progress, doc_hash)
 
-        return "\n\n".join(extracted_text)
+        scheduler = get_scheduler()
+        if scheduler is not None:
+            return _extract_scheduled(scheduler, file_path, engine, dpi, pages, progress, doc_hash)
+
+        results = []
+        for done, total, result in iter_page_results(file_path, engine=engine, dpi=dpi, pages=pages, doc_hash=doc_hash):
+            results.append(result)
+            if progress:
+                progress(done, total)
+        return results
 
     except Exception as e:
         logger.error(f"Error in extract(): {e}")
         raise RuntimeError(f"❌ Failed to extract text: {str(e)}")
 
 
+def _ocr_timed(run: Callable[[], Dict], engine: str, page_index: int) -> Dict:
+    start = time.perf_counter()
+    result = run()
+    metrics.observe(f"ocr_page_seconds.{engine}", time.perf_counter() - start)
+    metrics.increment("pages_processed")
+    result["page"] = page_index
+    return result
+
+
+def _ocr_page_at(file_path: str, page_index: int, engine: str, dpi: int, doc_hash: Optional[str] = None) -> Dict:
+    """Rasterize and OCR a single page; runs as one scheduler task."""
+    for _, _, result in iter_page_results(file_path, engine=engine, dpi=dpi, pages=[page_index], doc_hash=doc_hash):
+        return result
+    raise ValueError(f"❌ Page {page_index} not found")
+
+
+def iter_page_results(
+    file_path: str,
+    engine: str = "tesseract",
+    dpi: int = 300,
+    pages: Optional[Sequence[int]] = None,
+    doc_hash: Optional[str] = None,
+) -> Iterator[Tuple[int, int, Dict]]:
+    """
+    OCR a PDF or image one page at a time, rasterizing each page for its engine.
+
+    Multi-frame images (fax TIFFs) are read frame by frame like PDF pages.
+    Blank pages and pages identical to a recent one are not OCRed again (see
+    ocr_unless_redundant()).
+
+    Args:
+        file_path (str): Path to a PDF or image file.
+        engine (str): OCR engine.
+        dpi (int): Resolution used to rasterize PDF pages.
+        pages (Sequence[int], optional): 0-based PDF page or TIFF frame indices (default: all).
+        doc_hash (str, optional): SHA-256 of the file; enables the page cache and
+            is reported when a later page reuses this document's OCR.
+
+    Yields:
+        tuple: (done, total, page result) with ``done`` counting from 1.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == ".pdf":
+        doc = fitz.open(file_path)
+        try:
+            indices = page_indices(doc.page_count, pages)
+            for done, i in enumerate(indices, 1):
+                page = doc.load_page(i)
+                run = partial(ocr_pdf_page, page, engine, dpi, doc_hash=doc_hash)
+                check = partial(ocr_unless_redundant, partial(pdf_thumbnail, page), engine, run, doc_hash, i, dpi)
+                yield done, len(indices), _ocr_timed(check, engine, i)
+        finally:
+            doc.close()
+
+    elif ext in IMAGE_EXTENSIONS:
+        # Multi-page TIFFs: each frame is decoded only when it is reached
+        with Image.open(file_path) as img:
+            indices = page_indices(getattr(img, "n_frames", 1), pages)
+            for done, i in enumerate(indices, 1):
+                img.seek(i)
+                run = partial(ocr_image_frame, img, engine)
+                check = partial(ocr_unless_redundant, partial(frame_thumbnail, img), engine, run, doc_hash, i)
+                yield done, len(indices), _ocr_timed(check, engine, i)
+
+    else:
+        raise ValueError("❌ Unsupported file format. Only PDF and image files are allowed.")
+
+
+def get_pixel_budget() -> int:
+    """Largest pixmap, in pixels, rendered at once (RASTER_PIXEL_BUDGET setting)."""
+    return performance_config().raster_pixel_budget
+
+
+def page_pixels(page: "fitz.Page", dpi: int) -> int:
+    """Pixel count of a page rendered at ``dpi``."""
+    scale = dpi / 72
+    return round(page.rect.width * scale) * round(page.rect.height * scale)
+
+
+def render_page(page: "fitz.Page", dpi: int, grayscale: bool = False, clip: Optional["fitz.Rect"] = None) -> Image.Image:
+    """
+    Rasterize a PDF page, or the ``clip`` rectangle of it.
+
+    Args:
+        page (fitz.Page): Page to render.
+        dpi (int): Resolution.
+        grayscale (bool): Render a single-channel ('L') image instead of RGB.
+        clip (fitz.Rect, optional): Region in PDF points (default: whole page).
+
+    Returns:
+        Image.Image: Rendered image.
+    """
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    try:
+        pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, clip=clip)  # type: ignore
+    except AttributeError:
+        pix = page.getPixmap(dpi=dpi, colorspace=colorspace, clip=clip)  # type: ignore
+    return Image.frombytes("L" if grayscale else "RGB", (pix.width, pix.height), pix.samples)
+
+
+def render_page_cached(page: "fitz.Page", dpi: int, grayscale: bool = False, doc_hash: Optional[str] = None) -> Image.Image:
+    """
+    render_page() for a whole page through the shared page cache.
+
+    Args:
+        page (fitz.Page): Page to render.
+        dpi (int): Resolution.
+        grayscale (bool): Single-channel ('L') instead of RGB.
+        doc_hash (str, optional): SHA-256 of the document; without it the page is rendered uncached.
+
+    Returns:
+        Image.Image: Rendered image.
+    """
+    cache = get_page_cache()
+    if cache is None or doc_hash is None:
+        return render_page(page, dpi, grayscale)
+    image = cache.get(doc_hash, page.number, dpi, "L" if grayscale else "RGB")
+    if image is None:
+        image = render_page(page, dpi, grayscale)
+        cache.put(doc_hash, page.number, dpi, image)
+    return image
+
+
+def pdf_thumbnail(page: "fitz.Page") -> Image.Image:
+    """Grayscale render with its long side about THUMBNAIL_SIZE pixels, for page fingerprints."""
+    dpi = max(1, int(THUMBNAIL_SIZE * 72 / max(page.rect.width, page.rect.height)))
+    return render_page(page, dpi, grayscale=True)
+
+
+def frame_thumbnail(image: Image.Image) -> Image.Image:
+    """
+    Small grayscale copy of the current frame, for page fingerprints.
+
+    JPEGs are reopened and decoded at reduced scale so the frame itself can
+    still be draft-decoded for OCR; other formats decode the frame here and
+    ocr_image_frame() reuses the pixels.
+    """
+    if image.format == "JPEG" and getattr(image, "filename", None):
+        with Image.open(image.filename) as copy:
+            scale = THUMBNAIL_SIZE / max(copy.size)
+            copy.draft("L", (max(1, int(copy.width * scale)), max(1, int(copy.height * scale))))
+            return thumbnail(copy)
+    return thumbnail(image)
+
+
+def ocr_pdf_page(
+    page: "fitz.Page",
+    engine: str,
+    dpi: int = 300,
+    pixel_budget: Optional[int] = None,
+    doc_hash: Optional[str] = None,
+) -> Dict:
+    """
+    Rasterize and OCR one PDF page within a pixel budget.
+
+    Pages that fit the budget are rendered whole. Larger pages are tiled for
+    Tesseract, or rendered at the highest DPI within the budget for the other
+    engines.
+
+    Args:
+        page (fitz.Page): Page to recognize.
+        engine (str): OCR engine.
+        dpi (int): Requested resolution.
+        pixel_budget (int, optional): Pixel budget (default: RASTER_PIXEL_BUDGET).
+        doc_hash (str, optional): SHA-256 of the document; whole-page renders
+            are then shared through the page cache (tiles are not cached).
+
+    Returns:
+        Dict: ``text`` and ``engine`` (plus cascade details, or ``tiles`` for tiled pages).
+    """
+    budget = pixel_budget or get_pixel_budget()
+    grayscale = engine in GRAYSCALE_ENGINES
+    pixels = page_pixels(page, dpi)
+    if pixels <= budget:
+        return ocr_page(render_page_cached(page, dpi, grayscale, doc_hash), engine)
+
+    if engine in TILED_ENGINES:
+        return tiled_tesseract(page, dpi, budget)
+
+    fitted = max(1, int(dpi * math.sqrt(budget / pixels)))
+    logger.info(f"Page {page.number + 1}: rendering at {fitted} dpi to stay within {budget} pixels")
+    return ocr_page(render_page_cached(page, fitted, grayscale, doc_hash), engine)
+
+
+def plan_tiles(width: int, height: int, budget: int, overlap: int) -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+    """
+    Split a page into tiles of at most ``budget`` pixels.
+
+    Every tile has a core region; the cores partition the page, and each tile
+    extends its core by ``overlap`` pixels on every side. Full-width bands are
+    preferred so text lines are never cut horizontally; a grid is used only
+    when the page is too wide for a band.
+
+    Args:
+        width (int): Page width in pixels.
+        height (int): Page height in pixels.
+        budget (int): Maximum pixels per tile.
+        overlap (int): Margin around each core, in pixels.
+
+    Returns:
+        List[tuple]: (core box, tile box) pairs as (left, top, right, bottom), in reading order.
+    """
+    band = budget // width - 2 * overlap
+    if band >= 2 * overlap:
+        core_width, core_height = width, band
+    else:
+        side = max(overlap, int(math.sqrt(budget)) - 2 * overlap)
+        core_width = core_height = side
+
+    tiles = []
+    for top in range(0, height, core_height):
+        for left in range(0, width, core_width):
+            core = (left, top, min(left + core_width, width), min(top + core_height, height))
+            box = (max(0, core[0] - overlap), max(0, core[1] - overlap), min(width, core[2] + overlap), min(height, core[3] + overlap))
+            tiles.append((core, box))
+    return tiles
+
+
+def tiled_tesseract(page: "fitz.Page", dpi: int, budget: int) -> Dict:
+    """
+    OCR a large page tile by tile with Tesseract, holding one tile in memory at a time.
+
+    Each tile is rendered in grayscale through a clip rectangle. Only words
+    whose centre falls in the tile's core are kept, so text in the overlaps is
+    not duplicated, and the lines are stitched back together in page coordinates.
+
+    Args:
+        page (fitz.Page): Page to recognize.
+        dpi (int): Resolution.
+        budget (int): Maximum pixels per tile.
+
+    Returns:
+        Dict: ``text``, ``engine`` and ``tiles`` (number of tiles rendered).
+    """
+    scale = dpi / 72
+    rect = page.rect
+    width, height = round(rect.width * scale), round(rect.height * scale)
+    logger.info(f"Page {page.number + 1}: {width}x{height} px exceeds {budget} pixels, OCR in tiles")
+
+    def render_tile(box: Tuple[int, int, int, int]) -> Image.Image:
+        clip = fitz.Rect(
+            rect.x0 + box[0] / scale, rect.y0 + box[1] / scale,
+            rect.x0 + box[2] / scale, rect.y0 + box[3] / scale,
+        )
+        return render_page(page, dpi, grayscale=True, clip=clip)
+
+    return _ocr_tiles(width, height, budget, int(TILE_OVERLAP_INCHES * dpi), render_tile)
+
+
+def _ocr_tiles(
+    width: int,
+    height: int,
+    budget: int,
+    overlap: int,
+    tile_at: Callable[[Tuple[int, int, int, int]], Image.Image],
+) -> Dict:
+    """Tesseract over plan_tiles() tiles produced one at a time by ``tile_at(box)``, stitched into page text."""
+    tiles = plan_tiles(width, height, budget, overlap)
+    lines = []
+    for core, box in tiles:
+        for line in tesseract_lines(tile_at(box), offset=(box[0], box[1]), region=core):
+            line["row"], line["col"] = core[1], core[0]
+            lines.append(line)
+
+    metrics.increment("tiled_pages")
+    return {"text": stitch_lines(lines), "engine": "tesseract", "tiles": len(tiles)}
+
+
+def image_dpi(image: Image.Image) -> int:
+    """Horizontal resolution from the image's DPI tag, or DEFAULT_IMAGE_DPI."""
+    try:
+        return int(image.info.get("dpi", (0,))[0]) or DEFAULT_IMAGE_DPI
+    except (TypeError, ValueError, IndexError):
+        return DEFAULT_IMAGE_DPI
+
+
+def ocr_image_frame(image: Image.Image, engine: str, pixel_budget: Optional[int] = None) -> Dict:
+    """
+    OCR the current frame of an opened (not yet decoded) image within a pixel budget.
+
+    Frames that fit the budget are decoded directly into the engine's mode.
+    Larger ones are decoded in reduced form where the format allows it (JPEG
+    decodes at 1/2, 1/4 or 1/8 scale), then tiled for Tesseract or
+    downscaled for the other engines, mirroring ocr_pdf_page().
+
+    Args:
+        image (Image.Image): Image positioned on the frame to read (see Image.seek()).
+        engine (str): OCR engine.
+        pixel_budget (int, optional): Pixel budget (default: RASTER_PIXEL_BUDGET).
+
+    Returns:
+        Dict: ``text`` and ``engine`` (plus cascade details, or ``tiles`` for tiled frames).
+    """
+    budget = pixel_budget or get_pixel_budget()
+    mode = "L" if engine in GRAYSCALE_ENGINES else "RGB"
+    width, height = image.size
+    if width * height <= budget:
+        return ocr_page(image.convert(mode), engine)
+
+    dpi = image_dpi(image)
+    scale = math.sqrt(budget / (width * height))
+    if engine in TILED_ENGINES:
+        scale = max(scale, min(1.0, MIN_TESSERACT_DPI / dpi))
+    # No-op for formats without reduced decoding
+    image.draft(mode, (max(1, int(width * scale)), max(1, int(height * scale))))
+    frame = image if image.mode == mode else image.convert(mode)
+    frame.load()
+    dpi = dpi * frame.width // width
+    if frame.width * frame.height <= budget:
+        logger.info(f"Image {width}x{height}: decoded at {frame.width}x{frame.height}")
+        return ocr_page(frame, engine)
+
+    if engine in TILED_ENGINES:
+        logger.info(f"Image {frame.width}x{frame.height} exceeds {budget} pixels, OCR in tiles")
+        return _ocr_tiles(frame.width, frame.height, budget, int(TILE_OVERLAP_INCHES * dpi), frame.crop)
+
+    fitted = math.sqrt(budget / (frame.width * frame.height))
+    size = (max(1, int(frame.width * fitted)), max(1, int(frame.height * fitted)))
+    logger.info(f"Image {frame.width}x{frame.height}: resized to {size[0]}x{size[1]} to stay within {budget} pixels")
+    return ocr_page(frame.resize(size, Image.LANCZOS), engine)
+
+
+def stitch_lines(lines: List[Dict]) -> str:
+    """
+    Reassemble tile lines (boxes in page coordinates) into page text.
+
+    Within a band, Tesseract's own reading order is kept. Where a row of tiles
+    cut lines horizontally, fragments from neighbouring tiles that share a
+    vertical span are joined left to right. A blank line separates lines with
+    a vertical gap larger than a line height.
+    """
+    ordered: List[Tuple[Tuple[int, int, int, int], str]] = []
+    for row in sorted({line["row"] for line in lines}):
+        row_lines = [line for line in lines if line["row"] == row]
+        if len({line["col"] for line in row_lines}) == 1:
+            ordered.extend((line["box"], line["text"]) for line in row_lines)
+            continue
+
+        merged: List[Dict] = []
+        for line in sorted(row_lines, key=lambda l: (l["box"][1] + l["box"][3]) / 2):
+            left, top, right, bottom = line["box"]
+            centre = (top + bottom) / 2
+            for visual in merged:
+                if visual["top"] <= centre <= visual["bottom"] and line["col"] not in visual["cols"]:
+                    visual["parts"].append(line)
+                    visual["cols"].add(line["col"])
+                    visual["top"], visual["bottom"] = min(visual["top"], top), max(visual["bottom"], bottom)
+                    break
+            else:
+                merged.append({"parts": [line], "cols": {line["col"]}, "top": top, "bottom": bottom})
+
+        for visual in sorted(merged, key=lambda v: v["top"]):
+            parts = sorted(visual["parts"], key=lambda l: l["box"][0])
+            box = (parts[0]["box"][0], visual["top"], parts[-1]["box"][2], visual["bottom"])
+            ordered.append((box, " ".join(part["text"] for part in parts)))
+
+    text = []
+    for i, (box, line_text) in enumerate(ordered):
+        if i:
+            previous = ordered[i - 1][0]
+            text.append("\n\n" if box[1] - previous[3] > previous[3] - previous[1] else "\n")
+        text.append(line_text)
+    return "".join(text)
+
+
+def _extract_scheduled(
+    scheduler: PageScheduler,
+    file_path: str,
+    engine: str,
+    dpi: int,
+    pages: Optional[Sequence[int]],
+    progress: Optional[Callable[[int, int], None]],
+    doc_hash: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Submit every page as its own task so pages of different requests interleave.
+
+    Short documents run in the interactive class and long ones in the bulk
+    class; results are collected in page order.
+    """
+    indices = document_page_indices(file_path, pages)
+    priority = classify(len(indices))
+    start = time.perf_counter()
+    futures = [scheduler.submit(partial(_ocr_page_at, file_path, i, engine, dpi, doc_hash), priority) for i in indices]
+    try:
+        results = []
+        for done, future in enumerate(futures, 1):
+            results.append(future.result())
+            if progress:
+                progress(done, len(futures))
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    metrics.observe(f"request_seconds.{priority}", time.perf_counter() - start)
+    return results
+
+
+def _extract_distributed(
+    queue: TaskQueue,
+    file_path: str,
+    engine: str,
+    dpi: int,
+    pages: Optional[Sequence[int]],
+    progress: Optional[Callable[[int, int], None]],
+    doc_hash: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Coordinator side of multi-node extraction: enqueue one task per page,
+    wait while worker nodes (python -m ocr_tools.worker) process them in
+    parallel, and return the results in page order.
+    """
+    indices = document_page_indices(file_path, pages)
+    priority = classify(len(indices))
+    with open(file_path, "rb") as f:
+        document = f.read()
+    sha256 = doc_hash or hashlib.sha256(document).hexdigest()
+    timeout = float(get_setting("WORK_QUEUE_TIMEOUT", 600))
+
+    start = time.perf_counter()
+    job_id = queue.submit(sha256, os.path.basename(file_path), document, engine, dpi, indices, priority)
+    try:
+        # Poll status counts only; page results are read once, when all are done
+        delay, reported, total = 0.05, 0, len(indices)
+        while True:
+            counts = queue.progress(job_id)
+            if counts.get("failed"):
+                failed = next(task for task in queue.results(job_id) if task["status"] == "failed")
+                raise RuntimeError(f"❌ Page {failed['page']} failed on a worker: {failed['error']}")
+            done = counts.get("done", 0)
+            if progress and done > reported:
+                progress(done, total)
+                reported = done
+            if done == total:
+                break
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"❌ {total - done} of {total} pages not processed within {timeout:g}s")
+            time.sleep(delay)
+            delay = min(0.5, delay * 1.5)
+        tasks = queue.results(job_id)
+    finally:
+        queue.finish(job_id)
+    metrics.observe(f"request_seconds.{priority}", time.perf_counter() - start)
+    return [task["result"] for task in tasks]
+
+
+def document_page_indices(file_path: str, pages: Optional[Sequence[int]] = None) -> List[int]:
+    """
+    Page indices extract_pages() will process for a file.
+
+    Args:
+        file_path (str): Path to a PDF or image file.
+        pages (Sequence[int], optional): 0-based PDF page or TIFF frame indices (default: all).
+
+    Returns:
+        List[int]: Valid page (or image frame) indices.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        with fitz.open(file_path) as doc:
+            return page_indices(doc.page_count, pages)
+    if ext in IMAGE_EXTENSIONS:
+        # Counting TIFF frames reads only the directory chain, not the pixels
+        with Image.open(file_path) as img:
+            return page_indices(getattr(img, "n_frames", 1), pages)
+    raise ValueError("❌ Unsupported file format. Only PDF and image files are allowed.")
+
+
+def iter_page_images(
+    file_path: str,
+    dpi: int = 300,
+    pages: Optional[Sequence[int]] = None,
+) -> Iterator[Tuple[int, int, int, Image.Image]]:
+    """
+    Yield the pages of a PDF or image as RGB images, one at a time.
+
+    Args:
+        file_path (str): Path to a PDF or image file.
+        dpi (int): Resolution used to rasterize PDF pages.
+        pages (Sequence[int], optional): 0-based PDF page or TIFF frame indices (default: all).
+
+    Yields:
+        tuple: (done, total, page_index, image) with ``done`` counting from 1.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == ".pdf":
+        doc = fitz.open(file_path)
+        try:
+            indices = page_indices(doc.page_count, pages)
+            for done, i in enumerate(indices, 1):
+                yield done, len(indices), i, render_page(doc.load_page(i), dpi)
+        finally:
+            doc.close()
+
+    elif ext in IMAGE_EXTENSIONS:
+        with Image.open(file_path) as img:
+            indices = page_indices(getattr(img, "n_frames", 1), pages)
+            for done, i in enumerate(indices, 1):
+                img.seek(i)
+                yield done, len(indices), i, img.convert("RGB")
+
+    else:
+        raise ValueError("❌ Unsupported file format. Only PDF and image files are allowed.")
+
+
+def render_preview(data: bytes, filename: str, page_index: int = 0, dpi: int = PREVIEW_DPI) -> bytes:
+    """
+    PNG preview of one page of a document held in memory.
+
+    PDF pages come from the page cache when the page was already rendered at
+    this or a higher resolution (e.g. for OCR); otherwise the page is rendered
+    and cached. Images are thumbnailed to the same scale.
+
+    Args:
+        data (bytes): PDF or image content.
+        filename (str): Original file name; its extension selects PDF or image handling.
+        page_index (int): 0-based page index.
+        dpi (int): Preview resolution, clamped to 18-300.
+
+    Returns:
+        bytes: PNG data.
+    """
+    dpi = max(18, min(300, dpi))
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".pdf":
+        doc_hash = hashlib.sha256(data).hexdigest()
+        cache = get_page_cache()
+        image = cache.get_at_most(doc_hash, page_index, dpi, "RGB") if cache is not None else None
+        if image is None:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                if not 0 <= page_index < doc.page_count:
+                    raise ValueError(f"❌ Page {page_index} not found")
+                image = render_page_cached(doc.load_page(page_index), dpi, doc_hash=doc_hash)
+    elif ext in IMAGE_EXTENSIONS:
+        image = Image.open(io.BytesIO(data))
+        if not 0 <= page_index < getattr(image, "n_frames", 1):
+            raise ValueError(f"❌ Page {page_index} not found")
+        image.seek(page_index)
+        size = (max(1, image.width * dpi // 300), max(1, image.height * dpi // 300))
+        image.draft("RGB", size)  # lets JPEG decode at reduced scale
+        image.thumbnail(size)
+        image = image.convert("RGB")
+    else:
+        raise ValueError("❌ Unsupported file format. Only PDF and image files are allowed.")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def page_indices(page_count: int, pages: Optional[Sequence[int]] = None) -> List[int]:
+    """
+    Resolve requested page indices against a document's page count.
+
+    Args:
+        page_count (int): Number of pages in the document.
+        pages (Sequence[int], optional): 0-based indices; None selects every page.
+
+    Returns:
+        List[int]: Valid indices in the requested order.
+    """
+    if pages is None:
+        return list(range(page_count))
+    return [i for i in pages if 0 <= i < page_count]
+
+
+def ocr_page(image: Image.Image, engine: str) -> Dict:
+    """
+    OCR one page image and describe how it was produced.
+
+    Args:
+        image (Image.Image): Page image.
+        engine (str): OCR engine ('tesseract', 'nougat', 'mistral' or 'cascade').
+
+    Returns:
+        Dict: ``text`` and ``engine`` (plus cascade details).
+    """
+    if engine == "cascade":
+        return cascade_ocr(image)
+    return {"text": ocr_image(image, engine), "engine": engine}
+
+
+@lru_cache(maxsize=1)
+def get_nougat() -> NougatOCR:
+    """Load the Nougat model once per process."""
+    return NougatOCR()
+
+
+def ocr_image(image: Image.Image, engine: str) -> str:
+    """
+    Apply a single OCR engine to an image.
+
+    Args:
+        image (Image.Image): Image to recognize.
+        engine (str): OCR engine.
+
+    Returns:
+        str: Recognized text.
+    """
+    try:
+        if engine == "nougat":
+            return get_nougat().extract_image(image)
+        elif engine == "mistral":
+            return mistral_ocr_image(image)
+        else:
+            return pytesseract.image_to_string(image)
+    except Exception as e:
+        logger.error(f"OCR failed with {engine}: {e}")
+        return f"[OCR Error: {e}]"
+
+
 def run_ocr(image_path: str, engine: str) -> str:
     """
     Apply OCR engine to a single image.
@@ -98,11 +775,126 @@ def run_ocr(image_path: str, engine: str) -> str:
         str: Recognized text.
     """
     try:
-        if engine == "nougat":
-            return NougatOCR().extract(image_path)
-        else:
-            with Image.open(image_path).convert("RGB") as img:
-                return pytesseract.image_to_string(img)
+        with Image.open(image_path) as img:
+            return ocr_image(img.convert("RGB"), engine)
     except Exception as e:
         logger.error(f"OCR failed with {engine}: {e}")
         return f"[OCR Error: {e}]"
+
+
+def tesseract_lines(
+    image: Image.Image,
+    offset: Tuple[int, int] = (0, 0),
+    region: Optional[Tuple[int, int, int, int]] = None,
+) -> List[Dict]:
+    """
+    Run Tesseract and group its words into lines with bounding boxes and confidences.
+
+    Args:
+        image (Image.Image): Page image, or a tile of one.
+        offset (tuple): Position of the image on the page, added to every box.
+        region (tuple, optional): Keep only words whose centre lies in this
+            (left, top, right, bottom) page region.
+
+    Returns:
+        List[Dict]: Lines in reading order with ``block``, ``text``,
+        ``confidence``, ``chars`` and ``box`` (left, top, right, bottom).
+    """
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], Dict] = {}
+
+    for i, word in enumerate(data["text"]):
+        confidence = float(data["conf"][i])
+        if confidence < 0 or not word.strip():
+            continue  # layout rows and empty detections
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        left, top = data["left"][i] + offset[0], data["top"][i] + offset[1]
+        right, bottom = left + data["width"][i], top + data["height"][i]
+        if region is not None:
+            x, y = (left + right) / 2, (top + bottom) / 2
+            if not (region[0] <= x < region[2] and region[1] <= y < region[3]):
+                continue  # belongs to a neighbouring tile
+        line = lines.setdefault(key, {"words": [], "weighted": 0.0, "chars": 0, "box": [left, top, right, bottom]})
+        line["words"].append(word)
+        line["weighted"] += confidence * len(word)
+        line["chars"] += len(word)
+        box = line["box"]
+        box[0], box[1] = min(box[0], left), min(box[1], top)
+        box[2], box[3] = max(box[2], right), max(box[3], bottom)
+
+    return [
+        {
+            "block": key[0],
+            "text": " ".join(line["words"]),
+            "confidence": line["weighted"] / line["chars"],
+            "chars": line["chars"],
+            "box": tuple(line["box"]),
+        }
+        for key, line in sorted(lines.items())
+    ]
+
+
+def _join_lines(lines: List[Dict], texts: List[str]) -> str:
+    """Join line texts, separating Tesseract blocks with a blank line."""
+    parts = []
+    for i, text in enumerate(texts):
+        if i and lines[i]["block"] != lines[i - 1]["block"]:
+            parts.append("")
+        parts.append(text)
+    return "\n".join(parts)
+
+
+def cascade_ocr(
+    image: Image.Image,
+    threshold: Optional[float] = None,
+    fallback_engine: Optional[str] = None,
+) -> Dict:
+    """
+    Tesseract first; re-run only low-confidence text with a heavier engine.
+
+    Lines whose mean word confidence is below the threshold are cropped and
+    re-recognized by line-level engines (TrOCR), however many there are: such
+    a model reads one line, so a whole page would collapse to a single
+    string. Page-level engines re-run the whole page instead.
+
+    Args:
+        image (Image.Image): Page image.
+        threshold (float, optional): Tesseract confidence (0-100) below which text
+            is re-run (default: CASCADE_CONFIDENCE_THRESHOLD setting).
+        fallback_engine (str, optional): Heavier engine for low-confidence text
+            (default: CASCADE_FALLBACK_ENGINE setting).
+
+    Returns:
+        Dict: ``text``, ``engine`` (the engine(s) that produced the page),
+        ``confidence`` (Tesseract's character-weighted mean) and ``regions_rerun``.
+    """
+    if threshold is None:
+        threshold = float(get_setting("CASCADE_CONFIDENCE_THRESHOLD", DEFAULT_CASCADE_THRESHOLD))
+    fallback_engine = fallback_engine or get_setting("CASCADE_FALLBACK_ENGINE", DEFAULT_CASCADE_FALLBACK)
+    lines = tesseract_lines(image)
+    total_chars = sum(line["chars"] for line in lines)
+    confidence = sum(line["confidence"] * line["chars"] for line in lines) / total_chars if total_chars else 0.0
+    low = [i for i, line in enumerate(lines) if line["confidence"] < threshold]
+
+    if not lines or not low:
+        text = _join_lines(lines, [line["text"] for line in lines])
+        return {"text": text, "engine": "tesseract", "confidence": confidence, "regions_rerun": 0}
+
+    if fallback_engine not in LINE_LEVEL_ENGINES:
+        logger.info(f"Cascade: page confidence {confidence:.0f}, re-running page with {fallback_engine}")
+        return {"text": ocr_image(image, fallback_engine), "engine": fallback_engine, "confidence": confidence, "regions_rerun": 1}
+
+    logger.info(f"Cascade: re-running {len(low)}/{len(lines)} low-confidence lines with {fallback_engine}")
+    texts = [line["text"] for line in lines]
+    for i in low:
+        left, top, right, bottom = lines[i]["box"]
+        pad = max(2, (bottom - top) // 4)
+        crop = image.crop((max(0, left - pad), max(0, top - pad), min(image.width, right + pad), min(image.height, bottom + pad)))
+        texts[i] = ocr_image(crop, fallback_engine)
+
+    return {
+        "text": _join_lines(lines, texts),
+        "engine": f"tesseract+{fallback_engine}",
+        "confidence": confidence,
+        "regions_rerun": len(low),
+    }
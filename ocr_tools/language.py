@@ -0,0 +1,151 @@
+# ocr_tools/language.py
+
+import re
+import logging
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Language code -> names accepted as a target language
+LANGUAGE_NAMES: Dict[str, Tuple[str, ...]] = {
+    "en": ("english",),
+    "fr": ("french", "français", "francais"),
+    "es": ("spanish", "español", "espanol", "castilian"),
+    "de": ("german", "deutsch"),
+    "it": ("italian", "italiano"),
+    "pt": ("portuguese", "português", "portugues"),
+    "nl": ("dutch", "nederlands", "flemish"),
+    "zh": ("chinese", "mandarin", "中文", "simplified chinese", "traditional chinese"),
+    "ja": ("japanese", "日本語"),
+    "ko": ("korean", "한국어"),
+    "ru": ("russian", "русский"),
+    "uk": ("ukrainian", "українська"),
+    "bg": ("bulgarian", "български"),
+    "sr": ("serbian", "српски", "srpski"),
+    "ar": ("arabic", "العربية"),
+    "fa": ("persian", "farsi", "فارسی"),
+    "ur": ("urdu", "اردو"),
+    "hi": ("hindi", "हिन्दी"),
+    "mr": ("marathi", "मराठी"),
+    "ne": ("nepali", "नेपाली"),
+    "el": ("greek", "ελληνικά"),
+    "he": ("hebrew", "עברית"),
+    "th": ("thai", "ไทย"),
+}
+_BY_NAME = {name: code for code, names in LANGUAGE_NAMES.items() for name in names}
+
+# Frequent function words of the languages that share a script (distinctive ones only)
+_STOPWORDS: Dict[str, frozenset] = {
+    "en": frozenset("the and of to is in that it for was on are with as this be by have not from at which were".split()),
+    "fr": frozenset("le la les et des est une du en que qui dans pour pas sur au avec ce il sont par aux cette".split()),
+    "es": frozenset("el la los las y de que en es un una por con para del se no al lo como más su".split()),
+    "de": frozenset("der die und das ist nicht ein eine zu den mit von sich des auf für im dem auch es wird".split()),
+    "it": frozenset("il di che la è e per un una del della le non sono con gli nel al si da alla".split()),
+    "pt": frozenset("o a os as e de que em um uma do da para com não por se dos das no na ao".split()),
+    "nl": frozenset("de het een en van is dat op te in niet met voor zijn aan er ook als bij".split()),
+    "ru": frozenset("что это как он она его только был была было быть который которые также уже если когда этот эта".split()),
+    "uk": frozenset("що це як він вона його тільки був була було бути який які також вже якщо коли цей ця і є або від".split()),
+    "bg": frozenset("е да се че това са като които който най към тя той също тези ще бъде беше".split()),
+    "sr": frozenset("је су који која што није али као био била ће ово од са".split()),
+    "ar": frozenset("في من على إلى أن التي الذي هذا عن هذه كان ذلك كانت لم قد بعد عند".split()),
+    "fa": frozenset("و در به از که این را با است برای آن می یک شد ها هم تا بود".split()),
+    "ur": frozenset("کے کی ہے اور میں کا سے کو نے یہ پر ہیں تھا بھی کہ ایک".split()),
+    "hi": frozenset("है और के की में से को का कि यह पर ने भी हैं था एक लिए".split()),
+    "mr": frozenset("आहे आणि या व हे ला त्या तो ते होते आहेत करून".split()),
+    "ne": frozenset("छ र मा हो यो पनि गर्न भएको छन् थियो लागि तथा".split()),
+}
+
+# Characters per script -> languages written in it. A script used by one
+# language decides alone; the others are told apart by their function words.
+_SCRIPTS = (
+    (re.compile(r"[぀-ヿ]"), ("ja",)),  # kana
+    (re.compile(r"[가-힯ᄀ-ᇿ]"), ("ko",)),
+    (re.compile(r"[一-鿿]"), ("zh",)),
+    (re.compile(r"[Ѐ-ӿ]"), ("ru", "uk", "bg", "sr")),
+    (re.compile(r"[؀-ۿ]"), ("ar", "fa", "ur")),
+    (re.compile(r"[ऀ-ॿ]"), ("hi", "mr", "ne")),
+    (re.compile(r"[Ͱ-Ͽ]"), ("el",)),
+    (re.compile(r"[֐-׿]"), ("he",)),
+    (re.compile(r"[฀-๿]"), ("th",)),
+)
+_LATIN = ("en", "fr", "es", "de", "it", "pt", "nl")
+_LETTER = re.compile(r"[^\W\d_]", re.UNICODE)
+# Letters plus the combining marks (Latin accents, Arabic harakat, Devanagari
+# vowel signs) that \w does not match, so words are not split at them
+_WORD = re.compile(r"(?:[^\W\d_]|[\u0300-\u036f\u064b-\u065f\u0670\u0900-\u0963])+", re.UNICODE)
+# "French (fr)", "Chinese (Simplified) (zh)", "Portuguese (pt-BR)"
+_LABELLED = re.compile(r"\(([a-z]{2,3})(?:[-_][a-z0-9]+)?\)$")
+
+# Below this many function-word hits a Latin-script guess is not trusted
+MIN_STOPWORD_HITS = 3
+# The best language must score at least this much higher than the runner-up
+MIN_MARGIN = 1.5
+
+
+def language_code(language: str) -> Optional[str]:
+    """
+    Normalise a target language ('French', 'fr', 'pt-BR', 'zh_CN', 'French (fr)') to a code.
+
+    Returns:
+        str or None: Language code, or None for languages not known here. A
+        code in trailing parentheses (the UI's labels) is taken as given.
+    """
+    value = language.strip().lower()
+    labelled = _LABELLED.search(value)
+    if labelled:
+        return labelled.group(1)
+    if value in _BY_NAME:
+        return _BY_NAME[value]
+    base = re.split(r"[-_]", value)[0]
+    return base if base in LANGUAGE_NAMES else _BY_NAME.get(base)
+
+
+def detect_language(text: str) -> Tuple[Optional[str], float]:
+    """
+    Guess the language of a text locally, without any model or network call.
+
+    The script is recognised from its Unicode block (kana before Han, so
+    Japanese is not taken for Chinese). A script written by a single
+    language decides it; otherwise (Latin, Cyrillic, Arabic, Devanagari) the
+    text is scored by the share of words that are frequent function words
+    of each language written in that script.
+
+    Args:
+        text (str): Text to classify (a summary or a few sentences is enough).
+
+    Returns:
+        tuple: (language code or None when unsure, confidence between 0 and 1).
+    """
+    letters = _LETTER.findall(text)
+    if not letters:
+        return None, 0.0
+
+    candidates = _LATIN
+    for pattern, codes in _SCRIPTS:
+        count = len(pattern.findall(text))
+        # Japanese mixes kana with Han: a modest share of kana is decisive
+        kana = codes == ("ja",)
+        share = count / len(letters)
+        if share >= (0.1 if kana else 0.5):
+            if len(codes) == 1:
+                return codes[0], min(1.0, share * (2 if kana else 1))
+            candidates = codes
+            break
+
+    words = [w.lower() for w in _WORD.findall(text)]
+    scores = {code: sum(1 for w in words if w in _STOPWORDS[code]) for code in candidates}
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, hits), (_, runner_up) = ranked[0], ranked[1]
+    if hits < MIN_STOPWORD_HITS or hits < runner_up * MIN_MARGIN:
+        return None, 0.0
+    return best, min(1.0, hits / max(1, len(words)) * 3)
+
+
+def is_same_language(text: str, target_language: str) -> bool:
+    """True when the text is confidently already in the target language."""
+    target = language_code(target_language)
+    if target is None:
+        return False
+    detected, confidence = detect_language(text)
+    logger.info(f"Detected language: {detected} ({confidence:.2f}), target {target}")
+    return detected == target
@@ -1,16 +1,24 @@
 import logging
+from functools import lru_cache
 from PIL import Image
-from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+from ocr_tools.optimize import get_engine_backend, load_vision2seq
 
 logger = logging.getLogger(__name__)
 
-# Load model and processor once (global)
-processor = TrOCRProcessor.from_pretrained("microsoft/trocr-base-handwritten")
-model = VisionEncoderDecoderModel.from_pretrained("microsoft/trocr-base-handwritten")
+MODEL_NAME = "microsoft/trocr-base-handwritten"
+
+@lru_cache(maxsize=1)
+def get_model():
+    # Load model and processor once, with the backend from ENGINE_BACKENDS["mistral"]
+    return load_vision2seq(MODEL_NAME, get_engine_backend("mistral"))
 
 def mistral_ocr(file_path: str) -> str:
     image = Image.open(file_path).convert("RGB")
-    pixel_values = processor(images=image, return_tensors="pt").pixel_values
+    return mistral_ocr_image(image)
+
+def mistral_ocr_image(image: Image.Image) -> str:
+    processor, model, _ = get_model()
+    pixel_values = processor(images=image.convert("RGB"), return_tensors="pt").pixel_values
     generated_ids = model.generate(pixel_values)
     text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-    return text.strip() 
\ No newline at end of file
+    return text.strip()
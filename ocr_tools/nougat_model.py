@@ -1,9 +1,12 @@
 # ocr_tools/nougat_model.py
 
-from transformers import AutoProcessor, VisionEncoderDecoderModel
 from PIL import Image
 import torch
 from typing import Optional
+from ocr_tools.optimize import get_engine_backend, load_vision2seq
+
+# A full page of markdown; Nougat's decoder was trained on up to 3584 tokens
+MAX_NEW_TOKENS = 3584
 
 
 class NougatOCR:
@@ -12,11 +15,28 @@ class NougatOCR:
     Supports extracting text from images using the VisionEncoderDecoder pipeline.
     """
 
-    def __init__(self, model_name: str = "facebook/nougat-base"):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.processor = AutoProcessor.from_pretrained(model_name)
-        self.model = VisionEncoderDecoderModel.from_pretrained(model_name).to(self.device)
+    def __init__(self, model_name: str = "facebook/nougat-base", backend: Optional[str] = None):
+        # int8 and onnx backends are CPU-only; see ENGINE_BACKENDS in config/settings.json
+        self.processor, self.model, self.backend = load_vision2seq(model_name, backend or get_engine_backend("nougat"))
+        self.device = "cuda" if torch.cuda.is_available() and self.backend == "fp32" else "cpu"
+        if self.backend == "fp32":
+            self.model = self.model.to(self.device)
 
     def extract(self, image_path: str) -> str:
-        # Dummy implementation for testing pipeline
-        return "TEST NOUGAT OUTPUT"
+        with Image.open(image_path) as image:
+            return self.extract_image(image)
+
+    def extract_image(self, image: Image.Image) -> str:
+        pixel_values = self.processor(images=image.convert("RGB"), return_tensors="pt").pixel_values
+        with torch.inference_mode():
+            generated_ids = self.model.generate(
+                pixel_values.to(self.device),
+                min_length=1,
+                max_new_tokens=MAX_NEW_TOKENS,
+                bad_words_ids=[[self.processor.tokenizer.unk_token_id]],
+            )
+        text = self.processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
+        # NougatProcessor repairs markdown truncated or repeated by generation
+        if hasattr(self.processor, "post_process_generation"):
+            text = self.processor.post_process_generation(text, fix_markdown=False)
+        return text.strip()
@@ -0,0 +1,214 @@
+# ocr_tools/optimize.py
+
+import os
+import json
+import time
+import argparse
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from utils.config import get_setting
+from utils.file_utils import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("fp32", "int8", "onnx")
+MODEL_CACHE_DIR = os.getenv(
+    "OCR_MODEL_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "ocr_mcp_server", "models"),
+)
+
+
+def get_engine_backend(engine: str) -> str:
+    """
+    Inference backend configured for an engine in ENGINE_BACKENDS.
+
+    Args:
+        engine (str): Engine name ('mistral' or 'nougat').
+
+    Returns:
+        str: 'fp32', 'int8' or 'onnx' (default 'fp32').
+    """
+    backend = (get_setting("ENGINE_BACKENDS", {}) or {}).get(engine, "fp32")
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown backend '{backend}' for {engine}, using fp32")
+        return "fp32"
+    return backend
+
+
+def _cache_path(model_name: str, backend: str) -> str:
+    return os.path.join(MODEL_CACHE_DIR, model_name.replace("/", "--"), backend)
+
+
+def _load_int8(model_name: str):
+    """
+    Dynamically quantize the Linear layers to int8, caching the quantized state_dict.
+
+    A cached model is rebuilt from the model config, quantized (which only
+    replaces modules) and filled from the state_dict, so nothing is unpickled
+    beyond tensors and the fp32 weights are not loaded.
+    """
+    import torch
+    from transformers import AutoConfig, VisionEncoderDecoderModel
+
+    path = os.path.join(_cache_path(model_name, "int8"), "state_dict.pt")
+    if os.path.exists(path):
+        logger.info(f"Loading cached int8 weights from {path}")
+        model = VisionEncoderDecoderModel(config=AutoConfig.from_pretrained(model_name)).eval()
+        quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        quantized.load_state_dict(torch.load(path, weights_only=True))
+        return quantized
+
+    model = VisionEncoderDecoderModel.from_pretrained(model_name).eval()
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    ensure_dir(os.path.dirname(path))
+    torch.save(quantized.state_dict(), path + ".tmp")
+    os.replace(path + ".tmp", path)
+    logger.info(f"Cached int8 weights at {path}")
+    return quantized
+
+
+def _load_onnx(model_name: str):
+    """Export the encoder/decoder to ONNX Runtime once and load it from the local cache."""
+    from optimum.onnxruntime import ORTModelForVision2Seq
+
+    path = _cache_path(model_name, "onnx")
+    if os.path.exists(os.path.join(path, "config.json")):
+        logger.info(f"Loading cached ONNX model from {path}")
+        return ORTModelForVision2Seq.from_pretrained(path, provider="CPUExecutionProvider")
+
+    model = ORTModelForVision2Seq.from_pretrained(model_name, export=True, provider="CPUExecutionProvider")
+    ensure_dir(path)
+    model.save_pretrained(path)
+    logger.info(f"Cached ONNX model at {path}")
+    return model
+
+
+def load_vision2seq(model_name: str, backend: str = "fp32", strict: bool = False) -> Tuple[Any, Any, str]:
+    """
+    Load a VisionEncoderDecoder model and its processor with the given backend.
+
+    int8 uses PyTorch dynamic quantization; onnx needs the optional
+    ``optimum[onnxruntime]`` package. Converted models are cached on local disk.
+    If an optimized backend cannot be loaded, fp32 is used instead unless
+    ``strict`` is set.
+
+    Args:
+        model_name (str): Hugging Face model id.
+        backend (str): 'fp32', 'int8' or 'onnx'.
+        strict (bool): Raise instead of falling back to fp32.
+
+    Returns:
+        tuple: (processor, model, backend actually loaded); the model exposes
+        the usual ``generate`` API.
+    """
+    from transformers import AutoProcessor, VisionEncoderDecoderModel
+
+    processor = AutoProcessor.from_pretrained(model_name)
+    try:
+        if backend == "int8":
+            return processor, _load_int8(model_name), "int8"
+        if backend == "onnx":
+            return processor, _load_onnx(model_name), "onnx"
+    except ImportError as e:
+        if strict:
+            raise
+        logger.warning(f"{backend} backend unavailable for {model_name} ({e}), falling back to fp32")
+    except Exception as e:
+        if strict:
+            raise
+        logger.error(f"Failed to load {backend} backend for {model_name}: {e}, falling back to fp32")
+
+    return processor, VisionEncoderDecoderModel.from_pretrained(model_name).eval(), "fp32"
+
+
+def benchmark_backends(
+    engine: str,
+    images: Sequence[Any],
+    labels: Optional[Sequence[str]] = None,
+    backends: Sequence[str] = BACKENDS,
+) -> List[Dict]:
+    """
+    Compare latency and accuracy of inference backends for a transformer engine.
+
+    Each backend's output is scored against the fp32 output (agreement) and,
+    when labels are given, against the ground truth. Backends are loaded
+    strictly: one that cannot be loaded gets a row with its ``error`` instead
+    of silently measuring fp32.
+
+    Args:
+        engine (str): 'mistral' or 'nougat'.
+        images (Sequence[Image.Image]): Images to recognize.
+        labels (Sequence[str], optional): Ground-truth text per image.
+        backends (Sequence[str]): Backends to compare; fp32 is always run as the reference.
+
+    Returns:
+        List[Dict]: One row per backend with load time, mean latency, and CER metrics (or ``error``).
+    """
+    from ocr_tools.evaluate import evaluate_text
+
+    model_names = {"mistral": "microsoft/trocr-base-handwritten", "nougat": "facebook/nougat-base"}
+    model_name = model_names[engine]
+    order = ["fp32"] + [b for b in backends if b != "fp32"]
+    reference: List[str] = []
+    rows = []
+
+    for backend in order:
+        start = time.perf_counter()
+        try:
+            processor, model, _ = load_vision2seq(model_name, backend, strict=True)
+        except Exception as e:
+            logger.error(f"{engine}/{backend}: could not be loaded: {e}")
+            rows.append({"backend": backend, "error": str(e)})
+            continue
+        load_seconds = time.perf_counter() - start
+
+        outputs, latencies = [], []
+        for image in images:
+            start = time.perf_counter()
+            pixel_values = processor(images=image.convert("RGB"), return_tensors="pt").pixel_values
+            generated_ids = model.generate(pixel_values)
+            outputs.append(processor.batch_decode(generated_ids, skip_special_tokens=True)[0].strip())
+            latencies.append(time.perf_counter() - start)
+
+        if backend == "fp32":
+            reference = outputs
+
+        row = {
+            "backend": backend,
+            "load_seconds": load_seconds,
+            "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+            "cer_vs_fp32": sum(evaluate_text(o, r)["char_errors"] for o, r in zip(outputs, reference))
+            / max(1, sum(len(r) for r in reference)),
+        }
+        if labels:
+            scored = [evaluate_text(o, label) for o, label in zip(outputs, labels)]
+            row["cer"] = sum(m["char_errors"] for m in scored) / max(1, sum(m["ref_chars"] for m in scored))
+        rows.append(row)
+        logger.info(f"{engine}/{backend}: {row}")
+
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare fp32, int8 and ONNX Runtime backends for a transformer OCR engine.")
+    parser.add_argument("--engine", default="mistral", choices=["mistral", "nougat"])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--dataset", default="training_dataset", help="Training dataset with labelled samples")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of samples")
+    args = parser.parse_args(argv)
+
+    from ocr_tools.evaluate import find_labelled_samples
+    from ocr_tools.extract import iter_page_images
+
+    images, labels = [], []
+    for path, label in find_labelled_samples(args.dataset)[:args.limit]:
+        # First page only: enough for a latency/accuracy comparison
+        for _, _, _, image in iter_page_images(path, pages=[0]):
+            images.append(image)
+            labels.append(label)
+
+    print(json.dumps(benchmark_backends(args.engine, images, labels, args.backends), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# ocr_tools/page_cache.py
+
+import threading
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from PIL import Image
+from utils import metrics
+from utils.config import PerformanceConfig, on_reload, performance_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# (document sha256, page index, dpi, colorspace 'L' or 'RGB')
+PageKey = Tuple[str, int, int, str]
+
+
+class PageCache:
+    """
+    Rendered pages shared by every tool, with LRU eviction under a byte budget.
+
+    Entries hold the raw pixel buffer (1 byte per pixel for grayscale, 3 for
+    RGB) rather than PIL images, so the budget counts exactly what is kept.
+    A grayscale request can be served from a cached RGB render of the same
+    page, and a preview from any larger render, so switching OCR engines or
+    previewing an extracted page does not rasterize the PDF again.
+
+    Args:
+        max_bytes (int): Total pixel bytes to keep (0 disables the cache).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[PageKey, Tuple[int, int, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _publish(self) -> None:
+        metrics.set_gauge("page_cache", {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes})
+
+    def _image(self, key: PageKey) -> Optional[Image.Image]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        width, height, data = entry
+        return Image.frombytes(key[3], (width, height), data)
+
+    def get(self, doc_hash: str, page: int, dpi: int, mode: str) -> Optional[Image.Image]:
+        """
+        Cached render of a page, or None.
+
+        Args:
+            doc_hash (str): SHA-256 of the document.
+            page (int): 0-based page index.
+            dpi (int): Resolution.
+            mode (str): 'L' (grayscale) or 'RGB'.
+
+        Returns:
+            Image.Image or None: A fresh image the caller may modify.
+        """
+        with self._lock:
+            image = self._image((doc_hash, page, dpi, mode))
+            if image is None and mode == "L":
+                image = self._image((doc_hash, page, dpi, "RGB"))
+                if image is not None:
+                    image = image.convert("L")
+        metrics.increment("page_cache.hits" if image is not None else "page_cache.misses")
+        return image
+
+    def get_at_most(self, doc_hash: str, page: int, dpi: int, mode: str) -> Optional[Image.Image]:
+        """
+        Page rendered at ``dpi`` or downscaled from the smallest larger cached render.
+
+        Used for previews, which never need OCR resolution.
+        """
+        with self._lock:
+            candidates = [
+                key for key in self._entries
+                if key[0] == doc_hash and key[1] == page and key[2] >= dpi and (key[3] == mode or mode == "L")
+            ]
+            if not candidates:
+                return None
+            source = min(candidates, key=lambda key: (key[2], key[3] != mode))
+            image = self._image(source)
+        metrics.increment("page_cache.hits")
+        if source[3] != mode:
+            image = image.convert(mode)
+        if source[2] != dpi:
+            scale = dpi / source[2]
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.BILINEAR)
+        return image
+
+    def put(self, doc_hash: str, page: int, dpi: int, image: Image.Image) -> None:
+        """
+        Store a render, evicting the least recently used pages to stay within budget.
+
+        Args:
+            doc_hash (str): SHA-256 of the document.
+            page (int): 0-based page index.
+            dpi (int): Resolution it was rendered at.
+            image (Image.Image): 'L' or 'RGB' render.
+        """
+        if image.mode not in ("L", "RGB"):
+            return
+        data = image.tobytes()
+        if len(data) > self.max_bytes:
+            return
+        key = (doc_hash, page, dpi, image.mode)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[2])
+            self._entries[key] = (image.width, image.height, data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                metrics.increment("page_cache.evictions")
+            self._publish()
+
+    def resize(self, max_bytes: int) -> None:
+        """Change the budget, evicting the least recently used pages if it shrank."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                metrics.increment("page_cache.evictions")
+            self._publish()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._publish()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+@lru_cache(maxsize=1)
+def get_page_cache() -> Optional[PageCache]:
+    """Process-wide page cache sized by PAGE_CACHE_MAX_BYTES (None when set to 0)."""
+    max_bytes = performance_config().page_cache_max_bytes
+    if max_bytes <= 0:
+        return None
+    logger.info(f"Page cache: {max_bytes / 1024 / 1024:.0f} MB")
+    return PageCache(max_bytes)
+
+
+def _resize(config: PerformanceConfig) -> None:
+    cache = get_page_cache() if get_page_cache.cache_info().currsize else None
+    if cache is not None and config.page_cache_max_bytes > 0:
+        cache.resize(config.page_cache_max_bytes)
+    else:
+        # Enabled or disabled: created (or not) on next use
+        get_page_cache.cache_clear()
+
+
+on_reload(_resize)
@@ -0,0 +1,209 @@
+# ocr_tools/page_dedup.py
+
+import zlib
+import threading
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from PIL import Image, ImageChops
+from utils import metrics
+from utils.config import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Long side of the low-resolution render used for fingerprints (~45 dpi for A4)
+THUMBNAIL_SIZE = 512
+# dHash grid: HASH_SIZE x HASH_SIZE bits, finer than the usual 8x8 so pages
+# sharing a letterhead rarely even become candidates
+HASH_SIZE = 32
+# Pages within this many differing hash bits (of 1024) are compared pixel by pixel
+DEFAULT_MAX_DISTANCE = 10
+# A hash cannot see a changed date on an otherwise identical form, so a
+# candidate is only reused if no thumbnail pixel differs by more than this
+VERIFY_CONTRAST = 32
+# Pages with less ink than this share of their area are blank
+DEFAULT_BLANK_INK_RATIO = 0.0005
+# A pixel is ink when this much darker than the paper
+INK_CONTRAST = 48
+# Scanner edges and punch holes are ignored
+MARGIN_RATIO = 0.05
+# Each page keeps its thumbnail, ~30 KB compressed
+DEFAULT_RECENT_PAGES = 512
+# Text of a failed OCR call (see extract.ocr_image()); never reused
+OCR_ERROR_MARKER = "[OCR Error:"
+
+
+def thumbnail(image: Image.Image) -> Image.Image:
+    """Grayscale image with its long side at most THUMBNAIL_SIZE, reduced before conversion."""
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("L")  # bilevel fax frames, palettes; reduce() needs 8-bit channels
+    factor = max(1, max(image.size) // THUMBNAIL_SIZE)
+    small = image.reduce(factor) if factor > 1 else image
+    # Same size whatever the source resolution, so a page hashes alike from a PDF, a scan or a JPEG
+    scale = THUMBNAIL_SIZE / max(small.size)
+    if scale < 1:
+        small = small.resize((max(1, round(small.width * scale)), max(1, round(small.height * scale))), Image.BILINEAR)
+    return small.convert("L")
+
+
+def ink_ratio(thumb: Image.Image) -> float:
+    """
+    Share of the page (margins excluded) noticeably darker than the paper.
+
+    The paper level is the brightest well-populated gray level, so gray
+    recycled paper and dark scans are judged against their own background.
+    """
+    width, height = thumb.size
+    mx, my = int(width * MARGIN_RATIO), int(height * MARGIN_RATIO)
+    histogram = thumb.crop((mx, my, width - mx, height - my)).histogram()
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    # Paper: the level below which 90% of the pixels fall
+    seen, paper = 0, 255
+    for level, count in enumerate(histogram):
+        seen += count
+        if seen >= 0.9 * total:
+            paper = level
+            break
+    return sum(histogram[:max(0, paper - INK_CONTRAST)]) / total
+
+
+def dhash(thumb: Image.Image) -> int:
+    """Difference hash: one bit per horizontally adjacent pair on a (HASH_SIZE+1) x HASH_SIZE grid."""
+    small = thumb.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def same_page(a: Image.Image, b: Image.Image) -> bool:
+    """True if two thumbnails differ nowhere by more than VERIFY_CONTRAST (compression noise)."""
+    if a.size != b.size:
+        return False
+    return not any(ImageChops.difference(a, b).histogram()[VERIFY_CONTRAST + 1:])
+
+
+class RecentPages:
+    """
+    OCR results of recently processed pages, looked up by perceptual hash.
+
+    Shared by all requests of the process, so a page repeated within a
+    document or across recent documents (cover sheets, separator pages) is
+    recognised once. Hash neighbours are confirmed against the stored
+    thumbnail before a result is reused. Entries are per engine and
+    resolution since both change the text. Pages processed concurrently do
+    not see each other.
+
+    Args:
+        max_entries (int): Pages remembered, oldest forgotten first.
+        max_distance (int): Hash bits a candidate may differ in.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_RECENT_PAGES, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        # (hash, (engine, dpi), thumbnail size, compressed thumbnail, result, document, page)
+        self._entries: Deque[Tuple[int, Tuple[str, Optional[int]], Tuple[int, int], bytes, Dict, Optional[str], int]] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def find(
+        self, page_hash: int, thumb: Image.Image, engine: str, dpi: Optional[int] = None
+    ) -> Optional[Tuple[Dict, Optional[str], int]]:
+        """(result, document hash, page) of a remembered identical page OCRed the same way, or None."""
+        with self._lock:
+            entries = list(self._entries)
+        candidates: List[Tuple[int, int]] = []
+        for position, (known_hash, known_key, *_) in enumerate(entries):
+            if known_key == (engine, dpi):
+                distance = hamming(page_hash, known_hash)
+                if distance <= self.max_distance:
+                    candidates.append((distance, -position))
+        for _, position in sorted(candidates):
+            _, _, size, pixels, result, document, page = entries[-position]
+            if same_page(thumb, Image.frombytes("L", size, zlib.decompress(pixels))):
+                return result, document, page
+        return None
+
+    def add(
+        self,
+        page_hash: int,
+        thumb: Image.Image,
+        engine: str,
+        dpi: Optional[int],
+        result: Dict,
+        document: Optional[str],
+        page: int,
+    ) -> None:
+        pixels = zlib.compress(thumb.tobytes(), 1)
+        with self._lock:
+            self._entries.append((page_hash, (engine, dpi), thumb.size, pixels, result, document, page))
+
+
+@lru_cache(maxsize=1)
+def get_recent_pages() -> Optional[RecentPages]:
+    """Process-wide store, or None when PAGE_DEDUP_ENABLED is false."""
+    if not get_setting("PAGE_DEDUP_ENABLED", True):
+        return None
+    return RecentPages(
+        max_entries=int(get_setting("RECENT_PAGES", DEFAULT_RECENT_PAGES)),
+        max_distance=int(get_setting("DUPLICATE_MAX_DISTANCE", DEFAULT_MAX_DISTANCE)),
+    )
+
+
+def ocr_unless_redundant(
+    thumb: Callable[[], Image.Image],
+    engine: str,
+    run: Callable[[], Dict],
+    document: Optional[str],
+    page: int,
+    dpi: Optional[int] = None,
+) -> Dict:
+    """
+    Skip OCR for blank pages and reuse it for pages seen before.
+
+    Args:
+        thumb (Callable): Produces the low-resolution grayscale page (see thumbnail()).
+        engine (str): OCR engine; results are only reused for the same engine.
+        run (Callable): Full-cost OCR of the page.
+        document (str, optional): Hash of the document, reported on reuse.
+        page (int): 0-based page index.
+        dpi (int, optional): Rasterization resolution of PDF pages (None for
+            images); results are only reused at the same resolution.
+
+    Returns:
+        Dict: The OCR result, ``{"text": "", "engine", "skipped": "blank"}`` for
+        blank pages, or a reused result with ``reused_from`` ({document, page}).
+    """
+    recent = get_recent_pages()
+    if recent is None:
+        return run()
+
+    small = thumb()
+    if ink_ratio(small) < float(get_setting("BLANK_PAGE_INK_RATIO", DEFAULT_BLANK_INK_RATIO)):
+        metrics.increment("pages_blank")
+        logger.info(f"Page {page + 1}: blank, OCR skipped")
+        return {"text": "", "engine": engine, "skipped": "blank"}
+
+    page_hash = dhash(small)
+    match = recent.find(page_hash, small, engine, dpi)
+    if match is not None:
+        result, source_document, source_page = match
+        metrics.increment("pages_reused")
+        logger.info(f"Page {page + 1}: identical to page {source_page + 1} of {(source_document or '?')[:12]}, OCR reused")
+        return {**result, "reused_from": {"document": source_document, "page": source_page}}
+
+    result = run()
+    if OCR_ERROR_MARKER in result.get("text", ""):
+        # A transient failure must not be served for every later copy of the page
+        return result
+    recent.add(page_hash, small, engine, dpi, {k: v for k, v in result.items() if k != "page"}, document, page)
+    return result
@@ -0,0 +1,207 @@
+# ocr_tools/scheduler.py
+
+import time
+import threading
+import contextvars
+import logging
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+# Documents up to this many pages are treated as interactive requests
+INTERACTIVE_MAX_PAGES = 2
+
+# Client on whose behalf the current thread submits page tasks, and an
+# optional priority class overriding the size-based one
+_client: contextvars.ContextVar[str] = contextvars.ContextVar("ocr_client", default="anonymous")
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("ocr_priority", default=None)
+_scheduler: Optional["PageScheduler"] = None
+
+
+class _Task:
+    __slots__ = ("fn", "future", "priority", "client", "enqueued")
+
+    def __init__(self, fn: Callable[[], Any], priority: str, client: str):
+        self.fn = fn
+        self.future: Future = Future()
+        self.priority = priority
+        self.client = client
+        self.enqueued = time.perf_counter()
+
+
+class PageScheduler:
+    """
+    Runs page-level OCR tasks with priority classes and per-client fair share.
+
+    Interactive tasks (single images, short documents) are always dispatched
+    before bulk tasks, and ``reserved`` workers only ever take interactive
+    work, so a small request starts immediately even while large documents
+    occupy the rest of the pool. Within a class, clients are served round-robin
+    one page at a time, so one client's 500-page PDF cannot starve another's.
+
+    Args:
+        workers (int): Number of worker threads.
+        reserved (int, optional): Workers kept free for interactive tasks
+            (default: 1 when there are at least two workers).
+    """
+
+    def __init__(self, workers: int, reserved: Optional[int] = None):
+        self._reserved = reserved
+        self._cond = threading.Condition()
+        # priority -> client -> pending tasks, plus round-robin order of clients
+        self._queues: Dict[str, Dict[str, Deque[_Task]]] = {p: {} for p in PRIORITIES}
+        self._rotation: Dict[str, Deque[str]] = {p: deque() for p in PRIORITIES}
+        self._running = {p: 0 for p in PRIORITIES}
+        self._stopped = False
+        self._threads: Dict[int, threading.Thread] = {}
+        self.workers = 0
+        self.resize(workers)
+
+    def resize(self, workers: int) -> None:
+        """
+        Change the number of worker threads without dropping queued tasks.
+
+        Extra workers start at once; surplus ones exit after their current task.
+        """
+        with self._cond:
+            self.workers = max(1, workers)
+            self.reserved = min(self.workers - 1, 1 if self._reserved is None else self._reserved)
+            for i in range(self.workers):
+                if i not in self._threads:
+                    thread = threading.Thread(target=self._worker, args=(i,), name=f"ocr-page-{i}", daemon=True)
+                    self._threads[i] = thread
+                    thread.start()
+            self._publish()
+            self._cond.notify_all()
+
+    def submit(self, fn: Callable[[], Any], priority: str = INTERACTIVE, client: Optional[str] = None) -> Future:
+        """
+        Queue one page task.
+
+        Args:
+            fn (Callable): Task body, called with no arguments on a worker thread.
+            priority (str): INTERACTIVE or BULK.
+            client (str, optional): Client for fair sharing (default: current client).
+
+        Returns:
+            Future: Resolves to the task's result.
+        """
+        task = _Task(fn, priority, client or _client.get())
+        with self._cond:
+            queues = self._queues[priority]
+            if task.client not in queues:
+                queues[task.client] = deque()
+                self._rotation[priority].append(task.client)
+            queues[task.client].append(task)
+            self._publish()
+            self._cond.notify()
+        return task.future
+
+    def map(self, fns: List[Callable[[], Any]], priority: str = INTERACTIVE) -> Iterator[Any]:
+        """Submit tasks and yield their results in submission order."""
+        futures = [self.submit(fn, priority) for fn in fns]
+        for future in futures:
+            yield future.result()
+
+    def _next_task(self, reserved_worker: bool) -> Optional[_Task]:
+        # Caller holds the lock
+        for priority in PRIORITIES:
+            if priority == BULK and reserved_worker:
+                break
+            rotation = self._rotation[priority]
+            if rotation:
+                client = rotation.popleft()
+                queue = self._queues[priority][client]
+                task = queue.popleft()
+                if queue:
+                    rotation.append(client)
+                else:
+                    del self._queues[priority][client]
+                return task
+        return None
+
+    def _worker(self, index: int) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    retired = index >= self.workers
+                    task = None if retired else self._next_task(index < self.reserved)
+                    if task is not None or retired or self._stopped:
+                        break
+                    self._cond.wait()
+                if task is None:
+                    del self._threads[index]
+                    return
+                self._running[task.priority] += 1
+                self._publish()
+
+            metrics.observe(f"scheduler.wait_seconds.{task.priority}", time.perf_counter() - task.enqueued)
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.fn())
+                except BaseException as e:
+                    task.future.set_exception(e)
+
+            with self._cond:
+                self._running[task.priority] -= 1
+                self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge("scheduler", {
+            "workers": self.workers,
+            "reserved_interactive": self.reserved,
+            "queued": {p: sum(len(q) for q in self._queues[p].values()) for p in PRIORITIES},
+            "running": dict(self._running),
+            "clients": {p: len(self._rotation[p]) for p in PRIORITIES},
+        })
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in list(self._threads.values()):
+            thread.join()
+
+
+def install_scheduler(scheduler: Optional[PageScheduler]) -> None:
+    """Route extract_pages() page tasks through this scheduler (None: run inline)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler() -> Optional[PageScheduler]:
+    return _scheduler
+
+
+def classify(page_count: int) -> str:
+    """Priority class for a document of the given size, unless the context sets one."""
+    override = _priority.get()
+    if override is not None:
+        return override
+    return INTERACTIVE if page_count <= INTERACTIVE_MAX_PAGES else BULK
+
+
+@contextmanager
+def client_context(client: str, priority: Optional[str] = None) -> Iterator[None]:
+    """
+    Attribute page tasks submitted from this thread to a client.
+
+    Args:
+        client (str): Client identity for fair sharing.
+        priority (str, optional): Force INTERACTIVE or BULK regardless of document size.
+    """
+    client_token = _client.set(client or "anonymous")
+    priority_token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(priority_token)
+        _client.reset(client_token)
@@ -0,0 +1,219 @@
+# ocr_tools/search.py
+
+import os
+import re
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from utils.config import get_setting
+from utils.file_utils import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_TOKENS = 12
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    filename TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    engine TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (sha256, page)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text, content='pages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query matching pages that contain every word.
+
+    Each whitespace-separated term is quoted as a phrase, so input such as
+    ``INV-2024-001`` matches those words in sequence instead of being parsed
+    as FTS5 operators.
+
+    Args:
+        query (str): User query.
+
+    Returns:
+        str: FTS5 MATCH expression ("" when the query has no words).
+    """
+    phrases = (" ".join(TOKEN.findall(term)) for term in query.split())
+    return " ".join(f'"{phrase}"' for phrase in phrases if phrase)
+
+
+class SearchIndex:
+    """
+    Full-text index of OCR'd pages in SQLite FTS5, keyed by content hash.
+
+    Page text lives in a plain table with one row per (document hash, page);
+    an external-content FTS5 table indexes it through triggers, so re-indexing
+    a page replaces only that row. Ingestion is incremental: pages already
+    indexed with the same text are left untouched. The database uses WAL, so
+    searches are not blocked by ingestion, and several processes may write.
+
+    Args:
+        path (str): SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, sha256: str, filename: Optional[str], engine: str, pages: Sequence[Dict]) -> int:
+        """
+        Index the pages of one document.
+
+        Args:
+            sha256 (str): Content hash of the source file.
+            filename (str, optional): Original file name, shown in results.
+            engine (str): Engine that produced the text (used when a page has no ``engine``).
+            pages (Sequence[Dict]): Page results with ``page`` and ``text``, as from extract_pages().
+
+        Returns:
+            int: Number of pages inserted or updated.
+        """
+        changed = 0
+        with self._write_lock, self._connection() as conn:
+            conn.execute(
+                "INSERT INTO documents (sha256, filename, indexed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (sha256) DO UPDATE SET filename = COALESCE(excluded.filename, filename)",
+                (sha256, filename, _now()),
+            )
+            for page in pages:
+                cursor = conn.execute(
+                    "INSERT INTO pages (sha256, page, engine, text) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (sha256, page) DO UPDATE SET engine = excluded.engine, text = excluded.text "
+                    "WHERE text != excluded.text",
+                    (sha256, page.get("page", 0), page.get("engine", engine), page["text"]),
+                )
+                changed += cursor.rowcount
+        if changed:
+            logger.info(f"🔎 Indexed {changed} page(s) of {filename or sha256[:12]}")
+        return changed
+
+    def has(self, sha256: str) -> bool:
+        """True if any page of this document is indexed."""
+        row = self._connection().execute("SELECT 1 FROM pages WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone()
+        return row is not None
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, raw: bool = False) -> List[Dict]:
+        """
+        Find pages matching a query, best matches first.
+
+        Args:
+            query (str): Words that must all appear on the page.
+            limit (int): Maximum number of results.
+            offset (int): Results to skip, for paging.
+            raw (bool): Treat ``query`` as FTS5 syntax (phrases, OR, NEAR, prefix*).
+
+        Returns:
+            List[Dict]: ``sha256``, ``filename``, ``page``, ``engine``,
+            ``snippet`` (matches in [brackets]) and ``score`` (lower is better).
+        """
+        match = query if raw else to_fts_query(query)
+        if not match:
+            return []
+        rows = self._connection().execute(
+            "SELECT p.sha256, d.filename, p.page, p.engine, "
+            f"snippet(pages_fts, 0, '[', ']', '…', {SNIPPET_TOKENS}), bm25(pages_fts) "
+            "FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+            "LEFT JOIN documents d ON d.sha256 = p.sha256 "
+            "WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts) LIMIT ? OFFSET ?",
+            (match, limit, offset),
+        ).fetchall()
+        return [
+            {"sha256": sha, "filename": filename, "page": page, "engine": engine, "snippet": snippet, "score": score}
+            for sha, filename, page, engine, snippet, score in rows
+        ]
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        return {
+            "documents": conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0],
+            "pages": conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0],
+        }
+
+    def optimize(self) -> None:
+        """Merge the FTS5 index segments; worthwhile after large backfills."""
+        start = time.perf_counter()
+        with self._write_lock, self._connection() as conn:
+            conn.execute("INSERT INTO pages_fts(pages_fts) VALUES ('optimize')")
+        logger.info(f"Optimized search index in {time.perf_counter() - start:.1f}s")
+
+
+@lru_cache(maxsize=None)
+def get_index(path: Optional[str] = None) -> SearchIndex:
+    """
+    Shared SearchIndex for a database file.
+
+    Args:
+        path (str, optional): Database file (default: $SEARCH_INDEX_PATH or search_index/ocr.sqlite3).
+
+    Returns:
+        SearchIndex: Index instance, created once per path.
+    """
+    return SearchIndex(path or os.getenv("SEARCH_INDEX_PATH", os.path.join("search_index", "ocr.sqlite3")))
+
+
+def index_pages(sha256: str, filename: Optional[str], engine: str, pages: Sequence[Dict], path: Optional[str] = None) -> None:
+    """
+    Add freshly extracted pages to the shared index.
+
+    Indexing must never fail an OCR request, so errors are logged instead of
+    raised. SEARCH_INDEX_ENABLED (settings or environment) turns it off.
+
+    Args:
+        sha256 (str): Content hash of the source file.
+        filename (str, optional): Original file name.
+        engine (str): OCR engine used.
+        pages (Sequence[Dict]): Page results from extract_pages().
+        path (str, optional): Database file (default: see get_index()).
+    """
+    if not get_setting("SEARCH_INDEX_ENABLED", True):
+        return
+    try:
+        get_index(path).add(sha256, filename, engine, pages)
+    except Exception as e:
+        logger.error(f"Failed to index {filename or sha256[:12]}: {e}")
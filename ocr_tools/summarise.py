@@ -1,17 +1,24 @@
 # ocr_tools/summarise.py
 
-import os
-import tempfile
 from fastapi import UploadFile
-from typing import Literal
-from ocr_tools.extract import extract
-from llm.groq_client import query_groq_llm
+from typing import Iterator, Literal
+from ocr_tools.extract import extract_bytes
+from llm.groq_client import query_groq_llm, stream_groq_llm
+from llm.textrank import textrank_summary
+from utils.config import performance_config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 'groq': abstractive LLM summary; 'textrank': local extractive summary, no network round trip
+SUMMARY_ENGINES = ("groq", "textrank")
 
-def summarise_file(uploaded_file: UploadFile, engine: Literal["tesseract", "nougat"] = "tesseract") -> str:
+
+def summarise_file(
+    uploaded_file: UploadFile,
+    engine: Literal["tesseract", "nougat"] = "tesseract",
+    summary_engine: str = "groq",
+) -> str:
     """
     Extracts text from an uploaded PDF or image using OCR (Tesseract or Nougat),
     and summarizes the content using the Groq LLM.
@@ -19,39 +26,95 @@ def summarise_file(uploaded_file: UploadFile, engine: Literal["tesseract", "noug
     Args:
         uploaded_file (UploadFile): File uploaded by the user (PDF or image).
         engine (str): OCR engine ('tesseract' or 'nougat').
+        summary_engine (str): 'groq' (LLM) or 'textrank' (local extractive).
 
     Returns:
         str: Summarized text output.
     """
-    suffix = os.path.splitext(uploaded_file.filename)[-1]
+    return summarise_bytes(uploaded_file.file.read(), uploaded_file.filename or "file", engine=engine, summary_engine=summary_engine)
 
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(uploaded_file.file.read())
-            tmp_path = tmp.name
 
-        logger.info(f"📄 File saved temporarily at: {tmp_path}")
+def summarise_bytes(data: bytes, filename: str, engine: str = "tesseract", summary_engine: str = "groq") -> str:
+    """
+    Same as summarise_file() for document content that has already been read.
 
-        # Step 1: Extract Text using OCR
-        extracted_text = extract(tmp_path, engine=engine)
+    Args:
+        data (bytes): PDF or image content.
+        filename (str): Original file name; its extension selects PDF or image handling.
+        engine (str): OCR engine.
+        summary_engine (str): 'groq' (LLM) or 'textrank' (local extractive).
 
+    Returns:
+        str: Summarized text output.
+    """
+    try:
+        # Step 1: Extract Text using OCR
+        extracted_text = extract_bytes(data, filename, engine=engine)
     except Exception as e:
         logger.error(f"❌ Error during OCR extraction: {e}")
         return f"❌ OCR Extraction failed: {str(e)}"
-    
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-            logger.info("🧹 Temporary file removed")
 
     if not extracted_text.strip():
         return "⚠️ No readable text was found in the document."
 
-    # Step 2: Summarize via Groq LLM (safely truncated for token limits)
+    # Step 2: Summarize via Groq LLM or locally
+    return summarise_text(extracted_text, summary_engine=summary_engine)
+
+
+def summarise_text(text: str, summary_engine: str = "groq") -> str:
+    """
+    Summarizes already-extracted document text using the Groq LLM or TextRank.
+
+    Args:
+        text (str): Extracted document text.
+        summary_engine (str): 'groq' (LLM) or 'textrank' (local extractive;
+            uses the whole document, not just the first SUMMARY_MAX_CHARS characters).
+
+    Returns:
+        str: Summarized text output.
+    """
+    if not text.strip():
+        return "⚠️ No readable text was found in the document."
+
+    if summary_engine not in SUMMARY_ENGINES:
+        return f"❌ Summarization failed: unknown summary engine '{summary_engine}'"
+
+    if summary_engine == "textrank":
+        try:
+            return textrank_summary(text) or "⚠️ No summary returned."
+        except Exception as e:
+            logger.error(f"❌ TextRank summarization error: {e}")
+            return f"❌ Summarization failed: {str(e)}"
+
     try:
-        prompt = f"Summarize the following document content:\n\n{extracted_text[:4000]}"
-        summary = query_groq_llm(prompt=prompt)
+        summary = query_groq_llm(prompt=summarise_prompt(text))
         return summary or "⚠️ No summary returned."
     except Exception as e:
         logger.error(f"❌ LLM Summarization error: {e}")
         return f"❌ Summarization failed: {str(e)}"
+
+
+def summarise_prompt(text: str) -> str:
+    # Truncated for token limits (SUMMARY_MAX_CHARS)
+    return f"Summarize the following document content:\n\n{text[:performance_config().summary_max_chars]}"
+
+
+def summarise_text_stream(text: str, summary_engine: str = "groq") -> Iterator[str]:
+    """
+    Streaming variant of summarise_text(): yields the summary as it is generated.
+
+    Args:
+        text (str): Extracted document text.
+        summary_engine (str): 'groq' streams LLM tokens; 'textrank' yields its summary at once.
+
+    Yields:
+        str: Pieces of the summary.
+    """
+    if not text.strip():
+        yield "⚠️ No readable text was found in the document."
+        return
+    if summary_engine != "groq":
+        yield summarise_text(text, summary_engine=summary_engine)
+        return
+    yield from stream_groq_llm(prompt=summarise_prompt(text))
+
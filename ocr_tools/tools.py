@@ -0,0 +1,118 @@
+# ocr_tools/tools.py
+
+import os
+import json
+import base64
+import tempfile
+import logging
+from typing import Callable, List, Optional
+from mcp import tool
+from ocr_tools.extract import extract
+from ocr_tools.summarise import summarise_text
+from ocr_tools.translate import translate_text
+from ocr_tools.evaluate import evaluate_text
+
+logger = logging.getLogger(__name__)
+
+
+def _extract_base64(
+    file_base64: str,
+    filename: str,
+    engine: str,
+    pages: Optional[List[int]] = None,
+    progress: Optional[Callable] = None,
+) -> str:
+    """Decode a base64 upload to a temporary file and run OCR on it."""
+    suffix = os.path.splitext(filename)[-1] or ".png"
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(base64.b64decode(file_base64))
+        tmp_path = tmp.name
+    try:
+        return extract(tmp_path, engine=engine, pages=pages, progress=progress)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@tool(name="extract")
+def extract_tool(
+    file_base64: str,
+    filename: str = "document.png",
+    engine: str = "tesseract",
+    pages: Optional[List[int]] = None,
+    progress: Optional[Callable] = None,
+) -> str:
+    """
+    Extract text from a PDF or image with OCR.
+
+    Args:
+        file_base64 (str): Base64-encoded PDF or image content.
+        filename (str): File name; its extension selects PDF or image handling.
+        engine (str): OCR engine ('tesseract', 'nougat' or 'mistral').
+        pages (List[int], optional): 0-based PDF page or TIFF frame indices to process (default: all).
+    """
+    return _extract_base64(file_base64, filename, engine, pages=pages, progress=progress)
+
+
+@tool(name="summarise")
+def summarise_tool(
+    file_base64: str,
+    filename: str = "document.png",
+    engine: str = "tesseract",
+    summary_engine: str = "groq",
+    progress: Optional[Callable] = None,
+) -> str:
+    """
+    Extract text from a PDF or image and summarize it with the LLM or locally.
+
+    Args:
+        file_base64 (str): Base64-encoded PDF or image content.
+        filename (str): File name; its extension selects PDF or image handling.
+        engine (str): OCR engine ('tesseract', 'nougat' or 'mistral').
+        summary_engine (str): 'groq' (LLM) or 'textrank' (fast local extractive summary).
+    """
+    text = _extract_base64(file_base64, filename, engine, progress=progress)
+    return summarise_text(text, summary_engine=summary_engine)
+
+
+@tool(name="translate")
+def translate_tool(
+    target_language: str,
+    text: Optional[str] = None,
+    file_base64: Optional[str] = None,
+    filename: str = "document.png",
+    engine: str = "tesseract",
+    summary_engine: str = "groq",
+    progress: Optional[Callable] = None,
+) -> str:
+    """
+    Translate text, or the summary of a PDF or image, into another language.
+
+    Args:
+        target_language (str): Language to translate into (e.g. 'French', 'es').
+        text (str, optional): Text to translate directly, skipping OCR and summarisation.
+        file_base64 (str, optional): Base64-encoded PDF or image to extract, summarize and translate.
+        filename (str): File name; its extension selects PDF or image handling.
+        engine (str): OCR engine ('tesseract', 'nougat' or 'mistral').
+        summary_engine (str): 'groq' (LLM) or 'textrank' for the summary before translating.
+    """
+    if text is None:
+        if not file_base64:
+            raise ValueError("Provide either text or file_base64")
+        summary = summarise_text(_extract_base64(file_base64, filename, engine, progress=progress), summary_engine=summary_engine)
+        if summary.startswith("❌"):
+            return summary
+        text = summary
+    return translate_text(text, target_language)
+
+
+@tool(name="evaluate")
+def evaluate_tool(predicted: str, expected: str) -> str:
+    """
+    Score OCR output against ground truth with character and word error rates.
+
+    Args:
+        predicted (str): Text produced by OCR.
+        expected (str): Ground-truth text.
+    """
+    return json.dumps(evaluate_text(predicted, expected))
@@ -1,65 +1,238 @@
-import os
-import tempfile
+import re
 from fastapi import UploadFile
-from typing import Literal
-from ocr_tools.extract import extract
-from ocr_tools.summarise import summarise_file
-from llm.groq_client import query_groq_llm
+from typing import Dict, Iterator, List, Literal, Optional
+from ocr_tools.extract import extract_bytes
+from ocr_tools.summarise import summarise_text
+from ocr_tools.language import is_same_language, language_code
+from ocr_tools.translation_memory import get_memory, needs_translation, segment_hash, split_segments
+from llm.groq_client import get_fallback_summary, query_groq_llm, stream_groq_llm
+from llm.rate_limit import LLMUnavailable
+from utils import metrics
+from utils.config import get_setting
 import logging
 
 logger = logging.getLogger(__name__)
 
-def translate_file(uploaded_file: UploadFile, target_language: str, engine: Literal["tesseract", "nougat", "mistral"] = "tesseract") -> str:
+# "[3] translated segment" lines in the LLM's reply to segments_prompt()
+_NUMBERED_LINE = re.compile(r"^\s*\[(\d+)\]\s?(.*)$")
+
+def translate_file(
+    uploaded_file: UploadFile,
+    target_language: str,
+    engine: Literal["tesseract", "nougat", "mistral"] = "tesseract",
+    summary_engine: str = "groq",
+) -> str:
     """
     Extracts text from an uploaded PDF or image using OCR, summarizes it, then translates the summary to the target language using the Groq LLM.
 
     Args:
         uploaded_file (UploadFile): File uploaded by the user (PDF or image).
         target_language (str): The language to translate the summary into (e.g., 'French', 'es', 'zh').
-        engine (str): OCR engine ('tesseract', 'nougat', or 'mistral').a
+        engine (str): OCR engine ('tesseract', 'nougat', or 'mistral').
+        summary_engine (str): 'groq' (LLM) or 'textrank' (local extractive).
 
     Returns:
         str: Translated summary output.
     """
     # Ensure filename is a string
     filename = uploaded_file.filename or 'file'
-    suffix = os.path.splitext(filename)[-1]
+    return translate_bytes(uploaded_file.file.read(), filename, target_language, engine=engine, summary_engine=summary_engine)
 
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(uploaded_file.file.read())
-            tmp_path = tmp.name
-        logger.info(f"📄 File saved temporarily at: {tmp_path}")
 
-        # Step 1: Extract Text using OCR
-        extracted_text = extract(tmp_path, engine=engine)
+def translate_bytes(
+    data: bytes,
+    filename: str,
+    target_language: str,
+    engine: str = "tesseract",
+    summary_engine: str = "groq",
+) -> str:
+    """
+    Same as translate_file() for document content that has already been read.
 
+    Args:
+        data (bytes): PDF or image content.
+        filename (str): Original file name; its extension selects PDF or image handling.
+        target_language (str): The language to translate the summary into.
+        engine (str): OCR engine.
+        summary_engine (str): 'groq' (LLM) or 'textrank' (local extractive).
+
+    Returns:
+        str: Translated summary output.
+    """
+    try:
+        # Step 1: Extract Text using OCR
+        extracted_text = extract_bytes(data, filename, engine=engine)
     except Exception as e:
         logger.error(f"❌ Error during OCR extraction: {e}")
         return f"❌ OCR Extraction failed: {str(e)}"
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-            logger.info("🧹 Temporary file removed")
 
     if not extracted_text.strip():
         return "⚠️ No readable text was found in the document."
 
-    # Step 2: Summarize the extracted text
+    # Step 2: Summarize the extracted text (same logic as summarise_file)
+    summary = summarise_text(extracted_text, summary_engine=summary_engine)
+    if summary.startswith("❌"):
+        return summary
+
+    # Step 3: Translate the summary
+    return translate_text(summary, target_language)
+
+
+def translate_prompt(text: str, target_language: str) -> str:
+    return f"Translate the following summary to {target_language}:\n\n{text}"
+
+
+def segments_prompt(segments: List[str], target_language: str) -> str:
+    numbered = "\n".join(f"[{i}] {' '.join(segment.split())}" for i, segment in enumerate(segments, 1))
+    return (
+        f"Translate each numbered segment to {target_language}. Reply with exactly one line per segment, "
+        f"keeping its [number] prefix, and nothing else:\n\n{numbered}"
+    )
+
+
+def parse_segments(reply: str, count: int) -> Optional[List[str]]:
+    """Translations from a numbered reply, or None unless every segment 1..count is present."""
+    found: Dict[int, str] = {}
+    for line in reply.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if match:
+            found[int(match.group(1))] = match.group(2).strip()
+    if any(not found.get(i) for i in range(1, count + 1)):
+        return None
+    return [found[i] for i in range(1, count + 1)]
+
+
+def memory_key(target_language: str) -> str:
+    """Translation-memory key of a target language: 'French' and 'fr' share entries."""
+    return language_code(target_language) or " ".join(target_language.lower().split())
+
+
+def _lookup(text: str, target_language: str) -> Dict[str, str]:
+    """Known translations of the text's segments (segment hash -> translation)."""
+    hashes = [segment_hash(segment) for segment, _ in split_segments(text) if needs_translation(segment)]
     try:
-        # Use the same summarization logic as summarise_file
-        prompt = f"Summarize the following document content:\n\n{extracted_text[:4000]}"
-        summary = query_groq_llm(prompt=prompt)
-        summary = summary or "⚠️ No summary returned."
+        return get_memory().lookup(hashes, memory_key(target_language))
     except Exception as e:
-        logger.error(f"❌ LLM Summarization error: {e}")
-        return f"❌ Summarization failed: {str(e)}"
+        # The memory is an optimisation: translate everything if it is unreadable
+        logger.error(f"Translation memory lookup failed: {e}")
+        return {}
+
+
+def _assemble(text: str, known: Dict[str, str]) -> Optional[str]:
+    """The text with every segment replaced by its translation, or None if one is missing."""
+    parts = []
+    for segment, separator in split_segments(text):
+        if needs_translation(segment):
+            translation = known.get(segment_hash(segment))
+            if translation is None:
+                return None
+            segment = translation
+        parts.append(segment + separator)
+    return "".join(parts)
+
+
+def translate_segments(text: str, target_language: str) -> str:
+    """
+    Translate through the translation memory: segments translated before are
+    reused and only new ones are sent to the LLM, in one numbered prompt.
+
+    Args:
+        text (str): Text to translate.
+        target_language (str): The language to translate into.
+
+    Returns:
+        str: Translated text with the original line layout.
+    """
+    known = _lookup(text, target_language)
+    missing: Dict[str, str] = {}
+    total = 0
+    for segment, _ in split_segments(text):
+        if needs_translation(segment):
+            total += 1
+            digest = segment_hash(segment)
+            if digest not in known:
+                missing.setdefault(digest, segment)
+    metrics.increment("translation_memory.hits", total - len(missing))
+    metrics.increment("translation_memory.misses", len(missing))
+    logger.info(f"Translation memory: {total - len(missing)} of {total} segments known")
+
+    if missing:
+        try:
+            reply = query_groq_llm(prompt=segments_prompt(list(missing.values()), target_language), fallback=False)
+        except LLMUnavailable:
+            return get_fallback_summary(translate_prompt(text, target_language))
+        translations = parse_segments(reply, len(missing))
+        if translations is None:
+            logger.warning("LLM reply did not keep the segment numbering; translating the text as a whole")
+            return query_groq_llm(prompt=translate_prompt(text, target_language))
+        pairs = list(zip(missing.values(), translations))
+        known.update((digest, translation) for digest, translation in zip(missing, translations))
+        try:
+            get_memory().store(memory_key(target_language), pairs)
+        except Exception as e:
+            logger.error(f"Failed to update translation memory: {e}")
+
+    return _assemble(text, known) or ""
+
+
+def translate_text(text: str, target_language: str) -> str:
+    """
+    Translates already-extracted text (typically a summary) with the Groq LLM.
+
+    Text already in the target language is returned unchanged, and segments
+    found in the translation memory are not sent to the LLM again.
+
+    Args:
+        text (str): Text to translate.
+        target_language (str): The language to translate into (e.g., 'French', 'es', 'zh').
+
+    Returns:
+        str: Translated text.
+    """
+    if not text.strip():
+        return "⚠️ No text provided to translate."
+
+    if is_same_language(text, target_language):
+        metrics.increment("translate.same_language")
+        return text
 
-    # Step 3: Translate the summary
     try:
-        prompt = f"Translate the following summary to {target_language}:\n\n{summary}"
-        translation = query_groq_llm(prompt=prompt)
+        if get_setting("TRANSLATION_MEMORY_ENABLED", True):
+            translation = translate_segments(text, target_language)
+        else:
+            translation = query_groq_llm(prompt=translate_prompt(text, target_language))
         return translation or "⚠️ No translation returned."
     except Exception as e:
         logger.error(f"❌ LLM Translation error: {e}")
-        return f"❌ Translation failed: {str(e)}" 
\ No newline at end of file
+        return f"❌ Translation failed: {str(e)}"
+
+
+def translate_text_stream(text: str, target_language: str) -> Iterator[str]:
+    """
+    Streaming variant of translate_text(): yields the translation as it is generated.
+
+    Text in the target language, or fully covered by the translation memory,
+    is yielded at once; otherwise the whole text is streamed from the LLM
+    (a streamed reply cannot be split back into segments to store).
+
+    Args:
+        text (str): Text to translate.
+        target_language (str): The language to translate into.
+
+    Yields:
+        str: Pieces of the translation.
+    """
+    if not text.strip():
+        yield "⚠️ No text provided to translate."
+        return
+    if is_same_language(text, target_language):
+        metrics.increment("translate.same_language")
+        yield text
+        return
+    if get_setting("TRANSLATION_MEMORY_ENABLED", True):
+        translation = _assemble(text, _lookup(text, target_language))
+        if translation is not None:
+            metrics.increment("translation_memory.hits", sum(1 for s, _ in split_segments(text) if needs_translation(s)))
+            yield translation
+            return
+    yield from stream_groq_llm(prompt=translate_prompt(text, target_language))
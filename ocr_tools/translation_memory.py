@@ -0,0 +1,172 @@
+# ocr_tools/translation_memory.py
+
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.file_utils import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    hash TEXT NOT NULL,
+    target TEXT NOT NULL,
+    source TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (hash, target)
+) WITHOUT ROWID;
+"""
+
+# Sentence boundaries inside a line; line breaks are kept as they are
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+")
+_LETTER = re.compile(r"[^\W\d_]", re.UNICODE)
+# SQLite limits bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+# (text, separator that follows it in the original)
+Segment = Tuple[str, str]
+
+
+def split_segments(text: str) -> List[Segment]:
+    """
+    Split text into translatable sentences, keeping the separators.
+
+    Joining every ``text + separator`` gives back the input exactly, so
+    translated segments can be reassembled with the original layout (line
+    breaks, bullet lists, blank lines).
+
+    Returns:
+        List[Segment]: Segments in order.
+    """
+    segments: List[Segment] = []
+    for line in re.split(r"(\n+)", text):
+        if not line:
+            continue
+        if line.startswith("\n"):
+            if segments:
+                segments[-1] = (segments[-1][0], segments[-1][1] + line)
+            else:
+                segments.append(("", line))
+            continue
+        parts = _SENTENCE_END.split(line)
+        separators = _SENTENCE_END.findall(line) + [""]
+        for part, separator in zip(parts, separators):
+            segments.append((part, separator))
+    return segments
+
+
+def needs_translation(segment: str) -> bool:
+    """Numbers, amounts and punctuation are copied as they are."""
+    return bool(_LETTER.search(segment))
+
+
+def segment_hash(segment: str) -> str:
+    """SHA-256 of a segment with whitespace normalised."""
+    return hashlib.sha256(" ".join(segment.split()).encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Persistent segment translations in SQLite, keyed by (segment hash, target language).
+
+    Boilerplate that recurs across documents (headers, legal footers, standard
+    clauses) is translated once; later documents only send new sentences to
+    the LLM. Uses WAL and one connection per thread, like the search index.
+
+    Args:
+        path (str): SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, hashes: Iterable[str], target: str) -> Dict[str, str]:
+        """
+        Stored translations for the given segment hashes.
+
+        Args:
+            hashes (Iterable[str]): Segment hashes (see segment_hash()).
+            target (str): Target language key.
+
+        Returns:
+            Dict[str, str]: Hash -> translation for the segments found.
+        """
+        unique = list(dict.fromkeys(hashes))
+        found: Dict[str, str] = {}
+        conn = self._connection()
+        with conn:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start:start + _LOOKUP_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT hash, translation FROM segments WHERE target = ? AND hash IN ({marks})",
+                    [target, *chunk],
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    conn.executemany(
+                        "UPDATE segments SET hits = hits + 1 WHERE hash = ? AND target = ?",
+                        [(h, target) for h, _ in rows],
+                    )
+        return found
+
+    def store(self, target: str, pairs: Iterable[Tuple[str, str]]) -> None:
+        """
+        Save segment translations.
+
+        Args:
+            target (str): Target language key.
+            pairs (Iterable[tuple]): (source segment, translation) pairs.
+        """
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = [(segment_hash(source), target, source, translation, now) for source, translation in pairs]
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO segments (hash, target, source, translation, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (hash, target) DO UPDATE SET translation = excluded.translation",
+                rows,
+            )
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        rows = conn.execute("SELECT target, COUNT(*), COALESCE(SUM(hits), 0) FROM segments GROUP BY target").fetchall()
+        return {
+            "segments": sum(count for _, count, _ in rows),
+            "hits": sum(hits for _, _, hits in rows),
+            "targets": {target: {"segments": count, "hits": hits} for target, count, hits in rows},
+        }
+
+
+@lru_cache(maxsize=None)
+def get_memory(path: Optional[str] = None) -> TranslationMemory:
+    """
+    Shared TranslationMemory for a database file.
+
+    Args:
+        path (str, optional): Database file (default: $TRANSLATION_MEMORY_PATH or translation_memory/tm.sqlite3).
+
+    Returns:
+        TranslationMemory: Memory instance, created once per path.
+    """
+    return TranslationMemory(path or os.getenv("TRANSLATION_MEMORY_PATH", os.path.join("translation_memory", "tm.sqlite3")))
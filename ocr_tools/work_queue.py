@@ -0,0 +1,267 @@
+# ocr_tools/work_queue.py
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from ocr_tools.scheduler import INTERACTIVE, PRIORITIES
+from utils.file_utils import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+# A page whose worker crashed or stalled is handed out again after its lease;
+# after this many attempts it is reported as failed
+MAX_ATTEMPTS = 3
+DEFAULT_LEASE_SECONDS = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    dpi INTEGER NOT NULL,
+    document BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    page INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    UNIQUE (job_id, page)
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, priority, id);
+"""
+
+
+class TaskQueue(ABC):
+    """
+    Backend interface for distributing page tasks to worker nodes.
+
+    A coordinator submits a document split into one task per page and polls
+    for results; workers on any node claim tasks under a lease, OCR the page
+    and complete it. A task whose lease expires is claimed again, so a crashed
+    worker delays its page instead of losing it. Implementations only need
+    these methods; register them with register_backend().
+    """
+
+    @abstractmethod
+    def submit(self, sha256: str, filename: str, document: bytes, engine: str, dpi: int,
+               pages: Sequence[int], priority: str = INTERACTIVE) -> str:
+        """Store a document and enqueue one task per page; returns the job id."""
+
+    @abstractmethod
+    def claim(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict]:
+        """Lease the next task (interactive before bulk, then oldest first), or None if idle."""
+
+    @abstractmethod
+    def document(self, job_id: str) -> Optional[bytes]:
+        """Content of a job's document (None once the job is finished)."""
+
+    @abstractmethod
+    def complete(self, task_id: int, worker: str, result: Dict) -> None:
+        """Store a task's result; ignored if the task is no longer running."""
+
+    @abstractmethod
+    def fail(self, task_id: int, worker: str, error: str) -> None:
+        """Record a failed attempt; the task is retried until MAX_ATTEMPTS."""
+
+    @abstractmethod
+    def progress(self, job_id: str) -> Dict[str, int]:
+        """Number of a job's tasks in each status ('pending', 'running', 'done', 'failed'); cheap enough to poll."""
+
+    @abstractmethod
+    def results(self, job_id: str) -> List[Dict]:
+        """``page``, ``status`` and ``result`` or ``error`` of every task of a job, in page order."""
+
+    @abstractmethod
+    def finish(self, job_id: str) -> None:
+        """Drop a job and its tasks once the coordinator has its results (or gave up)."""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Queue-wide counts for monitoring."""
+
+
+class SQLiteQueue(TaskQueue):
+    """
+    TaskQueue in one SQLite file, for worker processes on a single host (or
+    tests). Claims take a write lock (BEGIN IMMEDIATE), so each task is
+    leased to exactly one worker; WAL keeps coordinators' polling reads
+    from blocking workers.
+
+    Args:
+        path (str): Database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly in _transaction()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def submit(self, sha256: str, filename: str, document: bytes, engine: str, dpi: int,
+               pages: Sequence[int], priority: str = INTERACTIVE) -> str:
+        job_id = uuid.uuid4().hex
+        rank = PRIORITIES.index(priority) if priority in PRIORITIES else len(PRIORITIES)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, sha256, filename, engine, dpi, document, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, sha256, filename, engine, dpi, document, time.time()),
+            )
+            conn.executemany(
+                "INSERT INTO tasks (job_id, page, priority) VALUES (?, ?, ?)",
+                [(job_id, page, rank) for page in pages],
+            )
+        return job_id
+
+    def claim(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict]:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired ' || attempts || ' times' "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, MAX_ATTEMPTS),
+            )
+            row = conn.execute(
+                "SELECT t.id, t.job_id, t.page, t.attempts, j.sha256, j.filename, j.engine, j.dpi "
+                "FROM tasks t JOIN jobs j ON j.id = t.job_id "
+                "WHERE t.status = 'pending' OR (t.status = 'running' AND t.lease_until < ?) "
+                "ORDER BY t.priority, t.id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now + lease_seconds, row[0]),
+            )
+        keys = ("id", "job_id", "page", "attempts", "sha256", "filename", "engine", "dpi")
+        task = dict(zip(keys, row))
+        task["attempts"] += 1
+        return task
+
+    def document(self, job_id: str) -> Optional[bytes]:
+        row = self._connection().execute("SELECT document FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def complete(self, task_id: int, worker: str, result: Dict) -> None:
+        with self._transaction() as conn:
+            # A worker whose lease expired may finish after another took over; first result wins
+            conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, worker = ? WHERE id = ? AND status = 'running'",
+                (json.dumps(result, ensure_ascii=False), worker, task_id),
+            )
+
+    def fail(self, task_id: int, worker: str, error: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_until = NULL WHERE id = ? AND worker = ? AND status = 'running'",
+                (MAX_ATTEMPTS, error, task_id, worker),
+            )
+
+    def progress(self, job_id: str) -> Dict[str, int]:
+        return dict(self._connection().execute(
+            "SELECT status, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY status", (job_id,)
+        ).fetchall())
+
+    def results(self, job_id: str) -> List[Dict]:
+        rows = self._connection().execute(
+            "SELECT page, status, result, error FROM tasks WHERE job_id = ? ORDER BY page", (job_id,)
+        ).fetchall()
+        return [
+            {"page": page, "status": status, "result": json.loads(result) if result else None, "error": error}
+            for page, status, result, error in rows
+        ]
+
+    def finish(self, job_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        tasks = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        workers = conn.execute(
+            "SELECT COUNT(DISTINCT worker) FROM tasks WHERE status = 'running' AND lease_until >= ?", (time.time(),)
+        ).fetchone()[0]
+        jobs = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {"jobs": jobs, "tasks": tasks, "busy_workers": workers}
+
+
+_BACKENDS: Dict[str, Callable[[str], TaskQueue]] = {"sqlite": SQLiteQueue}
+_queue: Optional[TaskQueue] = None
+
+
+def register_backend(scheme: str, factory: Callable[[str], TaskQueue]) -> None:
+    """
+    Make a queue backend available to open_queue() as ``<scheme>://<location>``.
+
+    Args:
+        scheme (str): URL scheme, e.g. 'redis'.
+        factory (Callable): Called with the part after ``scheme://``.
+    """
+    _BACKENDS[scheme] = factory
+
+
+def open_queue(url: str) -> TaskQueue:
+    """
+    Open a queue from a URL such as ``sqlite:///var/ocr/queue.sqlite3``.
+
+    A plain path is taken as a SQLite file.
+
+    Returns:
+        TaskQueue: Queue backend.
+    """
+    scheme, sep, location = url.partition("://")
+    if not sep:
+        return SQLiteQueue(url)
+    if scheme not in _BACKENDS:
+        raise ValueError(f"❌ Unknown work queue backend '{scheme}' (available: {', '.join(sorted(_BACKENDS))})")
+    return _BACKENDS[scheme](location)
+
+
+def install_queue(queue: Optional[TaskQueue]) -> None:
+    """Send extract_pages() page tasks to worker nodes through this queue (None: OCR locally)."""
+    global _queue
+    _queue = queue
+
+
+def get_queue() -> Optional[TaskQueue]:
+    return _queue
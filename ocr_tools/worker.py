@@ -0,0 +1,127 @@
+# ocr_tools/worker.py
+
+import os
+import time
+import socket
+import argparse
+import tempfile
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from utils.cpu_budget import CoreBudget
+from utils.config import get_setting
+from ocr_tools.work_queue import DEFAULT_LEASE_SECONDS, TaskQueue, open_queue
+
+logger = logging.getLogger(__name__)
+
+# Documents kept on local disk per worker process, so consecutive pages of a
+# job are not fetched from the queue again
+DOCUMENTS_KEPT = 4
+IDLE_SLEEP_SECONDS = 0.2
+
+
+class _Documents:
+    """Local copies of job documents, least recently used removed first."""
+
+    def __init__(self, queue: TaskQueue):
+        self.queue = queue
+        self._paths: "OrderedDict[str, str]" = OrderedDict()
+
+    def path(self, task: Dict) -> str:
+        job_id = task["job_id"]
+        if job_id in self._paths:
+            self._paths.move_to_end(job_id)
+            return self._paths[job_id]
+        content = self.queue.document(job_id)
+        if content is None:
+            raise LookupError(f"job {job_id} is gone")
+        suffix = os.path.splitext(task["filename"])[1]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, prefix="ocr-worker-") as tmp:
+            tmp.write(content)
+        self._paths[job_id] = tmp.name
+        while len(self._paths) > DOCUMENTS_KEPT:
+            _, old = self._paths.popitem(last=False)
+            os.remove(old)
+        return tmp.name
+
+    def close(self) -> None:
+        for path in self._paths.values():
+            os.remove(path)
+        self._paths.clear()
+
+
+def run_worker(queue_url: str, name: Optional[str] = None, idle_exit: Optional[float] = None,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+    """
+    Claim and OCR page tasks until stopped.
+
+    Args:
+        queue_url (str): Work queue URL (see open_queue()).
+        name (str, optional): Worker name recorded on its tasks (default: host:pid).
+        idle_exit (float, optional): Exit after this many seconds without work.
+        lease_seconds (float): How long a claimed page is reserved for this worker.
+
+    Returns:
+        int: Number of pages processed.
+    """
+    from ocr_tools.extract import iter_page_results
+
+    queue = open_queue(queue_url)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    documents = _Documents(queue)
+    processed = 0
+    idle_since = time.monotonic()
+    try:
+        while True:
+            task = queue.claim(name, lease_seconds)
+            if task is None:
+                if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                    break
+                time.sleep(IDLE_SLEEP_SECONDS)
+                continue
+            try:
+                path = documents.path(task)
+                results = iter_page_results(path, task["engine"], task["dpi"], pages=[task["page"]], doc_hash=task["sha256"])
+                _, _, result = next(results)
+                results.close()
+                queue.complete(task["id"], name, result)
+                processed += 1
+            except LookupError:
+                continue  # the coordinator gave up on this job
+            except Exception as e:
+                logger.error(f"Page {task['page']} of job {task['job_id']} failed (attempt {task['attempts']}): {e}")
+                queue.fail(task["id"], name, str(e))
+            idle_since = time.monotonic()
+    finally:
+        documents.close()
+    return processed
+
+
+def _run_worker(args: tuple) -> int:
+    queue_url, index, idle_exit, lease_seconds = args
+    return run_worker(queue_url, f"{socket.gethostname()}:{os.getpid()}:{index}", idle_exit, lease_seconds)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run OCR worker processes that take page tasks from a work queue.")
+    parser.add_argument("--queue", default=get_setting("WORK_QUEUE_URL"), help="Work queue URL (default: WORK_QUEUE_URL)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: from the core budget)")
+    parser.add_argument("--engines", nargs="+", default=get_setting("OCR_ENGINES", ["tesseract"]), help="Engines to size threads for")
+    parser.add_argument("--pin", action="store_true", help="Pin each worker process to its own CPUs")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Seconds a claimed page is reserved")
+    parser.add_argument("--idle-exit", type=float, default=None, help="Exit after this many idle seconds")
+    args = parser.parse_args(argv)
+    if not args.queue:
+        parser.error("--queue or WORK_QUEUE_URL is required")
+
+    logging.basicConfig(level=logging.INFO)
+    budget = CoreBudget(workers=args.workers, engines=args.engines, pin=args.pin)
+    logger.info(f"Core budget: {budget.describe()}; queue {args.queue}")
+    with budget.process_pool() as pool:
+        jobs = [(args.queue, i, args.idle_exit, args.lease) for i in range(budget.workers)]
+        processed = sum(pool.map(_run_worker, jobs))
+    logger.info(f"Processed {processed} pages")
+
+
+if __name__ == "__main__":
+    main()
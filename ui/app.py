@@ -2,14 +2,13 @@
 
 import streamlit as st
 import requests
-import base64
 from PIL import Image
 import io
 import fitz  # PyMuPDF
 from fitz import Page  # type: ignore
 import json
+import hashlib
 from datetime import datetime
-import os
 
 # --- Page Config ---
 st.set_page_config(page_title="OCR Utility - Streamlit UI", layout="centered")
@@ -56,8 +55,89 @@ def create_download_data(results_dict, filename):
     }
     return json.dumps(data, indent=2)
 
-def run_all_tools(img_base64, file_bytes, file_type, uploaded_file_name, engine, expected_text=""):
-    """Run all OCR tools sequentially"""
+# === Cached Tool Calls ===
+# Streamlit reruns this script on every widget change. Results are cached on the
+# uploaded file's SHA-256 plus the tool settings; arguments prefixed with "_" are
+# excluded from the cache key, so the file bytes are never re-hashed.
+def post_tool(tool, data, files=None):
+    """POST to an MCP server tool and return its result, raising on errors so they are not cached"""
+    response = requests.post(f"http://localhost:8001/tools/{tool}", data=data, files=files)
+    result = response.json()
+    if "result" not in result:
+        raise RuntimeError(result.get("error", "Failed"))
+    return result["result"]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_extract(file_hash, engine, _file_name, _file_bytes, _file_type):
+    # The original file is sent; full-resolution rasterization happens on the server
+    files = {"uploaded_file": (_file_name, _file_bytes, _file_type)}
+    return post_tool("extract", {"engine": engine}, files=files)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_summarise(file_hash, engine, summary_engine, _file_name, _file_bytes, _file_type):
+    files = {"uploaded_file": (_file_name, _file_bytes, _file_type)}
+    return post_tool("summarise", {"engine": engine, "summary_engine": summary_engine}, files=files)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_translate(summary, target_language):
+    # Translates the already-computed summary, so a language change skips OCR and summarisation
+    return post_tool("translate", {"summary": summary, "target_language": target_language})
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_test(file_hash, engine, expected_text, _file_name, _file_bytes, _file_type):
+    files = {"uploaded_file": (_file_name, _file_bytes, _file_type)}
+    return post_tool("test", {"expected": expected_text, "engine": engine}, files=files)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_train(file_hash, engine, expected_text, _file_name, _file_bytes, _file_type):
+    files = {"uploaded_file": (_file_name, _file_bytes, _file_type)}
+    return post_tool("train", {"expected": expected_text, "engine": engine}, files=files)
+
+# === Lazy Page Preview ===
+PREVIEW_DPI = 72
+PREVIEW_MAX_SIZE = (1200, 1200)
+
+@st.cache_resource(max_entries=2)
+def open_pdf(file_hash, _file_bytes):
+    """Open the PDF once per upload; PyMuPDF parses pages lazily"""
+    return fitz.open(stream=_file_bytes, filetype="pdf")
+
+def fetch_page_preview(file_name, file_type, page_index, file_bytes):
+    """Ask the server for the page; it uploads the whole document, so only when local rendering fails"""
+    files = {"uploaded_file": (file_name, file_bytes, file_type)}
+    response = requests.post(
+        "http://localhost:8001/tools/preview", data={"page": page_index, "dpi": PREVIEW_DPI}, files=files, timeout=30
+    )
+    if response.headers.get("content-type") != "image/png":
+        raise RuntimeError(response.json().get("error", "Failed"))
+    return response.content
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def render_page_preview(file_hash, file_type, page_index, _file_bytes, _file_name="document.pdf"):
+    """Render one page as a low-resolution PNG thumbnail, only when it is viewed"""
+    if file_type == "application/pdf":
+        try:
+            page = open_pdf(file_hash, _file_bytes).load_page(page_index)
+            # Use type: ignore to suppress linter error for get_pixmap/getPixmap
+            try:
+                pix = page.get_pixmap(dpi=PREVIEW_DPI)  # type: ignore
+            except AttributeError:
+                pix = page.getPixmap(dpi=PREVIEW_DPI)  # type: ignore
+            return pix.tobytes("png")
+        except Exception:
+            # A page this PyMuPDF cannot render: let the server try
+            return fetch_page_preview(_file_name, file_type, page_index, _file_bytes)
+
+    image = Image.open(io.BytesIO(_file_bytes))
+    image.seek(page_index)  # multi-page TIFF frame
+    image.draft("RGB", PREVIEW_MAX_SIZE)  # lets JPEG decode at reduced scale
+    image.thumbnail(PREVIEW_MAX_SIZE)
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def run_all_tools(file_hash, file_bytes, file_type, uploaded_file_name, engine, expected_text="", summary_engine="groq"):
+    """Run all OCR tools sequentially, reusing cached results from earlier reruns"""
     results = {}
     
     # Progress bar for all tools
@@ -67,43 +147,23 @@ def run_all_tools(img_base64, file_bytes, file_type, uploaded_file_name, engine,
     try:
         # Tool 1: Extract
         status_text.text("🔍 Running Text Extraction...")
-        response = requests.post("http://localhost:8001/tools/extract", data={
-            "image_base64": img_base64,
-            "engine": engine
-        })
-        results["extract"] = response.json().get("result", "Failed")
+        results["extract"] = cached_extract(file_hash, engine, uploaded_file_name, file_bytes, file_type)
         progress_bar.progress(25)
         
         # Tool 2: Summarise
         status_text.text("📝 Running Summarization...")
-        files = {"uploaded_file": (uploaded_file_name, file_bytes, file_type)}
-        response = requests.post(
-            "http://localhost:8001/tools/summarise",
-            files=files,
-            data={"engine": engine}
-        )
-        results["summarise"] = response.json().get("result", "Failed")
+        results["summarise"] = cached_summarise(file_hash, engine, summary_engine, uploaded_file_name, file_bytes, file_type)
         progress_bar.progress(50)
         
         # Tool 3: Test (if expected text provided)
         if expected_text.strip():
             status_text.text("✅ Running Accuracy Test...")
-            response = requests.post(
-                "http://localhost:8001/tools/test",
-                files=files,
-                data={"expected": expected_text, "engine": engine}
-            )
-            results["test"] = response.json().get("result", "Failed")
+            results["test"] = cached_test(file_hash, engine, expected_text, uploaded_file_name, file_bytes, file_type)
             progress_bar.progress(75)
             
             # Tool 4: Train
             status_text.text("🎓 Saving Training Data...")
-            response = requests.post(
-                "http://localhost:8001/tools/train",
-                files=files,
-                data={"expected": expected_text, "engine": engine}
-            )
-            results["train"] = response.json().get("result", "Failed")
+            results["train"] = cached_train(file_hash, engine, expected_text, uploaded_file_name, file_bytes, file_type)
         else:
             results["test"] = "Skipped - No expected text provided"
             results["train"] = "Skipped - No expected text provided"
@@ -125,7 +185,8 @@ st.markdown("### 🔄 **Auto-Run All Tools** - Complete OCR Pipeline")
 # Sidebar for settings
 with st.sidebar:
     st.header("⚙️ Settings")
-    engine = st.selectbox("OCR Engine", ["tesseract", "nougat", "mistral"])
+    engine = st.selectbox("OCR Engine", ["tesseract", "nougat", "mistral", "cascade"], help="cascade: Tesseract first, Mistral only for low-confidence lines")
+    summary_engine = st.selectbox("Summary Engine", ["groq", "textrank"], help="textrank: fast local extractive summary, no LLM call")
     auto_run = st.checkbox("🔄 Auto-run all tools", value=True, help="Automatically run all tools when file is uploaded")
     st.markdown("---")
     st.markdown("**Available Tools:**")
@@ -155,49 +216,45 @@ LANGUAGE_NAMES = [f"{name} ({code})" for name, code in LANGUAGES]
 LANGUAGE_CODE_MAP = {f"{name} ({code})": code for name, code in LANGUAGES}
 
 # Main content
-uploaded_file = st.file_uploader("📁 Upload Image or PDF", type=["png", "jpg", "jpeg", "pdf"])
+uploaded_file = st.file_uploader("📁 Upload Image or PDF", type=["png", "jpg", "jpeg", "tif", "tiff", "pdf"])
 
 if uploaded_file:
     st.session_state.uploaded_filename = uploaded_file.name
     file_bytes = uploaded_file.read()
     file_type = uploaded_file.type
 
-    # Convert PDF to image if needed
-    if file_type == "application/pdf":
-        st.info("📄 PDF uploaded. Converting first page to image...")
-        try:
-            pdf_doc = fitz.open(stream=file_bytes, filetype="pdf")
-            page = pdf_doc.load_page(0)
-            # Use type: ignore to suppress linter error for get_pixmap/getPixmap
-            try:
-                pix = page.get_pixmap(dpi=300)  # type: ignore
-            except AttributeError:
-                pix = page.getPixmap(dpi=300)  # type: ignore
-            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-        except Exception as e:
-            st.error(f"❌ PDF conversion failed: {e}")
-            st.stop()
-    else:
-        try:
-            image = Image.open(io.BytesIO(file_bytes))
-        except Exception as e:
-            st.error(f"❌ Image load failed: {e}")
-            st.stop()
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+
+    # Page navigator: thumbnails are rendered lazily, one page at a time
+    try:
+        if file_type == "application/pdf":
+            page_count = open_pdf(file_hash, file_bytes).page_count
+        else:
+            page_count = getattr(Image.open(io.BytesIO(file_bytes)), "n_frames", 1)
+    except Exception as e:
+        st.error(f"❌ PDF conversion failed: {e}")
+        st.stop()
+
+    page_index = 0
+    if page_count > 1:
+        page_index = st.number_input(f"📄 Preview page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1) - 1
+
+    try:
+        preview_png = render_page_preview(file_hash, file_type, page_index, file_bytes, uploaded_file.name)
+    except Exception as e:
+        st.error(f"❌ {'PDF conversion' if file_type == 'application/pdf' else 'Image load'} failed: {e}")
+        st.stop()
 
     # Display uploaded image
     col1, col2 = st.columns([2, 1])
     with col1:
-        st.image(image, caption="Uploaded Document", use_container_width=True)
+        st.image(preview_png, caption=f"Uploaded Document (page {page_index + 1})", use_container_width=True)
     with col2:
         st.markdown(f"**File:** {uploaded_file.name}")
         st.markdown(f"**Size:** {len(file_bytes):,} bytes")
+        st.markdown(f"**Pages:** {page_count}")
         st.markdown(f"**Engine:** {engine}")
 
-    # Encode image to base64
-    buffer = io.BytesIO()
-    image.save(buffer, format="PNG")
-    img_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-
     # Expected text input (for test and train)
     expected_text = st.text_area("✍️ Expected Text (for accuracy testing & training)", 
                                 placeholder="Enter the expected text from this document...",
@@ -210,20 +267,18 @@ if uploaded_file:
         
         # Run extract and summarise always
         results = {}
-        results.update(run_all_tools(img_base64, file_bytes, file_type, uploaded_file.name, engine, expected_text=""))
+        results.update(run_all_tools(file_hash, file_bytes, file_type, uploaded_file.name, engine, expected_text="", summary_engine=summary_engine))
 
         # Language selection for auto-run
         st.markdown("---")
         selected_lang_display = st.selectbox("🌐 Select Translation Language", LANGUAGE_NAMES, index=0, key="auto_lang")
         selected_lang_code = LANGUAGE_CODE_MAP[selected_lang_display]
-        # Run translate tool
-        files = {"uploaded_file": (uploaded_file.name, file_bytes, file_type)}
-        response = requests.post(
-            "http://localhost:8001/tools/translate",
-            files=files,
-            data={"target_language": selected_lang_display, "engine": engine}
-        )
-        results["translate"] = response.json().get("result", "Failed")
+        # Run translate tool on the cached summary; only this step reruns when the language changes
+        if "summarise" in results:
+            try:
+                results["translate"] = cached_translate(results["summarise"], selected_lang_display)
+            except Exception as e:
+                results["translate"] = f"Failed: {e}"
         
         # Display results
         st.markdown("---")
@@ -249,7 +304,7 @@ if uploaded_file:
         
         # If expected text is provided, run and show test/train
         if expected_text.strip():
-            test_train_results = run_all_tools(img_base64, file_bytes, file_type, uploaded_file.name, engine, expected_text)
+            test_train_results = run_all_tools(file_hash, file_bytes, file_type, uploaded_file.name, engine, expected_text, summary_engine)
             # Test results
             with st.expander("✅ **Accuracy Test Results**", expanded=True):
                 st.markdown("<div class='result-box'>", unsafe_allow_html=True)
@@ -322,10 +377,12 @@ if uploaded_file:
             with st.spinner("⏳ Contacting OCR MCP server..."):
                 try:
                     if option == "extract":
-                        response = requests.post("http://localhost:8001/tools/extract", data={
-                            "image_base64": img_base64,
-                            "engine": engine
-                        })
+                        files = {"uploaded_file": (uploaded_file.name, file_bytes, file_type)}
+                        response = requests.post(
+                            "http://localhost:8001/tools/extract",
+                            files=files,
+                            data={"engine": engine}
+                        )
 
                     elif option == "summarise":
                         files = {"uploaded_file": (uploaded_file.name, file_bytes, file_type)}
@@ -360,22 +417,41 @@ if uploaded_file:
 
 # === Download Training Data Section ===
 with st.expander("📥 Download Training Data", expanded=False):
-    dataset_dir = os.path.join(os.getcwd(), "training_dataset")
-    if os.path.exists(dataset_dir):
-        files = [f for f in os.listdir(dataset_dir) if os.path.isfile(os.path.join(dataset_dir, f))]
-        if files:
-            for file in files:
-                file_path = os.path.join(dataset_dir, file)
-                with open(file_path, "rb") as f:
-                    st.download_button(
-                        label=f"⬇️ {file}",
-                        data=f.read(),
-                        file_name=file,
-                        mime="application/pdf" if file.lower().endswith(".pdf") else ("text/plain" if file.lower().endswith(".txt") else "application/octet-stream")
-                    )
-        else:
-            st.info("No training data files found.")
+    page_size = 20
+    export_engine = st.selectbox("Engine filter", ["all", "tesseract", "nougat", "mistral"], key="dataset_engine")
+    engine_param = None if export_engine == "all" else export_engine
+    page_number = st.number_input("Page", min_value=1, value=1, step=1, key="dataset_page")
+    try:
+        response = requests.get(
+            "http://localhost:8001/tools/dataset/list",
+            params={"offset": (page_number - 1) * page_size, "limit": page_size, "engine": engine_param},
+            timeout=5
+        )
+        listing = response.json()
+    except Exception as e:
+        listing = {"error": str(e)}
+
+    if listing.get("result"):
+        st.dataframe([
+            {
+                "Sample": record["filename"],
+                "Engine": record["engine"],
+                "Size (KB)": f"{record['size'] / 1024:.1f}",
+                "Label Preview": record["label_preview"] or "No label",
+                "Added": record["created_at"],
+            }
+            for record in listing["result"]
+        ], use_container_width=True)
+        st.caption(f"Showing {len(listing['result'])} of {listing['total']} samples")
+        export_query = f"&engine={engine_param}" if engine_param else ""
+        col1, col2 = st.columns(2)
+        with col1:
+            st.link_button("⬇️ Download as ZIP", f"http://localhost:8001/tools/dataset/export?format=zip{export_query}")
+        with col2:
+            st.link_button("⬇️ Download as TAR", f"http://localhost:8001/tools/dataset/export?format=tar{export_query}")
+    elif "error" in listing:
+        st.info(f"Training dataset unavailable: {listing['error']}")
     else:
-        st.info("training_dataset/ folder does not exist.")
+        st.info("No training data files found.")
 
 st.markdown("</div>", unsafe_allow_html=True)
@@ -6,9 +6,7 @@ import base64
 from PIL import Image
 import io
 import fitz  # PyMuPDF
-import os
 import json
-import zipfile
 from datetime import datetime
 import pandas as pd
 
@@ -28,17 +26,13 @@ st.markdown(
 )
 
 # === Helper Functions (moved up) ===
-def create_dataset_zip():
-    """Create a zip file of all files in training_dataset and return as BytesIO."""
-    dataset_dir = "training_dataset"
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w") as zipf:
-        for filename in os.listdir(dataset_dir):
-            file_path = os.path.join(dataset_dir, filename)
-            if os.path.isfile(file_path):
-                zipf.write(file_path, arcname=filename)
-    zip_buffer.seek(0)
-    return zip_buffer
+def fetch_dataset_stats(server_url):
+    """Fetch training dataset counts from the server's manifest index"""
+    try:
+        response = requests.get(f"{server_url}/tools/dataset/stats", timeout=5)
+        return response.json().get("result")
+    except Exception:
+        return None
 
 def create_dataset_csv(dataset_info):
     """Create a CSV file with dataset information"""
@@ -87,60 +81,54 @@ def create_download_button(content, filename, button_text):
 
 def display_training_dataset():
     """Display training dataset information and management options"""
-    if not os.path.exists("training_dataset"):
+    stats = fetch_dataset_stats(server_url)
+    if not stats:
         st.info("No training dataset found")
         return
     
-    files = os.listdir("training_dataset")
-    image_files = [f for f in files if f.endswith(('.png', '.jpg', '.jpeg', '.pdf'))]
-    label_files = [f for f in files if f.endswith('.txt')]
-    
     # Dataset statistics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("📄 Total Images", len(image_files))
+        st.metric("📄 Total Images", stats["total"])
     with col2:
-        st.metric("📝 Total Labels", len(label_files))
+        st.metric("📝 Total Labels", stats["labelled"])
     with col3:
-        st.metric("🔧 Tesseract Samples", len([f for f in image_files if f.startswith('tesseract')]))
+        st.metric("🔧 Tesseract Samples", stats["engines"].get("tesseract", 0))
     with col4:
-        st.metric("🤖 Nougat Samples", len([f for f in image_files if f.startswith('nougat')]))
+        st.metric("🤖 Nougat Samples", stats["engines"].get("nougat", 0))
     
-    # Dataset table
-    if image_files:
+    # Dataset table (one page of manifest metadata at a time)
+    if stats["total"]:
         st.subheader("📋 Dataset Contents")
         
+        page_size = 50
+        page_count = (stats["total"] + page_size - 1) // page_size
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        response = requests.get(
+            f"{server_url}/tools/dataset/list",
+            params={"offset": (page_number - 1) * page_size, "limit": page_size},
+            timeout=5
+        )
+        
         # Create dataset info
         dataset_info = []
-        for img_file in image_files:
-            base_name = img_file.rsplit('.', 1)[0]
-            label_file = f"{base_name}.txt"
-            label_path = os.path.join("training_dataset", label_file)
-            
-            if os.path.exists(label_path):
-                with open(label_path, 'r', encoding='utf-8') as f:
-                    label_text = f.read().strip()
-            else:
-                label_text = "No label found"
-            
-            engine = "tesseract" if img_file.startswith("tesseract") else "nougat"
-            file_size = os.path.getsize(os.path.join("training_dataset", img_file)) / 1024
-            
+        for record in response.json().get("result", []):
+            label_text = record["label_preview"] or "No label found"
             dataset_info.append({
-                "Image": img_file,
-                "Engine": engine,
-                "Size (KB)": f"{file_size:.1f}",
-                "Label Preview": label_text[:50] + "..." if len(label_text) > 50 else label_text
+                "Image": record["filename"],
+                "Engine": record["engine"],
+                "Size (KB)": f"{record['size'] / 1024:.1f}",
+                "Label Preview": label_text[:50] + "..." if record["label_chars"] > 50 else label_text
             })
         
         df = pd.DataFrame(dataset_info)
         st.dataframe(df, use_container_width=True)
+        st.caption(f"Page {page_number} of {page_count}")
         
         # Download options
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("📥 Download Dataset (ZIP)"):
-                create_dataset_zip()
+            st.link_button("📥 Download Dataset (ZIP)", f"{server_url}/tools/dataset/export?format=zip")
         with col2:
             if st.button("📊 Export Dataset Info (CSV)"):
                 create_dataset_csv(dataset_info)
@@ -159,8 +147,8 @@ with st.sidebar:
     # OCR Engine Selection
     engine = st.selectbox(
         "🔧 OCR Engine", 
-        ["tesseract", "nougat"],
-        help="Choose the OCR engine for text extraction"
+        ["tesseract", "nougat", "cascade"],
+        help="Choose the OCR engine for text extraction (cascade: Tesseract first, heavier model only for low-confidence text)"
     )
     
     # Server Configuration
@@ -178,22 +166,13 @@ with st.sidebar:
         
     # Training Dataset Info
     st.subheader("📊 Training Dataset")
-    if os.path.exists("training_dataset"):
-        files = os.listdir("training_dataset")
-        image_files = [f for f in files if f.endswith((".png", ".jpg", ".jpeg", ".pdf"))]
-        label_files = [f for f in files if f.endswith('.txt')]
+    dataset_stats = fetch_dataset_stats(server_url)
+    if dataset_stats:
+        st.metric("📄 Images", dataset_stats["total"])
+        st.metric("📝 Labels", dataset_stats["labelled"])
         
-        st.metric("📄 Images", len(image_files))
-        st.metric("📝 Labels", len(label_files))
-        
-        if len(files) > 0:
-            zip_buffer = create_dataset_zip()
-            st.download_button(
-                label="⬇️ Download All as ZIP",
-                data=zip_buffer,
-                file_name="training_dataset.zip",
-                mime="application/zip"
-            )
+        if dataset_stats["total"] > 0:
+            st.link_button("⬇️ Download All as ZIP", f"{server_url}/tools/dataset/export?format=zip")
     else:
         st.info("No training dataset found")
 
@@ -307,10 +286,7 @@ if option != "dataset":
 elif option == "dataset":
     st.subheader("📊 Training Dataset Management")
     
-    if os.path.exists("training_dataset"):
-        display_training_dataset()
-    else:
-        st.info("No training dataset found. Use the train tool to create samples.")
+    display_training_dataset()
 
 st.markdown("</div>", unsafe_allow_html=True)
 
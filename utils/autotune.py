@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+from utils import metrics
+from utils.config import get_setting, performance_config, set_overrides
+from utils.cpu_budget import ENGINE_THREADS, apply_thread_limits, available_cpus
+
+logger = logging.getLogger(__name__)
+
+# Memory per page in flight, per pixel of the raster budget: the grayscale
+# render, the engine's own copy and tile or resize buffers
+BYTES_PER_BUDGET_PIXEL = 3
+# Model weights, loaded once per process and shared by its worker threads
+MODEL_BYTES = {"mistral": 1_400_000_000, "nougat": 1_400_000_000}
+# Share of available memory the server may plan for; the rest is left to the
+# OS page cache, Tesseract's own allocations and other processes
+MEMORY_SHARE = 0.7
+# Page cache: this share of available memory, within these bounds
+PAGE_CACHE_SHARE = 0.1
+PAGE_CACHE_BOUNDS = (64 * 1024 * 1024, 1024 * 1024 * 1024)
+# Smallest raster budget worth tuning down to: an A4 page at 300 dpi
+MIN_PIXEL_BUDGET = 8_700_000
+
+_last: Optional[Dict[str, Any]] = None
+
+
+def available_memory() -> Optional[int]:
+    """
+    Bytes of memory this process can still use: MemAvailable, capped by a cgroup limit.
+
+    Returns:
+        int or None: Available bytes, or None when it cannot be determined.
+    """
+    limits = []
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    limits.append(int(line.split()[1]) * 1024)
+                    break
+    except (OSError, ValueError):
+        try:
+            limits.append(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"))
+        except (AttributeError, ValueError, OSError):
+            pass
+    # Containers: cgroup v2, then v1
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read().strip())
+            if limit.isdigit() and int(limit) < 1 << 60:
+                limits.append(int(limit) - usage)
+            break
+        except (OSError, ValueError):
+            continue
+    return max(0, min(limits)) if limits else None
+
+
+def _sample_page():
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (1240, 1754), color=255)  # A4 at 150 dpi
+    draw = ImageDraw.Draw(image)
+    for line in range(40):
+        draw.text((80, 80 + line * 40), f"Calibration line {line}: invoice total payment account delivery {line * 7}", fill=0)
+    return image
+
+
+def calibrate(cpus: int) -> Optional[Dict[str, float]]:
+    """
+    Time Tesseract on a synthetic page, alone and on every core at once.
+
+    Hyper-threads, CPU quotas and memory bandwidth make the real parallel
+    speed-up lower than the core count; the measured one sizes the workers.
+
+    Args:
+        cpus (int): Cores to load in the parallel run.
+
+    Returns:
+        Dict or None: ``page_seconds`` and ``parallel_speedup``, or None when Tesseract is unavailable.
+    """
+    try:
+        import pytesseract
+
+        page = _sample_page()
+        apply_thread_limits(1)
+        pytesseract.image_to_string(page)  # warm-up: binary and language data in the OS cache
+        start = time.perf_counter()
+        pytesseract.image_to_string(page)
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=cpus) as pool:
+            list(pool.map(lambda _: pytesseract.image_to_string(page), range(cpus)))
+        parallel = time.perf_counter() - start
+    except Exception as e:
+        logger.warning(f"Calibration skipped, Tesseract is not available: {e}")
+        return None
+    return {"page_seconds": round(single, 3), "parallel_speedup": round(min(cpus, cpus * single / parallel), 2)}
+
+
+def loaded_models(engines: Sequence[str]) -> Sequence[str]:
+    """Engines whose weights the engine mix loads; cascade loads its fallback engine."""
+    models = set(engines)
+    if "cascade" in models:
+        models.add(get_setting("CASCADE_FALLBACK_ENGINE", "mistral"))
+    return sorted(models & set(MODEL_BYTES))
+
+
+def recommend(
+    cpus: int,
+    memory: Optional[int],
+    calibration: Optional[Dict[str, float]],
+    engines: Sequence[str],
+    pixel_budget: int,
+    models: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Worker, batch and memory settings for a machine.
+
+    Args:
+        cpus (int): Available cores.
+        memory (int, optional): Available memory in bytes (None: not limited by memory).
+        calibration (Dict, optional): Result of calibrate().
+        engines (Sequence[str]): Engine mix to size threads for.
+        pixel_budget (int): Configured RASTER_PIXEL_BUDGET.
+        models (Sequence[str], optional): Engines whose weights are loaded (default: loaded_models(engines)).
+
+    Returns:
+        Dict[str, Any]: PerformanceConfig field -> value.
+    """
+    wanted = max(ENGINE_THREADS.get(engine, 1) for engine in engines) if engines else 1
+    cores = cpus
+    if calibration:
+        cores = max(1, min(cpus, round(calibration["parallel_speedup"])))
+    workers = max(1, cores // wanted)
+    settings: Dict[str, Any] = {}
+
+    if memory is not None:
+        if models is None:
+            models = loaded_models(engines)
+        plannable = memory * MEMORY_SHARE - sum(MODEL_BYTES.get(model, 0) for model in set(models))
+        cache = int(min(max(memory * PAGE_CACHE_SHARE, PAGE_CACHE_BOUNDS[0]), PAGE_CACHE_BOUNDS[1]))
+        if plannable - cache < BYTES_PER_BUDGET_PIXEL * pixel_budget:
+            # Not even one full-budget page fits: render smaller and keep a minimal cache
+            cache = PAGE_CACHE_BOUNDS[0]
+            pixel_budget = max(MIN_PIXEL_BUDGET, int((plannable - cache) / BYTES_PER_BUDGET_PIXEL))
+            settings["raster_pixel_budget"] = pixel_budget
+        settings["page_cache_max_bytes"] = cache
+        workers = max(1, min(workers, int((plannable - cache) // (BYTES_PER_BUDGET_PIXEL * pixel_budget))))
+
+    settings["ocr_workers"] = workers
+    # Two files per worker keep the page scheduler busy while files are hashed and spooled
+    settings["batch_workers"] = 2 * workers
+    return settings
+
+
+def autotune(apply: bool = True) -> Dict[str, Any]:
+    """
+    Calibrate this machine and use the recommended settings where none are set explicitly.
+
+    Args:
+        apply (bool): Install the settings as auto-tuned values (see set_overrides()).
+
+    Returns:
+        Dict[str, Any]: ``cpus``, ``memory_bytes``, ``calibration``, ``settings`` and ``seconds``.
+    """
+    global _last
+    start = time.perf_counter()
+    config = performance_config()
+    cpus = len(available_cpus())
+    memory = available_memory()
+    calibration = calibrate(cpus)
+    settings = recommend(cpus, memory, calibration, config.ocr_engines, config.raster_pixel_budget)
+    result = {
+        "cpus": cpus,
+        "memory_bytes": memory,
+        "calibration": calibration,
+        "settings": settings,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    logger.info(f"Auto-tune: {result}")
+    if apply:
+        set_overrides(settings)
+        metrics.set_gauge("autotune", result)
+        _last = result
+    return result
+
+
+def last_autotune() -> Optional[Dict[str, Any]]:
+    """Result of the auto-tune run applied in this process, if any."""
+    return _last
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate this machine and print recommended performance settings.")
+    parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    result = autotune(apply=False)
+    print(json.dumps({key.upper(): value for key, value in result["settings"].items()}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import os
+import json
+import threading
+import logging
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, get_args, get_origin
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_PATH = os.getenv(
+    "OCR_SETTINGS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "settings.json"),
+)
+
+_settings: Optional[Dict[str, Any]] = None
+_lock = threading.Lock()
+
+def _read_settings() -> Dict[str, Any]:
+    with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("top level must be an object")
+    return data
+
+def load_settings() -> Dict[str, Any]:
+    """
+    Load config/settings.json once (again after reload_settings()).
+
+    Returns:
+        dict: Settings, or an empty dict if the file is missing or invalid.
+    """
+    global _settings
+    if _settings is None:
+        try:
+            _settings = _read_settings()
+        except FileNotFoundError:
+            logger.warning(f"Settings file not found: {SETTINGS_PATH}")
+            _settings = {}
+        except ValueError as e:
+            logger.error(f"Invalid settings file {SETTINGS_PATH}: {e}")
+            _settings = {}
+    return _settings
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """
+    Read a setting, letting an environment variable of the same name override it.
+
+    Args:
+        key (str): Setting name, e.g. 'OCR_ENGINE'.
+        default: Value used when the setting is absent.
+
+    Returns:
+        The environment value (JSON-decoded when possible), the settings value, or the default.
+    """
+    env_value = os.getenv(key)
+    if env_value is not None:
+        try:
+            return json.loads(env_value)
+        except ValueError:
+            return env_value
+    return load_settings().get(key, default)
+
+@dataclass(frozen=True)
+class PerformanceConfig:
+    """
+    Typed performance knobs. Each field is read from the setting of the same
+    name in upper case (e.g. ``ocr_dpi`` from OCR_DPI), with the usual
+    environment override, then auto-tuned values, then the default here.
+
+    Attributes:
+        ocr_workers: Concurrent OCR pages in the server (None: from the core budget).
+        ocr_pin_cpus: Pin process workers to disjoint CPU sets.
+        ocr_engines: Engine mix the core budget is sized for (default: OCR_ENGINE).
+        batch_workers: Files of one batch request in flight at once (None: ocr_workers).
+        ocr_dpi: PDF rasterization resolution when a caller does not choose one.
+        raster_pixel_budget: Largest pixmap rendered at once; larger pages are tiled or downscaled.
+        page_cache_max_bytes: Rendered page cache budget (0 disables it).
+        summary_max_chars: Extracted text sent to the LLM for a summary.
+        groq_max_tokens: Completion budget of one LLM call.
+        groq_timeout_seconds: Timeout of one LLM HTTP request.
+        groq_rpm: LLM requests per minute (None: unlimited).
+        groq_tpm: LLM tokens per minute (None: unlimited).
+        groq_max_concurrency: LLM calls in flight at once.
+        groq_max_queue_seconds: Longest wait for an LLM slot before the offline fallback.
+    """
+
+    ocr_workers: Optional[int] = None
+    ocr_pin_cpus: bool = False
+    ocr_engines: Tuple[str, ...] = ("tesseract",)
+    batch_workers: Optional[int] = None
+    ocr_dpi: int = 300
+    raster_pixel_budget: int = 16_000_000
+    page_cache_max_bytes: int = 256 * 1024 * 1024
+    summary_max_chars: int = 4000
+    groq_max_tokens: int = 1000
+    groq_timeout_seconds: float = 30.0
+    groq_rpm: Optional[int] = 30
+    groq_tpm: Optional[int] = 6000
+    groq_max_concurrency: int = 8
+    groq_max_queue_seconds: float = 30.0
+
+    def __post_init__(self):
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0:
+                raise ValueError(f"❌ Invalid setting {field.name.upper()}: must not be negative")
+        for name in ("ocr_dpi", "raster_pixel_budget", "summary_max_chars", "groq_max_tokens", "groq_max_concurrency"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"❌ Invalid setting {name.upper()}: must be at least 1")
+
+_config: Optional[PerformanceConfig] = None
+# Values chosen by auto-tuning; explicit settings take precedence
+_overrides: Dict[str, Any] = {}
+_reload_hooks: List[Callable[[PerformanceConfig], None]] = []
+
+def _coerce(name: str, value: Any, annotation: Any) -> Any:
+    """Convert a JSON/env value to a field's type, raising ValueError with the setting name."""
+    optional = get_origin(annotation) is Union and type(None) in get_args(annotation)
+    if value is None:
+        if optional:
+            return None
+        raise ValueError(f"❌ Invalid setting {name}: may not be null")
+    if optional:
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    try:
+        if annotation is bool:
+            if isinstance(value, str) and value.lower() in ("true", "false", "1", "0"):
+                return value.lower() in ("true", "1")
+            if isinstance(value, (bool, int)):
+                return bool(value)
+        elif annotation is int:
+            if not isinstance(value, bool) and float(value) == int(float(value)):
+                return int(float(value))
+        elif annotation is float:
+            if not isinstance(value, bool):
+                return float(value)
+        elif get_origin(annotation) is tuple:
+            items = [value] if isinstance(value, str) else list(value)
+            if all(isinstance(item, str) for item in items):
+                return tuple(items)
+    except (TypeError, ValueError):
+        pass
+    raise ValueError(f"❌ Invalid setting {name}: {value!r} is not {getattr(annotation, '__name__', annotation)}")
+
+def _build(settings: Dict[str, Any], strict: bool = True) -> PerformanceConfig:
+    """Config from environment, settings and overrides; with ``strict`` off, invalid values are logged and skipped."""
+    values = {}
+    for field in fields(PerformanceConfig):
+        key = field.name.upper()
+        env_value = os.getenv(key)
+        if env_value is not None:
+            try:
+                raw = json.loads(env_value)
+            except ValueError:
+                raw = env_value
+        elif key in settings:
+            raw = settings[key]
+        elif field.name in _overrides:
+            raw = _overrides[field.name]
+        else:
+            continue
+        try:
+            value = _coerce(key, raw, field.type)
+            PerformanceConfig(**{field.name: value})
+        except ValueError as e:
+            if strict:
+                raise
+            logger.error(f"{e}; using {getattr(PerformanceConfig, field.name)!r}")
+            continue
+        values[field.name] = value
+    if "ocr_engines" not in values:
+        # Size for the engine the server actually runs by default
+        engine = os.getenv("OCR_ENGINE") or settings.get("OCR_ENGINE")
+        if isinstance(engine, str) and engine:
+            values["ocr_engines"] = (engine,)
+    return PerformanceConfig(**values)
+
+def performance_config() -> PerformanceConfig:
+    """
+    Current performance configuration, built from the settings on first use.
+
+    An invalid value is logged and its default used, so a bad setting cannot
+    keep the server from starting; reload_settings() rejects it instead.
+
+    Returns:
+        PerformanceConfig: Immutable snapshot; call again after a reload.
+    """
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                _config = _build(load_settings(), strict=False)
+    return _config
+
+def setting_sources() -> Dict[str, str]:
+    """Where each performance setting came from: 'environment', 'settings', 'autotune' or 'default'."""
+    settings = load_settings()
+    sources = {}
+    for field in fields(PerformanceConfig):
+        key = field.name.upper()
+        if os.getenv(key) is not None:
+            sources[field.name] = "environment"
+        elif key in settings:
+            sources[field.name] = "settings"
+        elif field.name in _overrides:
+            sources[field.name] = "autotune"
+        else:
+            sources[field.name] = "default"
+    return sources
+
+def on_reload(hook: Callable[[PerformanceConfig], None]) -> None:
+    """
+    Call ``hook(config)`` whenever the performance configuration changes.
+
+    Components that size pools, caches or limiters at start-up register a
+    hook to apply new values in place.
+    """
+    _reload_hooks.append(hook)
+
+def _apply(config: PerformanceConfig) -> PerformanceConfig:
+    global _config
+    previous, _config = _config, config
+    if previous == config:
+        return config
+    changed = {k: v for k, v in asdict(config).items() if previous is None or getattr(previous, k) != v}
+    logger.info(f"Performance settings changed: {changed}")
+    for hook in list(_reload_hooks):
+        try:
+            hook(config)
+        except Exception as e:
+            logger.error(f"Applying performance settings in {getattr(hook, '__qualname__', hook)} failed: {e}")
+    return config
+
+def reload_settings() -> PerformanceConfig:
+    """
+    Re-read config/settings.json and apply the performance settings without a restart.
+
+    The file is validated first; on any error the running configuration is
+    kept. Environment variables are fixed for the life of the process.
+
+    Returns:
+        PerformanceConfig: The configuration now in effect.
+
+    Raises:
+        ValueError: If the file cannot be parsed or a value is invalid.
+    """
+    global _settings
+    try:
+        settings = _read_settings()
+    except FileNotFoundError:
+        settings = {}
+    except ValueError as e:
+        raise ValueError(f"❌ Invalid settings file {SETTINGS_PATH}: {e}")
+    with _lock:
+        config = _build(settings)
+        _settings = settings
+        return _apply(config)
+
+def set_overrides(values: Dict[str, Any]) -> PerformanceConfig:
+    """
+    Use auto-tuned values for settings not given in the environment or settings file.
+
+    Args:
+        values (Dict[str, Any]): Field name -> value.
+
+    Returns:
+        PerformanceConfig: The configuration now in effect.
+    """
+    unknown = set(values) - {field.name for field in fields(PerformanceConfig)}
+    if unknown:
+        raise ValueError(f"❌ Unknown performance settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        previous = dict(_overrides)
+        _overrides.clear()
+        _overrides.update(values)
+        try:
+            config = _build(load_settings())
+        except ValueError:
+            _overrides.clear()
+            _overrides.update(previous)
+            raise
+        return _apply(config)
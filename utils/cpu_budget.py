@@ -0,0 +1,150 @@
+import os
+import sys
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from utils import metrics
+from utils.config import performance_config
+
+logger = logging.getLogger(__name__)
+
+# Threads one OCR call can use well. Tesseract scales poorly past one thread
+# when several pages run side by side; transformer inference benefits from a few.
+ENGINE_THREADS = {"tesseract": 1, "cascade": 1, "mistral": 4, "nougat": 4}
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OMP_THREAD_LIMIT", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+def available_cpus() -> List[int]:
+    """
+    CPU ids this process may run on (respects affinity masks and cgroup cpusets).
+
+    Returns:
+        List[int]: Sorted CPU ids.
+    """
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+def apply_thread_limits(threads: int, cpus: Optional[Sequence[int]] = None) -> None:
+    """
+    Cap the threads used by OpenMP (Tesseract), BLAS and torch in this process.
+
+    Args:
+        threads (int): Threads per OCR call.
+        cpus (Sequence[int], optional): Pin the process to these CPUs.
+    """
+    for var in THREAD_ENV_VARS:
+        # Inherited by the tesseract subprocesses pytesseract spawns
+        os.environ[var] = str(threads)
+
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # only allowed before the first parallel op
+
+    if cpus:
+        try:
+            os.sched_setaffinity(0, set(cpus))
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not pin process to CPUs {list(cpus)}: {e}")
+
+class CoreBudget:
+    """
+    Splits the available cores between OCR workers.
+
+    Each worker gets ``threads_per_worker`` threads for torch, OpenMP and
+    Tesseract so that workers x threads never exceeds the core count. With
+    ``pin`` enabled, process workers are also given disjoint CPU sets.
+
+    Args:
+        workers (int, optional): Number of workers; derived from the engine mix if omitted.
+        engines (Sequence[str]): Engines the workers will run.
+        pin (bool): Pin process workers to disjoint CPU sets.
+        cpus (Sequence[int], optional): CPUs to budget (default: all available).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        engines: Sequence[str] = ("tesseract",),
+        pin: bool = False,
+        cpus: Optional[Sequence[int]] = None,
+    ):
+        self.cpus = list(cpus) if cpus else available_cpus()
+        self.pin = pin
+        wanted = max(ENGINE_THREADS.get(engine, 1) for engine in engines) if engines else 1
+        cores = len(self.cpus)
+        self.workers = max(1, min(workers, cores)) if workers else max(1, cores // wanted)
+        self.threads_per_worker = max(1, cores // self.workers)
+
+    def assignment(self, worker_index: int) -> Dict:
+        """
+        Threads and (when pinning) CPUs for one worker.
+
+        Args:
+            worker_index (int): 0-based worker number.
+
+        Returns:
+            dict: ``threads`` and ``cpus`` (None when not pinned).
+        """
+        cpus = None
+        if self.pin:
+            start = (worker_index % self.workers) * self.threads_per_worker
+            cpus = self.cpus[start:start + self.threads_per_worker]
+        return {"threads": self.threads_per_worker, "cpus": cpus}
+
+    def describe(self) -> Dict:
+        return {
+            "cores": len(self.cpus),
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "pinned": self.pin,
+        }
+
+    def publish(self, name: str = "cpu_budget") -> None:
+        """Expose the budget as a gauge on the metrics endpoint."""
+        metrics.set_gauge(name, self.describe())
+
+    def apply_in_process(self) -> None:
+        """Apply per-worker thread limits for workers that are threads of this process."""
+        apply_thread_limits(self.threads_per_worker)
+
+    def process_pool(self) -> ProcessPoolExecutor:
+        """
+        ProcessPoolExecutor whose workers apply their share of the budget on start.
+
+        Returns:
+            ProcessPoolExecutor: Pool with ``workers`` processes.
+        """
+        counter = multiprocessing.Value("i", 0)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(counter, self.threads_per_worker, self.cpus, self.workers, self.pin),
+        )
+
+def _init_worker(counter, threads: int, cpus: List[int], workers: int, pin: bool) -> None:
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    budget = CoreBudget(workers=workers, pin=pin, cpus=cpus)
+    assignment = budget.assignment(index)
+    apply_thread_limits(threads, assignment["cpus"])
+    logger.info(f"OCR worker {index}: {threads} threads, CPUs {assignment['cpus'] or 'unpinned'}")
+
+def get_server_budget() -> CoreBudget:
+    """
+    Core budget for the API server's in-process OCR workers.
+
+    OCR_WORKERS and OCR_PIN_CPUS (settings or environment) override the defaults.
+
+    Returns:
+        CoreBudget: Budget sized for the configured engine mix.
+    """
+    config = performance_config()
+    return CoreBudget(workers=config.ocr_workers, engines=config.ocr_engines, pin=config.ocr_pin_cpus)
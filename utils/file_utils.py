@@ -1,8 +1,11 @@
 import os
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+HASH_CHUNK_SIZE = 1024 * 1024
+
 def ensure_dir(path: str) -> None:
     """
     Ensure the directory exists. If not, create it.
@@ -28,3 +31,19 @@ def get_file_extension(filename: str) -> str:
         str: Lowercase file extension.
     """
     return os.path.splitext(filename)[1].lower()
+
+def file_sha256(path: str) -> str:
+    """
+    SHA-256 of a file, read in chunks.
+
+    Args:
+        path (str): File to hash.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
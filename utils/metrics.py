@@ -0,0 +1,71 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Union
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, Union[float, dict]] = {}
+_samples: Dict[str, Deque[float]] = {}
+_totals: Dict[str, Dict[str, float]] = {}
+
+# Recent observations kept per summary for percentiles
+WINDOW = 1024
+
+def increment(name: str, value: float = 1) -> None:
+    """
+    Add to a monotonically increasing counter.
+
+    Args:
+        name (str): Counter name, e.g. 'pages_processed'.
+        value (float): Amount to add.
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def set_gauge(name: str, value: Union[float, dict]) -> None:
+    """
+    Set a gauge to its current value (numbers or small JSON-able dicts).
+
+    Args:
+        name (str): Gauge name.
+        value: Current value.
+    """
+    with _lock:
+        _gauges[name] = value
+
+def observe(name: str, value: float) -> None:
+    """
+    Record one observation (e.g. a latency in seconds) in a summary.
+
+    Args:
+        name (str): Summary name.
+        value (float): Observed value.
+    """
+    with _lock:
+        _samples.setdefault(name, deque(maxlen=WINDOW)).append(value)
+        totals = _totals.setdefault(name, {"count": 0, "sum": 0.0})
+        totals["count"] += 1
+        totals["sum"] += value
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def snapshot() -> Dict:
+    """
+    Current values of all metrics.
+
+    Returns:
+        dict: Counters, gauges, and summaries with count, sum and p50/p95/p99
+        over the most recent observations.
+    """
+    with _lock:
+        summaries = {}
+        for name, samples in _samples.items():
+            ordered = sorted(samples)
+            summaries[name] = dict(
+                _totals[name],
+                p50=_percentile(ordered, 0.50),
+                p95=_percentile(ordered, 0.95),
+                p99=_percentile(ordered, 0.99),
+            )
+        return {"counters": dict(_counters), "gauges": dict(_gauges), "summaries": summaries}
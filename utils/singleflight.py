@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+from utils import metrics
+
+def request_key(tool: str, content: bytes, *params: Any) -> str:
+    """
+    Key identifying a computation by tool, content hash and parameters.
+
+    Args:
+        tool (str): Tool name, e.g. 'extract'.
+        content (bytes): Uploaded document content.
+        *params: Parameters that change the result (engine, language, ...).
+
+    Returns:
+        str: Stable key for single-flight deduplication.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    return "|".join([tool, digest] + [repr(param) for param in params])
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests onto one in-flight computation.
+
+    The first caller for a key starts the computation as its own task; callers
+    arriving while it runs await the same task and receive the same result (or
+    exception). A caller disconnecting does not cancel the shared work. Keys
+    are forgotten as soon as the computation finishes, so nothing is cached.
+
+    Args:
+        name (str): Metric prefix, e.g. 'extract'.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key, or join the run already in flight for it.
+
+        Args:
+            key (str): Computation key (see request_key()).
+            fn (Callable): Coroutine factory performing the computation.
+
+        Returns:
+            The computation's result.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.increment(f"singleflight.{self.name}.coalesced")
+        else:
+            metrics.increment(f"singleflight.{self.name}.executed")
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._finish(key))
+            metrics.set_gauge(f"singleflight.{self.name}.inflight", len(self._inflight))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str) -> None:
+        self._inflight.pop(key, None)
+        metrics.set_gauge(f"singleflight.{self.name}.inflight", len(self._inflight))